@@ -1,3 +1,18 @@
 from django.contrib import admin
+from .models import EvaluationJob, AICacheEntry
 
-# Register your models here.
+
+@admin.register(EvaluationJob)
+class EvaluationJobAdmin(admin.ModelAdmin):
+    list_display = ['response', 'status', 'backend', 'attempts', 'queued_at', 'completed_at']
+    list_filter = ['status', 'backend', 'queued_at']
+    search_fields = ['response__interview__title', 'response__interview__user__username']
+    readonly_fields = ['queued_at', 'started_at', 'completed_at', 'updated_at']
+
+
+@admin.register(AICacheEntry)
+class AICacheEntryAdmin(admin.ModelAdmin):
+    list_display = ['key', 'method', 'provider', 'hits', 'last_used_at', 'expires_at']
+    list_filter = ['method', 'provider']
+    search_fields = ['key']
+    readonly_fields = ['created_at', 'last_used_at', 'expires_at', 'hits']
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class AiEngineConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.ai_engine'
+    
+    def ready(self):
+        # Map the question index up front so the first lookup is not a cold start
+        from .vector_index import get_question_index
+        get_question_index()
@@ -0,0 +1,121 @@
+"""
+Micro-batching of AI evaluations.
+
+Callers submit EvaluationItems and block on the returned Future. A daemon
+thread per provider alias collects items until AI_EVALUATION_BATCH['MAX_ITEMS']
+are waiting or the oldest has waited AI_EVALUATION_BATCH['MAX_WAIT_MS'], then
+sends them to the provider as one evaluate_batch() call and resolves each
+Future with its own result. When the batch call fails, the items are retried
+one at a time, so one item the provider cannot handle fails on its own
+instead of failing everything batched with it. Futures cancelled by a
+caller that gave up waiting are dropped before their batch is sent.
+
+Concurrent evaluations in one process - the items of an interview being
+completed, or Celery tasks running on a threaded worker pool - therefore
+share provider calls, which cuts per-request overhead and rate-limit usage.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from django.conf import settings
+from django.db import close_old_connections
+from .providers import get_provider, run_sync
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Groups submitted items into batches of up to ``max_items`` or ``max_wait_ms``"""
+
+    def __init__(self, handler, max_items=8, max_wait_ms=50, name='micro-batcher'):
+        self.handler = handler
+        self.max_items = max_items
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+        self.pending = deque()
+        self.condition = threading.Condition()
+        self.thread = None
+
+    def _ensure_thread(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self.thread.start()
+
+    def submit(self, item):
+        """Queue ``item``; the Future resolves to the handler's result for it"""
+        future = Future()
+        with self.condition:
+            self.pending.append((time.monotonic(), item, future))
+            self._ensure_thread()
+            self.condition.notify()
+        return future
+
+    def _take(self):
+        """Block until a batch is due, then remove and return it"""
+        with self.condition:
+            while True:
+                if not self.pending:
+                    self.condition.wait()
+                    continue
+                waited = time.monotonic() - self.pending[0][0]
+                if len(self.pending) >= self.max_items or waited >= self.max_wait:
+                    break
+                self.condition.wait(self.max_wait - waited)
+            count = min(self.max_items, len(self.pending))
+            batch = [self.pending.popleft() for _ in range(count)]
+        return [entry for entry in batch if entry[2].set_running_or_notify_cancel()]
+
+    def _call(self, items):
+        results = self.handler(items)
+        if len(results) != len(items):
+            raise ValueError(f'Batch handler returned {len(results)} results for {len(items)} items')
+        return results
+
+    def _dispatch(self, batch):
+        items = [item for _, item, _ in batch]
+        try:
+            results = self._call(items)
+        except Exception as exc:
+            if len(batch) == 1:
+                batch[0][2].set_exception(exc)
+                return
+            logger.warning('%s: batch of %d failed, retrying items one by one: %s', self.name, len(items), exc)
+            for _, item, future in batch:
+                try:
+                    future.set_result(self._call([item])[0])
+                except Exception as item_exc:
+                    future.set_exception(item_exc)
+            return
+        for (_, _, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _run(self):
+        while True:
+            batch = self._take()
+            if batch:
+                self._dispatch(batch)
+            close_old_connections()
+
+
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+
+def get_evaluation_batcher(alias='default'):
+    """Process-wide evaluation batcher for the provider ``alias``"""
+    batcher = _batchers.get(alias)
+    if batcher is None:
+        with _batchers_lock:
+            batcher = _batchers.get(alias)
+            if batcher is None:
+                config = getattr(settings, 'AI_EVALUATION_BATCH', {})
+                provider = get_provider(alias)
+                batcher = _batchers[alias] = MicroBatcher(
+                    lambda items: run_sync(provider.evaluate_batch, items),
+                    max_items=config.get('MAX_ITEMS', 8),
+                    max_wait_ms=config.get('MAX_WAIT_MS', 50),
+                    name=f'evaluation-batcher-{alias}',
+                )
+    return batcher
@@ -0,0 +1,247 @@
+"""
+Content-addressed cache for AI generations and evaluations.
+
+Keys are the SHA-256 of (provider, model, method, prompt template version,
+normalized input), so identical requests - the same job_role/required_skills
+or the same question/answer pair - are served without calling the provider.
+
+Two tiers:
+
+* L1: an in-process LRU (AI_CACHE['LRU_SIZE'] entries) with per-entry expiry.
+* L2: Redis (SETEX) when REDIS_URL is reachable, otherwise the AICacheEntry
+  table, pruned to AI_CACHE['MAX_ENTRIES'] rows by least recent use.
+
+Hit/miss counters are kept per process and exposed by /api/v1/ai/cache/stats/.
+"""
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict, Counter
+from dataclasses import asdict, is_dataclass
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from exe.redis_client import get_redis
+from .models import AICacheEntry
+
+
+REDIS_PREFIX = 'ai_cache:'
+
+# Candidate text whose case can change the verdict; only whitespace is collapsed
+CASE_SENSITIVE_FIELDS = ('answer_text', 'expected_answer')
+
+
+def cache_settings():
+    defaults = {
+        'ENABLED': True,
+        'TTL': 7 * 24 * 3600,
+        'LRU_SIZE': 1024,
+        'MAX_ENTRIES': 100000,
+        'PRUNE_EVERY': 200,
+    }
+    defaults.update(getattr(settings, 'AI_CACHE', {}))
+    return defaults
+
+
+def normalize(value, fold_case=True):
+    """
+    Canonical form of a provider input: dataclasses become dicts, strings are
+    whitespace-collapsed, and skill lists are order-insensitive. Questions and
+    other metadata are lower-cased; answers (CASE_SENSITIVE_FIELDS) keep
+    their case.
+    """
+    if is_dataclass(value):
+        value = asdict(value)
+    if isinstance(value, dict):
+        normalized = {
+            k: normalize(v, fold_case and k not in CASE_SENSITIVE_FIELDS) for k, v in value.items()
+        }
+        if isinstance(normalized.get('required_skills'), list):
+            normalized['required_skills'] = sorted(set(normalized['required_skills']))
+        return normalized
+    if isinstance(value, (list, tuple)):
+        return [normalize(v, fold_case) for v in value]
+    if isinstance(value, str):
+        value = ' '.join(value.split())
+        return value.lower() if fold_case else value
+    return value
+
+
+def cache_key(provider, method, payload):
+    material = json.dumps({
+        'provider': provider.name,
+        'model': provider.model,
+        'method': method,
+        'version': provider.prompt_version,
+        'input': normalize(payload),
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class LRUCache:
+    """Thread-safe LRU with per-entry expiry"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class DatabaseStore:
+    """L2 store in the AICacheEntry table"""
+
+    def __init__(self, max_entries, prune_every):
+        self.max_entries = max_entries
+        self.prune_every = prune_every
+        self.writes = 0
+
+    def get(self, key):
+        now = timezone.now()
+        entry = AICacheEntry.objects.filter(key=key, expires_at__gt=now).values_list('value', flat=True).first()
+        if entry is not None:
+            AICacheEntry.objects.filter(key=key).update(hits=F('hits') + 1, last_used_at=now)
+        return entry
+
+    def set(self, key, method, provider, value, ttl):
+        now = timezone.now()
+        AICacheEntry.objects.update_or_create(
+            key=key,
+            defaults={
+                'method': method,
+                'provider': f'{provider.name}:{provider.model}',
+                'value': value,
+                'expires_at': now + timedelta(seconds=ttl),
+                'last_used_at': now,
+            }
+        )
+        self.writes += 1
+        if self.writes % self.prune_every == 0:
+            self.prune()
+
+    def prune(self):
+        """Drop expired rows, then the least recently used rows beyond MAX_ENTRIES"""
+        AICacheEntry.objects.filter(expires_at__lte=timezone.now()).delete()
+        overflow = AICacheEntry.objects.count() - self.max_entries
+        if overflow > 0:
+            stale = AICacheEntry.objects.order_by('last_used_at').values_list('key', flat=True)[:overflow]
+            AICacheEntry.objects.filter(key__in=list(stale)).delete()
+
+    def size(self):
+        return AICacheEntry.objects.filter(expires_at__gt=timezone.now()).count()
+
+
+class RedisStore:
+    """L2 store in Redis; size is bounded by TTL and the server's maxmemory policy"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key):
+        raw = self.client.get(REDIS_PREFIX + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, method, provider, value, ttl):
+        self.client.setex(REDIS_PREFIX + key, ttl, json.dumps(value))
+
+    def prune(self):
+        pass
+
+    def size(self):
+        return sum(1 for _ in self.client.scan_iter(match=REDIS_PREFIX + '*', count=1000))
+
+
+class AICache:
+    def __init__(self):
+        config = cache_settings()
+        self.enabled = config['ENABLED']
+        self.ttl = config['TTL']
+        self.l1 = LRUCache(config['LRU_SIZE'])
+        client = get_redis()
+        self.l2 = RedisStore(client) if client is not None else DatabaseStore(config['MAX_ENTRIES'], config['PRUNE_EVERY'])
+        self.stats = Counter()
+        self.stats_lock = threading.Lock()
+
+    def _count(self, method, outcome):
+        with self.stats_lock:
+            self.stats[(method, outcome)] += 1
+
+    def get(self, key, method):
+        """Return the cached (encoded) value or None. Blocking; call off the event loop."""
+        value = self.l1.get(key)
+        if value is not None:
+            self._count(method, 'l1_hits')
+            # Callers may mutate what they get back (e.g. question dicts)
+            return copy.deepcopy(value)
+        value = self.l2.get(key)
+        if value is not None:
+            self.l1.set(key, copy.deepcopy(value), self.ttl)
+            self._count(method, 'l2_hits')
+            return value
+        self._count(method, 'misses')
+        return None
+
+    def set(self, key, method, provider, value):
+        self.l1.set(key, copy.deepcopy(value), self.ttl)
+        self.l2.set(key, method, provider, value, self.ttl)
+
+    def snapshot(self):
+        with self.stats_lock:
+            stats = dict(self.stats)
+        methods = sorted({method for method, _ in stats})
+        by_method = {}
+        for method in methods:
+            row = {outcome: stats.get((method, outcome), 0) for outcome in ('l1_hits', 'l2_hits', 'misses')}
+            lookups = sum(row.values())
+            row['hit_rate'] = round((row['l1_hits'] + row['l2_hits']) / lookups * 100, 2) if lookups else 0.0
+            by_method[method] = row
+        return {
+            'enabled': self.enabled,
+            'ttl_seconds': self.ttl,
+            'l1_entries': len(self.l1),
+            'l2_backend': type(self.l2).__name__,
+            'l2_entries': self.l2.size(),
+            'methods': by_method,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide AI cache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AICache()
+    return _cache
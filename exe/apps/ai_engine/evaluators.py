@@ -0,0 +1,68 @@
+"""
+Pluggable evaluator backends for interview responses.
+
+settings.AI_EVALUATOR_BACKEND names the class to use. A backend receives the
+question and response and returns an EvaluationResult; the pipeline takes
+care of persisting it, so backends never touch the database.
+"""
+from concurrent.futures import wait
+from django.conf import settings
+from django.utils.module_loading import import_string
+from .batching import get_evaluation_batcher
+from .providers import EvaluationItem, ProviderUnavailable, get_provider
+
+
+class BaseEvaluator:
+    """Interface every evaluator backend implements"""
+    name = 'base'
+    
+    def evaluate(self, question, response):
+        raise NotImplementedError
+    
+    def evaluate_many(self, pairs):
+        """Evaluate several (question, response) pairs; backends may batch them"""
+        return [self.evaluate(question, response) for question, response in pairs]
+
+
+def evaluation_item(question, response):
+    """Build the provider payload for one question/response pair"""
+    return EvaluationItem(
+        question_text=question.question_text,
+        question_type=question.question_type,
+        answer_text=response.text_response or response.code_response,
+        expected_answer=question.expected_answer,
+        evaluation_criteria=question.evaluation_criteria,
+        difficulty=question.difficulty,
+    )
+
+
+class ProviderEvaluator(BaseEvaluator):
+    """
+    Evaluates through the configured AI provider (settings.AI_PROVIDERS).
+    Requests go through the alias' micro-batcher, so concurrent evaluations
+    share provider calls. Waiting for results is bounded by
+    AI_EVALUATION_BATCH['RESULT_TIMEOUT'] seconds.
+    """
+    
+    def __init__(self, alias='default'):
+        self.provider = get_provider(alias)
+        self.batcher = get_evaluation_batcher(alias)
+        self.name = f'{self.provider.name}:{self.provider.model}'
+        self.timeout = getattr(settings, 'AI_EVALUATION_BATCH', {}).get('RESULT_TIMEOUT', 120)
+    
+    def evaluate(self, question, response):
+        return self.evaluate_many([(question, response)])[0]
+    
+    def evaluate_many(self, pairs):
+        futures = [self.batcher.submit(evaluation_item(question, response)) for question, response in pairs]
+        _, not_done = wait(futures, timeout=self.timeout)
+        if not_done:
+            for future in not_done:
+                future.cancel()
+            raise ProviderUnavailable(f'{len(not_done)} evaluations returned no result within {self.timeout}s')
+        return [future.result() for future in futures]
+
+
+def get_evaluator():
+    """Instantiate the configured evaluator backend"""
+    return import_string(settings.AI_EVALUATOR_BACKEND)()
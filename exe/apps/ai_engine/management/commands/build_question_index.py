@@ -0,0 +1,23 @@
+import time
+from django.core.management.base import BaseCommand
+from apps.ai_engine.vector_index import build_index, index_settings, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Embed existing interview and template questions into the local question index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', help='Index base path (defaults to AI_QUESTION_INDEX["PATH"])')
+        parser.add_argument('--if-changed', action='store_true',
+                            help='Skip the build when no question or template changed since the last one')
+
+    def handle(self, *args, **options):
+        path = options['path'] or index_settings()['PATH']
+        started = time.monotonic()
+        count = rebuild_index(path) if options['if_changed'] else build_index(path)
+        if count is None:
+            self.stdout.write(f'{path} is up to date')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {count} questions into {path}.f32 in {time.monotonic() - started:.1f}s'
+        ))
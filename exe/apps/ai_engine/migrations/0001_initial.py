@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('interview', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EvaluationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('backend', models.CharField(blank=True, max_length=100)),
+                ('task_id', models.CharField(blank=True, max_length=255)),
+                ('attempts', models.IntegerField(default=0)),
+                ('error_message', models.TextField(blank=True)),
+                ('queued_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('response', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='evaluation_job', to='interview.interviewresponse')),
+            ],
+            options={
+                'db_table': 'ai_evaluation_jobs',
+                'ordering': ['-queued_at'],
+                'indexes': [models.Index(fields=['status', 'queued_at'], name='ai_evaluati_status_9394f5_idx')],
+            },
+        ),
+    ]
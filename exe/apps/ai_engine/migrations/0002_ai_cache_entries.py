@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_engine', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AICacheEntry',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('method', models.CharField(max_length=50)),
+                ('provider', models.CharField(max_length=100)),
+                ('value', models.JSONField()),
+                ('hits', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField()),
+                ('expires_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'ai_cache_entries',
+                'indexes': [models.Index(fields=['expires_at'], name='ai_cache_en_expires_a96390_idx'), models.Index(fields=['last_used_at'], name='ai_cache_en_last_us_f1ca20_idx')],
+            },
+        ),
+    ]
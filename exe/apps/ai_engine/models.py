@@ -1,3 +1,62 @@
 from django.db import models
+from apps.interview.models import InterviewResponse
 
-# Create your models here.
+
+class EvaluationJob(models.Model):
+    """
+    Tracks the asynchronous AI evaluation of one interview response
+    """
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    )
+    
+    response = models.OneToOneField(InterviewResponse, on_delete=models.CASCADE, related_name='evaluation_job')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    backend = models.CharField(max_length=100, blank=True)
+    task_id = models.CharField(max_length=255, blank=True)
+    attempts = models.IntegerField(default=0)
+    error_message = models.TextField(blank=True)
+    
+    # Timing
+    queued_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'ai_evaluation_jobs'
+        ordering = ['-queued_at']
+        indexes = [
+            models.Index(fields=['status', 'queued_at']),
+        ]
+    
+    def __str__(self):
+        return f"Evaluation of response {self.response_id} ({self.status})"
+
+
+class AICacheEntry(models.Model):
+    """
+    Second-tier store of the content-addressed AI cache (used when Redis is not configured)
+    """
+    key = models.CharField(max_length=64, primary_key=True)
+    method = models.CharField(max_length=50)
+    provider = models.CharField(max_length=100)
+    value = models.JSONField()
+    hits = models.IntegerField(default=0)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField()
+    expires_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'ai_cache_entries'
+        indexes = [
+            models.Index(fields=['expires_at']),
+            models.Index(fields=['last_used_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.method} [{self.provider}] {self.key[:12]}"
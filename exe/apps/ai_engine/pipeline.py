@@ -0,0 +1,557 @@
+"""
+Asynchronous evaluation pipeline for interview responses.
+
+submit_response calls enqueue_evaluation(), which records an EvaluationJob
+and hands its id to a Celery task once the surrounding transaction commits.
+The task runs the configured evaluator, writes score/ai_feedback/
+evaluation_metrics back to the InterviewResponse (queueing an
+'interview_evaluated' notification in the same transaction) and pushes the
+result to the interview's channel group so connected clients do not need
+to poll.
+
+run_evaluations() evaluates several jobs at once; the evaluator batches them
+into as few provider calls as possible and the results are written back
+with one bulk_update.
+
+Completing an interview never waits for the evaluator: complete scores the
+answers evaluated so far, requeues failed jobs (pending_evaluations) and
+returns. Every batch of results then re-scores the completed interviews it
+touched (rescore_completed), and the last one to land generates the overall
+feedback.
+
+Jobs are claimed with SKIP LOCKED and a status re-check, so a task, its
+retries and completion-time batches never evaluate the same job twice. If
+the broker is down when a job is dispatched, the job stays queued and
+sweep_evaluation_jobs() (scheduled in CELERY_BEAT_SCHEDULE) dispatches it
+again, together with jobs whose worker died mid-evaluation.
+
+Answers that arrive as audio only (an ``audio_url`` or a media upload, no
+text) are marked transcription_status='pending' and go through
+transcribe_response(), which writes the transcript to text_response and
+only then queues the evaluation; completed media uploads are transcribed by
+process_media_upload(). An interview completed while some of its answers
+were still being transcribed is re-scored when their evaluation lands
+(rescore_completed). sweep_media_uploads() and sweep_transcriptions() run
+with the job sweep and redispatch work whose dispatch was lost or whose
+worker died.
+"""
+import logging
+import math
+from contextlib import contextmanager
+from datetime import timedelta
+from urllib.parse import urlsplit
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.db.models import F, Q
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+from apps.interview.media import absolute_path
+from apps.interview.models import Interview, InterviewResponse, InterviewTemplate, MediaUpload
+from apps.notifications.events import responses_evaluated
+from .evaluators import get_evaluator
+from .models import EvaluationJob
+from .providers import InterviewSummary, get_provider, run_sync
+from .transcription import fetch_recording, transcribe_file, transcription_settings
+
+logger = logging.getLogger(__name__)
+
+# Jobs a worker may claim; 'failed' ones can be requeued by hand
+CLAIMABLE_STATUSES = ('queued', 'failed')
+
+
+def interview_group(interview_id):
+    """Channel group that receives live updates for one interview"""
+    return f'interview_{interview_id}'
+
+
+def enqueue_evaluation(response):
+    """
+    (Re)queue evaluation of ``response``. The task is dispatched on commit so
+    the worker never sees a response row that is not yet visible.
+    """
+    job, _ = EvaluationJob.objects.update_or_create(
+        response=response,
+        defaults={
+            'status': 'queued',
+            'attempts': 0,
+            'error_message': '',
+            'started_at': None,
+            'completed_at': None,
+        }
+    )
+    transaction.on_commit(lambda: dispatch_evaluation(job.id))
+    return job
+
+
+def dispatch_evaluation(job_id):
+    """Send ``job_id`` to a worker; a broker error leaves the job for the sweep"""
+    from .tasks import evaluate_response_task
+    
+    try:
+        evaluate_response_task.delay(job_id)
+    except Exception as exc:
+        logger.warning('Could not dispatch evaluation job %s, leaving it for the sweep: %s', job_id, exc)
+
+
+def dispatch_media_upload(upload_id):
+    """Send ``upload_id`` to a worker; a broker error leaves the upload for the sweep"""
+    from .tasks import process_media_upload_task
+    
+    try:
+        process_media_upload_task.delay(str(upload_id))
+    except Exception as exc:
+        logger.warning('Could not dispatch media upload %s, leaving it for the sweep: %s', upload_id, exc)
+
+
+def enqueue_transcription(response):
+    """
+    Queue speech-to-text for an audio answer that has no text yet; its
+    evaluation is queued once the transcript is written. Returns False
+    (and does nothing) for answers that need no transcription.
+    """
+    if not response.audio_url or response.text_response or not transcription_settings()['ENABLED']:
+        return False
+    response.transcription_status = 'pending'
+    InterviewResponse.objects.filter(pk=response.pk).update(transcription_status='pending', updated_at=timezone.now())
+    transaction.on_commit(lambda: dispatch_transcription(response.id))
+    return True
+
+
+def dispatch_transcription(response_id):
+    """Send ``response_id`` to a worker; a broker error leaves it for the sweep"""
+    from .tasks import transcribe_response_task
+    
+    try:
+        transcribe_response_task.delay(response_id)
+    except Exception as exc:
+        logger.warning('Could not dispatch transcription of response %s, leaving it for the sweep: %s', response_id, exc)
+
+
+RESULT_FIELDS = [
+    'score', 'ai_feedback', 'evaluation_metrics',
+    'needs_review', 'is_evaluated', 'updated_at'
+]
+
+
+def numeric_metrics(metrics):
+    """
+    ``metrics`` with every value as a float. Values that are not finite
+    numbers are dropped: response_stats() casts them to float in SQL.
+    """
+    cleaned = {}
+    for name, value in (metrics.items() if isinstance(metrics, dict) else ()):
+        if isinstance(value, bool):
+            continue
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            continue
+        if math.isfinite(number):
+            cleaned[str(name)] = number
+    return cleaned
+
+
+def assign_result(response, result):
+    """Copy an EvaluationResult onto its InterviewResponse without saving"""
+    response.score = result.score
+    response.ai_feedback = result.feedback
+    response.evaluation_metrics = numeric_metrics(result.metrics)
+    response.needs_review = result.needs_review
+    response.is_evaluated = True
+    response.updated_at = timezone.now()
+
+
+def claim_jobs(job_ids, backend):
+    """
+    Mark the claimable jobs among ``job_ids`` as running and return their ids.
+    Rows locked by another claim are skipped, and the UPDATE re-checks the
+    status, so each job is claimed by one caller only.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            EvaluationJob.objects.select_for_update(skip_locked=True)
+            .filter(id__in=job_ids, status__in=CLAIMABLE_STATUSES)
+            .values_list('id', flat=True)
+        )
+        if ids:
+            EvaluationJob.objects.filter(id__in=ids, status__in=CLAIMABLE_STATUSES).update(
+                status='running',
+                backend=backend,
+                attempts=F('attempts') + 1,
+                started_at=now,
+                updated_at=now,
+            )
+    return ids
+
+
+def lock_interviews(interview_ids):
+    """
+    Order a write of results against complete(), which scores under the
+    interview's row lock: the results land either before its score is taken
+    or after the interview is completed, where rescore_completed() sees them
+    """
+    list(
+        Interview.objects.select_for_update(no_key=True)
+        .filter(id__in=interview_ids).order_by('id').values_list('id', flat=True)
+    )
+
+
+def run_evaluations(job_ids):
+    """
+    Evaluate the responses behind ``job_ids`` together. Jobs that are
+    completed or claimed by another worker are skipped. Raises on evaluator
+    errors after putting the jobs back in the queue for their Celery tasks
+    to retry.
+    """
+    evaluator = get_evaluator()
+    ids = claim_jobs(job_ids, evaluator.name)
+    if not ids:
+        return []
+    jobs = list(
+        EvaluationJob.objects.select_related('response__question', 'response__interview')
+        .filter(id__in=ids)
+    )
+    
+    try:
+        results = evaluator.evaluate_many([(job.response.question, job.response) for job in jobs])
+    except Exception as exc:
+        EvaluationJob.objects.filter(id__in=ids, status='running').update(
+            status='queued',
+            error_message=str(exc),
+            updated_at=timezone.now(),
+        )
+        raise
+    
+    completed_at = timezone.now()
+    with transaction.atomic():
+        lock_interviews({job.response.interview_id for job in jobs})
+        for job, result in zip(jobs, results):
+            assign_result(job.response, result)
+        InterviewResponse.objects.bulk_update([job.response for job in jobs], RESULT_FIELDS)
+        EvaluationJob.objects.filter(id__in=ids).update(
+            status='completed',
+            completed_at=completed_at,
+            updated_at=completed_at,
+        )
+        responses_evaluated([job.response for job in jobs])
+    rescore_completed({job.response.interview_id for job in jobs})
+    
+    for job in jobs:
+        job.status = 'completed'
+        job.completed_at = completed_at
+        push_result(job)
+    return jobs
+
+
+def run_evaluation(job_id):
+    """Evaluate the response behind ``job_id``. Raises on evaluator errors."""
+    jobs = run_evaluations([job_id])
+    return jobs[0] if jobs else EvaluationJob.objects.get(id=job_id)
+
+
+def pending_evaluations(interview, requeue=True):
+    """
+    Number of answers of ``interview`` whose evaluation has not landed yet.
+    With ``requeue`` failed jobs are queued again (dispatched on commit) and
+    counted; without it they are given up on and not counted. Answers still
+    being transcribed are counted by pending_transcriptions() instead.
+    """
+    pending = EvaluationJob.objects.filter(
+        response__interview=interview,
+        response__is_evaluated=False,
+    ).exclude(status='completed').exclude(response__transcription_status='pending')
+    if not requeue:
+        return pending.exclude(status='failed').count()
+    failed = list(pending.filter(status='failed').values_list('id', flat=True))
+    if failed:
+        EvaluationJob.objects.filter(id__in=failed, status='failed').update(
+            status='queued',
+            attempts=0,
+            error_message='',
+            updated_at=timezone.now(),
+        )
+        for job_id in failed:
+            transaction.on_commit(lambda job_id=job_id: dispatch_evaluation(job_id))
+    return pending.count()
+
+
+def pending_transcriptions(interview):
+    return interview.responses.filter(transcription_status='pending').count()
+
+
+def generate_overall_feedback(interview, stats):
+    """Fill the interview's overall feedback from its response_stats() (calls the provider)"""
+    feedback = run_sync(get_provider().summarize, InterviewSummary(
+        job_role=interview.job_role,
+        interview_type=interview.interview_type,
+        response_count=stats['evaluated_count'],
+        average_score=stats['average_score'] or 0,
+        metric_averages=stats['metric_averages'],
+    ))
+    
+    interview.overall_feedback = feedback['overall_feedback']
+    interview.strengths = feedback['strengths']
+    interview.weaknesses = feedback['weaknesses']
+    interview.recommendations = feedback['recommendations']
+    interview.save(update_fields=['overall_feedback', 'strengths', 'weaknesses', 'recommendations', 'updated_at'])
+
+
+def rescore_completed(interview_ids):
+    """
+    Recompute the score of the completed interviews among ``interview_ids``,
+    whose answers were evaluated after completion; once none is outstanding
+    the overall feedback is generated from the final stats
+    """
+    for interview_id in Interview.objects.filter(id__in=interview_ids, status='completed').values_list('id', flat=True):
+        with transaction.atomic():
+            interview = Interview.objects.select_for_update().get(pk=interview_id)
+            previous = interview.percentage
+            stats = interview.calculate_score(save=False)
+            interview.save(update_fields=['total_score', 'percentage', 'updated_at'])
+            if interview.template_id and interview.percentage != previous:
+                InterviewTemplate.record_rescore(interview.template_id, previous, interview.percentage)
+            finished = not (pending_evaluations(interview, requeue=False) or pending_transcriptions(interview))
+        
+        if interview.use_ai and finished:
+            try:
+                generate_overall_feedback(interview, stats)
+            except Exception as exc:
+                logger.warning('Could not generate overall feedback for interview %s: %s', interview_id, exc)
+
+
+def record_streamed_result(response, result, backend, started_at):
+    """
+    Persist an evaluation that was streamed to the client over the interview
+    socket and mark its job completed, so any queued task for the same
+    response becomes a no-op.
+    """
+    with transaction.atomic():
+        lock_interviews({response.interview_id})
+        assign_result(response, result)
+        response.save(update_fields=RESULT_FIELDS)
+        job, _ = EvaluationJob.objects.update_or_create(
+            response=response,
+            defaults={
+                'status': 'completed',
+                'backend': backend,
+                'error_message': '',
+                'started_at': started_at,
+                'completed_at': timezone.now(),
+            }
+        )
+        responses_evaluated([response])
+    rescore_completed({response.interview_id})
+    push_result(job)
+    return job
+
+
+def upload_for_url(url, user_id):
+    """The finished upload of ``user_id`` that an /api/v1/uploads/{id}/content/ URL points at, if any"""
+    try:
+        match = resolve(urlsplit(url).path)
+    except Resolver404:
+        return None
+    if match.url_name != 'media-upload-content':
+        return None
+    return MediaUpload.objects.filter(
+        id=match.kwargs['pk'],
+        user_id=user_id,
+        status__in=('complete', 'processing', 'processed'),
+    ).first()
+
+
+@contextmanager
+def open_recording(response):
+    """
+    Path of the recording behind ``response``: a finished media upload is
+    read from disk, any other ``audio_url`` is downloaded for the duration
+    of the block
+    """
+    upload = (
+        response.media_uploads.filter(status__in=('complete', 'processing', 'processed'))
+        .order_by('kind', '-completed_at').first()
+        or upload_for_url(response.audio_url, response.interview.user_id)
+    )
+    if upload is not None:
+        yield absolute_path(upload)
+        return
+    with fetch_recording(response.audio_url) as path:
+        yield path
+
+
+def transcribe_response(response_id):
+    """
+    Write the transcript of a response waiting for speech-to-text into its
+    text_response and queue its evaluation. Responses that are no longer
+    pending are skipped, so task retries, the sweep and the media upload
+    task never transcribe twice into the same answer. Raises on download
+    and backend errors.
+    """
+    response = (
+        InterviewResponse.objects.select_related('interview')
+        .filter(id=response_id, transcription_status='pending').first()
+    )
+    if response is None:
+        return None
+    with open_recording(response) as path:
+        text = transcribe_file(path)
+    
+    with transaction.atomic():
+        response = (
+            InterviewResponse.objects.select_for_update(of=('self',)).select_related('interview')
+            .filter(id=response_id, transcription_status='pending').first()
+        )
+        if response is None:
+            return None
+        if not response.text_response:
+            response.text_response = text
+        response.transcription_status = 'completed'
+        response.save(update_fields=['text_response', 'transcription_status', 'updated_at'])
+        if response.interview.use_ai and (response.text_response or response.code_response):
+            enqueue_evaluation(response)
+    return response
+
+
+def mark_transcription_failed(response_id, error):
+    logger.warning('Could not transcribe response %s: %s', response_id, error)
+    InterviewResponse.objects.filter(id=response_id, transcription_status='pending').update(
+        transcription_status='failed',
+        updated_at=timezone.now(),
+    )
+
+
+def process_media_upload(upload_id):
+    """
+    Post-process a completed upload: claim it, transcribe the recording into
+    the response's text_response when the answer has no text yet, then queue
+    evaluation when the interview uses AI and there is an answer to evaluate.
+    Uploads that are not in the 'complete' state are left alone, so
+    duplicate task deliveries are no-ops.
+    """
+    claimed = MediaUpload.objects.filter(id=upload_id, status='complete').update(
+        status='processing',
+        updated_at=timezone.now(),
+    )
+    if not claimed:
+        return None
+    
+    upload = MediaUpload.objects.select_related('response__interview').get(id=upload_id)
+    try:
+        response = upload.response
+        if response.transcription_status == 'pending':
+            transcribe_response(response.id)
+        elif response.interview.use_ai and (response.text_response or response.code_response):
+            enqueue_evaluation(response)
+    except Exception as exc:
+        logger.warning('Could not process media upload %s: %s', upload_id, exc)
+        MediaUpload.objects.filter(id=upload_id).update(
+            status='failed',
+            error_message=str(exc),
+            updated_at=timezone.now(),
+        )
+        return upload
+    
+    MediaUpload.objects.filter(id=upload_id).update(status='processed', updated_at=timezone.now())
+    return upload
+
+
+def sweep_evaluation_jobs(stale_after=timedelta(minutes=5), running_timeout=timedelta(minutes=15)):
+    """
+    Dispatch jobs that have been queued for longer than ``stale_after`` (their
+    dispatch was lost) and requeue jobs running for longer than
+    ``running_timeout`` (their worker died). Returns the ids dispatched.
+    """
+    now = timezone.now()
+    stuck = Q(status='running', started_at__lt=now - running_timeout)
+    stale = Q(status='queued', updated_at__lt=now - stale_after)
+    with transaction.atomic():
+        job_ids = list(
+            EvaluationJob.objects.select_for_update(skip_locked=True)
+            .filter(stuck | stale).order_by('queued_at').values_list('id', flat=True)
+        )
+        EvaluationJob.objects.filter(stuck, id__in=job_ids).update(error_message='Worker timed out')
+        # Also restarts the clock, so a slow broker does not get the same jobs every sweep
+        EvaluationJob.objects.filter(id__in=job_ids).update(status='queued', updated_at=now)
+    for job_id in job_ids:
+        dispatch_evaluation(job_id)
+    return job_ids
+
+
+def sweep_media_uploads(stale_after=timedelta(minutes=5), processing_timeout=timedelta(minutes=30)):
+    """
+    Dispatch uploads left 'complete' for longer than ``stale_after`` and
+    return uploads 'processing' for longer than ``processing_timeout`` (their
+    worker died) to 'complete' so they are processed again. Returns the ids
+    dispatched.
+    """
+    now = timezone.now()
+    stuck = Q(status='processing', updated_at__lt=now - processing_timeout)
+    stale = Q(status='complete', updated_at__lt=now - stale_after)
+    with transaction.atomic():
+        upload_ids = list(
+            MediaUpload.objects.select_for_update(skip_locked=True)
+            .filter(stuck | stale).order_by('updated_at').values_list('id', flat=True)
+        )
+        # Also restarts the clock, so a slow broker does not get the same uploads every sweep
+        MediaUpload.objects.filter(id__in=upload_ids).update(status='complete', updated_at=now)
+    for upload_id in upload_ids:
+        dispatch_media_upload(upload_id)
+    return upload_ids
+
+
+def sweep_transcriptions(stale_after=timedelta(minutes=30)):
+    """
+    Dispatch responses waiting for speech-to-text for longer than
+    ``stale_after`` (their dispatch was lost or their worker died). Returns
+    the ids dispatched.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        response_ids = list(
+            InterviewResponse.objects.select_for_update(skip_locked=True)
+            .filter(transcription_status='pending', updated_at__lt=now - stale_after)
+            .order_by('updated_at').values_list('id', flat=True)
+        )
+        InterviewResponse.objects.filter(id__in=response_ids).update(updated_at=now)
+    for response_id in response_ids:
+        dispatch_transcription(response_id)
+    return response_ids
+
+
+def mark_failed(job_id, error):
+    EvaluationJob.objects.filter(id=job_id).update(
+        status='failed',
+        error_message=str(error),
+        completed_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+
+
+def serialize_job(job):
+    response = job.response
+    return {
+        'job_id': job.id,
+        'status': job.status,
+        'response_id': response.id,
+        'question_id': response.question_id,
+        'score': response.score,
+        'ai_feedback': response.ai_feedback,
+        'evaluation_metrics': response.evaluation_metrics,
+        'is_evaluated': response.is_evaluated,
+    }
+
+
+def push_result(job):
+    """Best-effort push of a finished evaluation to the interview's group"""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(
+            interview_group(job.response.interview_id),
+            {'type': 'evaluation.completed', 'evaluation': serialize_job(job)}
+        )
+    except Exception as exc:
+        logger.warning('Could not push evaluation %s: %s', job.id, exc)
@@ -0,0 +1,73 @@
+"""
+AI provider registry.
+
+settings.AI_PROVIDERS maps an alias to a provider configuration:
+
+    'default': {
+        'BACKEND': 'apps.ai_engine.providers.offline.OfflineProvider',
+        'MODEL': 'offline-v1',
+        'TIMEOUT': 30,            # seconds per call
+        'MAX_RETRIES': 2,
+        'MAX_CONCURRENCY': 8,     # in-flight calls per process
+        'FALLBACK': 'offline',    # alias used once retries are exhausted
+        'CACHE': True,            # serve repeat requests from apps.ai_engine.cache
+                                  # (defaults to the backend's ``cacheable``)
+        'OPTIONS': {...},         # extra kwargs for the backend
+    }
+
+Sync code (views, Celery tasks) calls providers through run_sync().
+"""
+import threading
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.utils.module_loading import import_string
+from .base import (
+    BaseProvider, ProviderError, ProviderUnavailable,
+    QuestionSpec, EvaluationItem, EvaluationResult, InterviewSummary,
+)
+
+__all__ = [
+    'BaseProvider', 'ProviderError', 'ProviderUnavailable',
+    'QuestionSpec', 'EvaluationItem', 'EvaluationResult', 'InterviewSummary',
+    'get_provider', 'run_sync',
+]
+
+_providers = {}
+_lock = threading.RLock()
+
+
+def _build(alias, seen=()):
+    config = settings.AI_PROVIDERS[alias]
+    fallback_alias = config.get('FALLBACK')
+    fallback = None
+    if fallback_alias and fallback_alias != alias and fallback_alias not in seen:
+        fallback = get_provider(fallback_alias, seen=seen + (alias,))
+    
+    backend = import_string(config['BACKEND'])
+    return backend(
+        alias=alias,
+        model=config.get('MODEL', ''),
+        timeout=config.get('TIMEOUT', 30),
+        max_retries=config.get('MAX_RETRIES', 2),
+        retry_backoff=config.get('RETRY_BACKOFF', 0.5),
+        max_concurrency=config.get('MAX_CONCURRENCY', 8),
+        fallback=fallback,
+        cache=config.get('CACHE', backend.cacheable),
+        **config.get('OPTIONS', {})
+    )
+
+
+def get_provider(alias='default', seen=()):
+    """Return the process-wide provider instance for ``alias``"""
+    provider = _providers.get(alias)
+    if provider is None:
+        with _lock:
+            provider = _providers.get(alias)
+            if provider is None:
+                provider = _providers[alias] = _build(alias, seen)
+    return provider
+
+
+def run_sync(coroutine_function, *args):
+    """Call an async provider method from synchronous code"""
+    return async_to_sync(coroutine_function)(*args)
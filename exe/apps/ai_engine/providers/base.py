@@ -0,0 +1,347 @@
+"""
+Base class for AI providers.
+
+Every provider exposes the same async interface:
+
+    await provider.generate_questions(spec)   -> [question dict, ...]
+    await provider.evaluate(item)              -> EvaluationResult
+    await provider.evaluate_batch(items)       -> [EvaluationResult, ...]
+    async for kind, value in provider.stream_questions(spec)    # token/question
+    async for kind, value in provider.stream_evaluation(item)   # token/result
+    await provider.summarize(summary)          -> feedback dict
+
+Subclasses implement the underscored ``_generate_questions``/``_evaluate``/
+``_summarize`` coroutines (and may override ``_evaluate_batch`` to score
+several answers in one request); the public wrappers add the per-call timeout,
+retries with exponential backoff, a per-provider concurrency limit and the
+configured fallback provider. generate_questions and evaluate are also
+served from the content-addressed cache (apps.ai_engine.cache) when the
+provider has caching enabled; fallback results are never cached under the
+primary provider's key.
+"""
+import asyncio
+import re
+import threading
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from asgiref.sync import sync_to_async
+
+
+class ProviderError(Exception):
+    """A transient provider failure that is worth retrying"""
+
+
+class ProviderUnavailable(Exception):
+    """Raised when a provider (and its fallback) exhausted all retries"""
+
+
+@dataclass
+class QuestionSpec:
+    """What to generate questions for"""
+    job_role: str
+    interview_type: str
+    difficulty: str
+    required_skills: list = field(default_factory=list)
+    count: int = 5
+    job_description: str = ''
+
+
+@dataclass
+class EvaluationItem:
+    """One question/answer pair to evaluate"""
+    question_text: str
+    question_type: str
+    answer_text: str
+    expected_answer: str = ''
+    evaluation_criteria: list = field(default_factory=list)
+    difficulty: str = 'medium'
+
+
+@dataclass
+class EvaluationResult:
+    score: float
+    feedback: str
+    metrics: dict = field(default_factory=dict)
+    needs_review: bool = False
+
+
+@dataclass
+class InterviewSummary:
+    """Aggregates an interview's evaluated responses for overall feedback"""
+    job_role: str
+    interview_type: str
+    response_count: int
+    average_score: float
+    metric_averages: dict = field(default_factory=dict)
+
+
+class ConcurrencyLimit:
+    """
+    An asyncio semaphore shared by every event loop of the process.
+
+    async_to_sync runs each sync caller on an event loop of its own, and an
+    asyncio.Semaphore only works within a single loop. Waiters therefore park
+    on a future of their own loop, and release() wakes the next waiter with
+    call_soon_threadsafe. Waiters are served first in, first out.
+    """
+    
+    def __init__(self, value):
+        self._value = value
+        self._lock = threading.Lock()
+        self._waiters = deque()
+    
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._value > 0 and not self._waiters:
+                self._value -= 1
+                return
+            waiter = loop.create_future()
+            self._waiters.append((loop, waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove((loop, waiter))
+                    granted = False
+                except ValueError:
+                    granted = True  # release() already handed this waiter the slot
+            if granted:
+                self.release()
+            raise
+    
+    def release(self):
+        while True:
+            with self._lock:
+                if not self._waiters:
+                    self._value += 1
+                    return
+                loop, waiter = self._waiters.popleft()
+            try:
+                loop.call_soon_threadsafe(_grant, waiter)
+                return
+            except RuntimeError:
+                continue  # The waiter's loop is closed; hand the slot on
+
+
+def _grant(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+def tokenize(text):
+    """Split text into word tokens that keep their trailing whitespace"""
+    return re.findall(r'\S+\s*', text or '')
+
+
+class BaseProvider:
+    name = 'base'
+    # True when the provider implements _stream_questions/_stream_evaluation
+    streaming = False
+    # Bump when prompts or heuristics change so cached results are not reused
+    prompt_version = '1'
+    # Default of the alias's CACHE setting; off for providers cheaper than a lookup
+    cacheable = True
+    
+    def __init__(self, alias='default', model='', timeout=30.0, max_retries=2,
+                 retry_backoff=0.5, max_concurrency=8, fallback=None, cache=True, **options):
+        self.alias = alias
+        self.model = model
+        self.cache = cache
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.fallback = fallback
+        self.options = options
+        # Shared by the event loops that async_to_sync creates for each sync caller
+        self._slots = ConcurrencyLimit(max_concurrency)
+    
+    async def _acquire(self):
+        await self._slots.acquire()
+    
+    async def _attempt(self, method, *args):
+        """Call this provider with timeout and retries; no fallback"""
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            await self._acquire()
+            try:
+                return await asyncio.wait_for(getattr(self, f'_{method}')(*args), self.timeout)
+            except (asyncio.TimeoutError, ProviderError) as exc:
+                last_error = exc
+            finally:
+                self._slots.release()
+            if attempt < self.max_retries:
+                await asyncio.sleep(self.retry_backoff * (2 ** attempt))
+        raise ProviderUnavailable(f'{self.alias} failed after {self.max_retries + 1} attempts: {last_error}')
+    
+    async def _call(self, method, *args):
+        try:
+            return await self._attempt(method, *args)
+        except ProviderUnavailable:
+            if self.fallback is None:
+                raise
+        return await getattr(self.fallback, method)(*args)
+    
+    async def _cache_lookup(self, method, arg):
+        """Return (key, cached value or None); key is None when caching is off"""
+        from apps.ai_engine.cache import cache_key, get_cache
+        
+        cache = get_cache()
+        if not (self.cache and cache.enabled):
+            return None, None
+        key = cache_key(self, method, arg)
+        return key, await sync_to_async(cache.get)(key, method)
+    
+    async def _cache_store(self, key, method, value):
+        from apps.ai_engine.cache import get_cache
+        
+        if key is not None:
+            await sync_to_async(get_cache().set)(key, method, self, value)
+    
+    async def _fresh_call(self, key, method, arg, encode=lambda value: value):
+        """Call the provider for a cache miss; only this provider's own results are stored"""
+        try:
+            result = await self._attempt(method, arg)
+        except ProviderUnavailable:
+            if self.fallback is None:
+                raise
+            return await getattr(self.fallback, method)(arg)
+        await self._cache_store(key, method, encode(result))
+        return result
+    
+    async def _cached_call(self, method, arg, encode=lambda value: value, decode=lambda value: value):
+        key, cached = await self._cache_lookup(method, arg)
+        if cached is not None:
+            return decode(cached)
+        return await self._fresh_call(key, method, arg, encode)
+    
+    async def generate_questions(self, spec):
+        return await self._cached_call('generate_questions', spec)
+    
+    async def evaluate(self, item):
+        return await self._cached_call(
+            'evaluate', item,
+            encode=asdict,
+            decode=lambda value: EvaluationResult(**value),
+        )
+    
+    async def evaluate_batch(self, items):
+        """
+        Evaluate several items with one provider call (one concurrency slot,
+        one retry budget). Items already in the cache are not sent.
+        """
+        keys = [None] * len(items)
+        results = [None] * len(items)
+        for index, item in enumerate(items):
+            keys[index], cached = await self._cache_lookup('evaluate', item)
+            if cached is not None:
+                results[index] = EvaluationResult(**cached)
+        
+        pending = [index for index, result in enumerate(results) if result is None]
+        if not pending:
+            return results
+        
+        batch = [items[index] for index in pending]
+        try:
+            evaluated = await self._attempt('evaluate_batch', batch)
+        except ProviderUnavailable:
+            if self.fallback is None:
+                raise
+            evaluated = await self.fallback.evaluate_batch(batch)
+            keys = [None] * len(items)
+        
+        for index, result in zip(pending, evaluated):
+            results[index] = result
+            await self._cache_store(keys[index], 'evaluate', asdict(result))
+        return results
+    
+    async def stream_questions(self, spec):
+        """
+        Yield ('token', text) while a question is being written and
+        ('question', dict) once it is complete. Providers with native
+        streaming deliver tokens as they are generated; otherwise (and on
+        cache hits) the finished questions are replayed word by word.
+        """
+        key, questions = await self._cache_lookup('generate_questions', spec)
+        if questions is None and self.streaming:
+            streamed, started = [], False
+            try:
+                async for kind, value in self._stream('stream_questions', spec):
+                    started = True
+                    if kind == 'question':
+                        streamed.append(value)
+                    yield kind, value
+            except ProviderUnavailable:
+                if started:
+                    raise
+            else:
+                await self._cache_store(key, 'generate_questions', streamed)
+                return
+        
+        if questions is None:
+            questions = await self._fresh_call(key, 'generate_questions', spec)
+        for question in questions:
+            for token in tokenize(question['text']):
+                yield 'token', token
+            yield 'question', question
+    
+    async def stream_evaluation(self, item):
+        """Yield ('token', text) pieces of the feedback, then ('result', EvaluationResult)"""
+        key, cached = await self._cache_lookup('evaluate', item)
+        if cached is None and self.streaming:
+            started = False
+            try:
+                async for kind, value in self._stream('stream_evaluation', item):
+                    started = True
+                    if kind == 'result':
+                        await self._cache_store(key, 'evaluate', asdict(value))
+                    yield kind, value
+            except ProviderUnavailable:
+                if started:
+                    raise
+            else:
+                return
+        
+        if cached is not None:
+            result = EvaluationResult(**cached)
+        else:
+            result = await self._fresh_call(key, 'evaluate', item, encode=asdict)
+        for token in tokenize(result.feedback):
+            yield 'token', token
+        yield 'result', result
+    
+    async def _stream(self, method, arg):
+        """
+        Run a native streaming method holding one concurrency slot, with
+        the provider timeout applied to each chunk. Failures surface as
+        ProviderUnavailable; streams are not retried once started.
+        """
+        await self._acquire()
+        try:
+            stream = getattr(self, f'_{method}')(arg).__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), self.timeout)
+                except StopAsyncIteration:
+                    break
+                except (asyncio.TimeoutError, ProviderError) as exc:
+                    raise ProviderUnavailable(f'{self.alias} stream failed: {exc}') from exc
+                yield chunk
+        finally:
+            self._slots.release()
+    
+    async def summarize(self, summary):
+        return await self._call('summarize', summary)
+    
+    async def _generate_questions(self, spec):
+        raise NotImplementedError
+    
+    async def _evaluate(self, item):
+        raise NotImplementedError
+    
+    async def _evaluate_batch(self, items):
+        return list(await asyncio.gather(*(self._evaluate(item) for item in items)))
+    
+    async def _summarize(self, summary):
+        raise NotImplementedError
@@ -0,0 +1,203 @@
+"""
+Deterministic offline provider.
+
+Generates questions from templates and scores answers with transparent
+heuristics (coverage of the question's key terms, length, structure and use
+of examples). The same input always produces the same output and nothing
+touches the network, so the full interview flow can be load-tested locally.
+"""
+import hashlib
+import re
+from .base import BaseProvider, EvaluationResult
+
+
+SKILL_TEMPLATES = [
+    "Tell me about your experience with {skill}. What did you build with it?",
+    "What are common pitfalls when working with {skill}, and how do you avoid them?",
+    "How would you explain the core concepts of {skill} to a junior {role}?",
+    "Describe how you would debug a production issue involving {skill}.",
+    "How do you test and maintain code that relies heavily on {skill}?",
+]
+
+TYPE_TEMPLATES = {
+    'technical': [
+        "Walk me through the architecture of a recent project you worked on as a {role}.",
+        "How do you decide between competing technical approaches as a {role}?",
+    ],
+    'behavioral': [
+        "Describe a challenging situation you faced as a {role}",
+        "Tell me about a time you disagreed with a teammate. How did you resolve it?",
+        "Describe a project that failed. What did you learn from it?",
+        "Tell me about a time you had to deliver under a tight deadline.",
+    ],
+    'system_design': [
+        "Design a system a {role} would own that serves millions of requests per day. Where are the bottlenecks?",
+        "How would you make a service you built as a {role} highly available?",
+        "Design a caching strategy for a read-heavy API. What are the consistency trade-offs?",
+    ],
+    'coding': [
+        "Write a function that returns the k most frequent elements of a list. What is its complexity?",
+        "Implement an LRU cache. Which data structures do you use and why?",
+        "Given a string, find the length of the longest substring without repeating characters.",
+    ],
+    'hr': [
+        "Why are you interested in this {role} position?",
+        "Where do you see yourself in three years?",
+        "What kind of team environment helps you do your best work?",
+    ],
+}
+
+# Interview types that are also valid InterviewQuestion types; others map to 'general'
+QUESTION_TYPES = ('technical', 'behavioral', 'coding', 'system_design')
+
+DIFFICULTY_DURATION = {'easy': 3, 'medium': 5, 'hard': 8}
+
+STOPWORDS = set("""
+a an and are as at be but by can do does for from how i in is it me of on or so
+that the their then there these this to was what when where which who why will with
+you your about describe tell time would did have has had
+""".split())
+
+EXAMPLE_MARKERS = ('for example', 'for instance', 'such as', 'e.g.', 'in my last', 'at my previous', 'we built', 'i built')
+STRUCTURE_MARKERS = ('first', 'second', 'then', 'finally', 'because', 'therefore', 'result', 'situation', 'task', 'action')
+
+METRIC_PHRASES = {
+    'clarity': ('Clear communication', 'Structure answers more clearly (e.g. situation, action, result)'),
+    'relevance': ('Answers stay on topic', 'Address the question more directly'),
+    'depth': ('Detailed, example-driven answers', 'Provide more specific examples'),
+    'technical_accuracy': ('Technical knowledge', 'Strengthen technical fundamentals'),
+}
+
+RECOMMENDATIONS = {
+    'clarity': 'Practice answering with the STAR method',
+    'relevance': 'Re-read each question and answer the core ask first',
+    'depth': 'Prepare two or three concrete project stories in advance',
+    'technical_accuracy': 'Review core concepts for the required skills',
+}
+
+
+def stable_index(*parts, modulo):
+    digest = hashlib.sha256('|'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+    return int(digest[:8], 16) % modulo
+
+
+def terms(text):
+    return {w for w in re.findall(r"[a-z][a-z0-9+#.]*", (text or '').lower()) if w not in STOPWORDS and len(w) > 2}
+
+
+def clamp(value, low=0.0, high=10.0):
+    return max(low, min(high, value))
+
+
+class OfflineProvider(BaseProvider):
+    name = 'offline'
+    prompt_version = 'offline-1'
+    # Deterministic and cheap; caching would only add round trips
+    cacheable = False
+
+    async def _generate_questions(self, spec):
+        role = spec.job_role or 'software engineer'
+        duration = DIFFICULTY_DURATION.get(spec.difficulty, 5)
+        questions = []
+
+        skills = list(spec.required_skills or [])
+        skill_slots = 0 if spec.interview_type in ('behavioral', 'hr') else min(len(skills), max(spec.count - 1, 0))
+        for i, skill in enumerate(skills[:skill_slots]):
+            template = SKILL_TEMPLATES[stable_index(role, skill, i, modulo=len(SKILL_TEMPLATES))]
+            questions.append({
+                'text': template.format(skill=skill, role=role),
+                'type': 'technical',
+                'difficulty': spec.difficulty,
+                'expected_duration_minutes': duration,
+                'expected_answer': f"Concrete experience with {skill}, trade-offs considered and measurable outcomes.",
+                'evaluation_criteria': ['relevance', 'depth', 'technical_accuracy'],
+            })
+
+        templates = TYPE_TEMPLATES.get(spec.interview_type, TYPE_TEMPLATES['technical'])
+        behavioral = TYPE_TEMPLATES['behavioral']
+        offset = stable_index(role, spec.interview_type, modulo=len(templates))
+        i = 0
+        while len(questions) < spec.count:
+            # Always close with a behavioral question, as the original flow did
+            if len(questions) == spec.count - 1 and spec.interview_type != 'behavioral':
+                template, q_type = behavioral[0], 'behavioral'
+            else:
+                template = templates[(offset + i) % len(templates)]
+                q_type = spec.interview_type if spec.interview_type in QUESTION_TYPES else 'general'
+            questions.append({
+                'text': template.format(role=role),
+                'type': q_type,
+                'difficulty': spec.difficulty,
+                'expected_duration_minutes': duration,
+                'expected_answer': '',
+                'evaluation_criteria': ['clarity', 'relevance', 'depth'],
+            })
+            i += 1
+        return questions
+
+    async def _evaluate(self, item):
+        answer = (item.answer_text or '').strip()
+        if not answer:
+            return EvaluationResult(
+                score=0.0,
+                feedback="No answer was provided.",
+                metrics={metric: 0 for metric in METRIC_PHRASES},
+                needs_review=False,
+            )
+
+        lowered = answer.lower()
+        words = len(answer.split())
+        sentences = max(1, len(re.findall(r'[.!?]+', answer)))
+        key_terms = terms(item.question_text) | terms(item.expected_answer)
+        coverage = len(key_terms & terms(answer)) / len(key_terms) if key_terms else 0.5
+        has_example = any(marker in lowered for marker in EXAMPLE_MARKERS)
+        structure_hits = sum(1 for marker in STRUCTURE_MARKERS if marker in lowered)
+
+        target_words = {'easy': 40, 'medium': 80, 'hard': 120}.get(item.difficulty, 80)
+        length_factor = min(words / target_words, 1.0)
+
+        metrics = {
+            'clarity': round(clamp(4 + 3 * min(structure_hits, 3) / 3 + 3 * min(words / sentences, 25) / 25 - (2 if words / sentences > 40 else 0))),
+            'relevance': round(clamp(3 + 7 * coverage)),
+            'depth': round(clamp(2 + 5 * length_factor + (3 if has_example else 0))),
+            'technical_accuracy': round(clamp(3 + 4 * coverage + 3 * length_factor)),
+        }
+        score = round(sum(metrics.values()) / len(metrics), 1)
+
+        weakest = min(metrics, key=metrics.get)
+        strongest = max(metrics, key=metrics.get)
+        praise = f"{METRIC_PHRASES[strongest][0]}. " if metrics[strongest] >= 7 else "The answer is too brief to show your strengths. "
+        feedback = f"{praise}To improve: {METRIC_PHRASES[weakest][1].lower()}."
+
+        return EvaluationResult(
+            score=score,
+            feedback=feedback,
+            metrics=metrics,
+            needs_review=words < 5,
+        )
+
+    async def _summarize(self, summary):
+        avg = summary.average_score
+        rating = 'Excellent' if avg >= 8 else 'Good' if avg >= 6 else 'Needs Improvement'
+        metric_averages = summary.metric_averages or {}
+
+        ranked = sorted(
+            ((metric, value) for metric, value in metric_averages.items() if metric in METRIC_PHRASES and value is not None),
+            key=lambda pair: pair[1],
+            reverse=True,
+        )
+        strengths = [METRIC_PHRASES[m][0] for m, value in ranked if value >= 7][:3]
+        weaknesses = [METRIC_PHRASES[m][1] for m, value in reversed(ranked) if value < 7][:3]
+        recommendations = [RECOMMENDATIONS[m] for m, value in reversed(ranked) if value < 7][:3]
+
+        if not strengths and ranked:
+            strengths = [METRIC_PHRASES[ranked[0][0]][0]]
+        if not recommendations:
+            recommendations = [f"Try a harder {summary.interview_type.replace('_', ' ')} interview next"]
+
+        return {
+            'overall_feedback': f"Overall performance: {rating}",
+            'strengths': strengths,
+            'weaknesses': weaknesses,
+            'recommendations': recommendations,
+        }
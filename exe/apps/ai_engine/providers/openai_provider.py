@@ -0,0 +1,251 @@
+"""
+OpenAI chat-completions provider (JSON mode).
+
+Network and rate-limit errors, and responses that do not have the expected
+shape, are surfaced as ProviderError so the base class retries them and,
+once exhausted, hands the call to the fallback provider (the offline
+provider by default).
+
+Streaming uses plain-text prompts: questions arrive one per line, and
+feedback arrives as prose followed by a final JSON line with the scores,
+so tokens can be forwarded before the completion finishes.
+"""
+import json
+from contextlib import contextmanager
+from .base import BaseProvider, EvaluationResult, ProviderError
+
+
+QUESTIONS_PROMPT = """You are an interviewer hiring a {job_role}.
+Write {count} {difficulty} {interview_type} interview questions.
+Required skills: {skills}.
+Job description: {job_description}
+Respond with JSON: {{"questions": [{{"text": str, "type": one of technical|behavioral|coding|system_design|general,
+"expected_answer": str, "evaluation_criteria": [str]}}]}}"""
+
+EVALUATION_PROMPT = """Evaluate this {difficulty} {question_type} interview answer.
+Question: {question_text}
+Key points expected: {expected_answer}
+Answer: {answer_text}
+Respond with JSON: {{"score": 0-10, "feedback": str, "metrics": {{"clarity": 0-10, "relevance": 0-10,
+"depth": 0-10, "technical_accuracy": 0-10}}, "needs_review": bool}}"""
+
+BATCH_EVALUATION_PROMPT = """Evaluate each of these {count} interview answers independently.
+{answers}
+Respond with JSON: {{"evaluations": [one object per answer, in the same order: {{"score": 0-10, "feedback": str,
+"metrics": {{"clarity": 0-10, "relevance": 0-10, "depth": 0-10, "technical_accuracy": 0-10}}, "needs_review": bool}}]}}"""
+
+BATCH_ITEM = """### Answer {number} ({difficulty} {question_type})
+Question: {question_text}
+Key points expected: {expected_answer}
+Answer: {answer_text}"""
+
+STREAM_QUESTIONS_PROMPT = """You are an interviewer hiring a {job_role}.
+Write {count} {difficulty} {interview_type} interview questions.
+Required skills: {skills}.
+Job description: {job_description}
+Write exactly one question per line, with no numbering and no other text."""
+
+STREAM_EVALUATION_PROMPT = """Evaluate this {difficulty} {question_type} interview answer.
+Question: {question_text}
+Key points expected: {expected_answer}
+Answer: {answer_text}
+First write two to four sentences of feedback addressed to the candidate.
+Then, on a new final line, write only JSON: {{"score": 0-10, "metrics": {{"clarity": 0-10, "relevance": 0-10,
+"depth": 0-10, "technical_accuracy": 0-10}}, "needs_review": bool}}"""
+
+# Question types InterviewQuestion accepts; other interview types map to 'general'
+QUESTION_TYPES = ('technical', 'behavioral', 'coding', 'system_design')
+
+SUMMARY_PROMPT = """A candidate for {job_role} finished a {interview_type} interview with {response_count} answers.
+Average score: {average_score:.1f}/10. Average per metric: {metric_averages}.
+Respond with JSON: {{"overall_feedback": str, "strengths": [str], "weaknesses": [str], "recommendations": [str]}}"""
+
+
+@contextmanager
+def parsing_response():
+    """Re-raise errors from reading a malformed model response as ProviderError"""
+    try:
+        yield
+    except (TypeError, ValueError, KeyError, IndexError, AttributeError) as exc:
+        raise ProviderError(f'Malformed response: {exc!r}') from exc
+
+
+class OpenAIProvider(BaseProvider):
+    name = 'openai'
+    prompt_version = 'openai-1'
+    streaming = True
+    
+    def __init__(self, api_key='', base_url=None, **kwargs):
+        super().__init__(**kwargs)
+        from openai import AsyncOpenAI
+        self.client = AsyncOpenAI(api_key=api_key or None, base_url=base_url, max_retries=0)
+    
+    async def _complete_json(self, prompt):
+        import openai
+        try:
+            completion = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[{'role': 'user', 'content': prompt}],
+                response_format={'type': 'json_object'},
+                temperature=0.2,
+            )
+        except (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError) as exc:
+            raise ProviderError(str(exc)) from exc
+        with parsing_response():
+            data = json.loads(completion.choices[0].message.content)
+            if not isinstance(data, dict):
+                raise TypeError(f'expected a JSON object, got {type(data).__name__}')
+            return data
+    
+    async def _stream_text(self, prompt):
+        import openai
+        try:
+            stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[{'role': 'user', 'content': prompt}],
+                temperature=0.2,
+                stream=True,
+            )
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+        except (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError) as exc:
+            raise ProviderError(str(exc)) from exc
+    
+    async def _stream_questions(self, spec):
+        q_type = spec.interview_type if spec.interview_type in QUESTION_TYPES else 'general'
+        line, count = '', 0
+        prompt = STREAM_QUESTIONS_PROMPT.format(
+            job_role=spec.job_role,
+            count=spec.count,
+            difficulty=spec.difficulty,
+            interview_type=spec.interview_type,
+            skills=', '.join(spec.required_skills) or 'any',
+            job_description=spec.job_description or 'n/a',
+        )
+        async for delta in self._stream_text(prompt):
+            for index, part in enumerate(delta.split('\n')):
+                if index:
+                    # A newline finished the current question
+                    if line.strip() and count < spec.count:
+                        count += 1
+                        yield 'question', self._streamed_question(line, q_type, spec)
+                    line = ''
+                if part and count < spec.count:
+                    line += part
+                    if line.strip():
+                        yield 'token', part
+        if line.strip() and count < spec.count:
+            yield 'question', self._streamed_question(line, q_type, spec)
+    
+    def _streamed_question(self, text, q_type, spec):
+        return {
+            'text': text.strip(),
+            'type': q_type,
+            'difficulty': spec.difficulty,
+            'expected_answer': '',
+            'evaluation_criteria': [],
+        }
+    
+    async def _stream_evaluation(self, item):
+        prompt = STREAM_EVALUATION_PROMPT.format(
+            difficulty=item.difficulty,
+            question_type=item.question_type,
+            question_text=item.question_text,
+            expected_answer=item.expected_answer or 'n/a',
+            answer_text=item.answer_text or '(no answer)',
+        )
+        text, emitted, json_start = '', 0, None
+        async for delta in self._stream_text(prompt):
+            text += delta
+            if json_start is None:
+                position = text.find('\n{')
+                json_start = position + 1 if position >= 0 else (0 if text.lstrip().startswith('{') else None)
+            # Hold back a trailing newline until we know whether JSON follows it
+            limit = max(json_start - 1, 0) if json_start is not None else len(text.rstrip('\n'))
+            if limit > emitted:
+                yield 'token', text[emitted:limit]
+                emitted = limit
+        
+        if json_start is None:
+            raise ProviderError('Streamed evaluation did not end with a JSON line')
+        with parsing_response():
+            data = dict(json.loads(text[json_start:]), feedback=text[:json_start].strip())
+        yield 'result', self._parse_evaluation(data)
+    
+    async def _generate_questions(self, spec):
+        data = await self._complete_json(QUESTIONS_PROMPT.format(
+            job_role=spec.job_role,
+            count=spec.count,
+            difficulty=spec.difficulty,
+            interview_type=spec.interview_type,
+            skills=', '.join(spec.required_skills) or 'any',
+            job_description=spec.job_description or 'n/a',
+        ))
+        with parsing_response():
+            return [
+                {
+                    'text': str(q['text']),
+                    'type': q.get('type', 'general'),
+                    'difficulty': spec.difficulty,
+                    'expected_answer': q.get('expected_answer', ''),
+                    'evaluation_criteria': list(q.get('evaluation_criteria', [])),
+                }
+                for q in data.get('questions', [])[:spec.count]
+            ]
+    
+    async def _evaluate(self, item):
+        data = await self._complete_json(EVALUATION_PROMPT.format(
+            difficulty=item.difficulty,
+            question_type=item.question_type,
+            question_text=item.question_text,
+            expected_answer=item.expected_answer or 'n/a',
+            answer_text=item.answer_text or '(no answer)',
+        ))
+        return self._parse_evaluation(data)
+    
+    async def _evaluate_batch(self, items):
+        answers = '\n\n'.join(
+            BATCH_ITEM.format(
+                number=number,
+                difficulty=item.difficulty,
+                question_type=item.question_type,
+                question_text=item.question_text,
+                expected_answer=item.expected_answer or 'n/a',
+                answer_text=item.answer_text or '(no answer)',
+            )
+            for number, item in enumerate(items, start=1)
+        )
+        data = await self._complete_json(BATCH_EVALUATION_PROMPT.format(count=len(items), answers=answers))
+        evaluations = data.get('evaluations', [])
+        if not isinstance(evaluations, list):
+            raise ProviderError(f'Expected a list of evaluations, got {type(evaluations).__name__}')
+        if len(evaluations) != len(items):
+            raise ProviderError(f'Expected {len(items)} evaluations, got {len(evaluations)}')
+        return [self._parse_evaluation(evaluation) for evaluation in evaluations]
+    
+    def _parse_evaluation(self, data):
+        with parsing_response():
+            return EvaluationResult(
+                score=max(0.0, min(10.0, float(data.get('score', 0)))),
+                feedback=str(data.get('feedback', '')),
+                metrics={str(name): float(value) for name, value in (data.get('metrics') or {}).items()},
+                needs_review=bool(data.get('needs_review', False)),
+            )
+    
+    async def _summarize(self, summary):
+        data = await self._complete_json(SUMMARY_PROMPT.format(
+            job_role=summary.job_role,
+            interview_type=summary.interview_type,
+            response_count=summary.response_count,
+            average_score=summary.average_score,
+            metric_averages=summary.metric_averages,
+        ))
+        with parsing_response():
+            return {
+                'overall_feedback': str(data.get('overall_feedback', '')),
+                'strengths': list(data.get('strengths', [])),
+                'weaknesses': list(data.get('weaknesses', [])),
+                'recommendations': list(data.get('recommendations', [])),
+            }
@@ -0,0 +1,16 @@
+from rest_framework import serializers
+from apps.interview.serializers import InterviewResponseSerializer
+from .models import EvaluationJob
+
+
+class EvaluationJobSerializer(serializers.ModelSerializer):
+    """Serializer for evaluation job status (poll until status is completed)"""
+    response = InterviewResponseSerializer(read_only=True)
+    interview_id = serializers.IntegerField(source='response.interview_id', read_only=True)
+    
+    class Meta:
+        model = EvaluationJob
+        fields = [
+            'id', 'status', 'interview_id', 'backend', 'attempts',
+            'error_message', 'queued_at', 'started_at', 'completed_at', 'response'
+        ]
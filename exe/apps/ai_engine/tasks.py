@@ -0,0 +1,53 @@
+from celery import shared_task
+from .pipeline import (
+    run_evaluation, mark_failed, mark_transcription_failed, process_media_upload, sweep_evaluation_jobs,
+    sweep_media_uploads, sweep_transcriptions, transcribe_response,
+)
+from .transcription import RecordingUnavailable
+from .vector_index import index_settings, rebuild_index
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=5, acks_late=True)
+def evaluate_response_task(self, job_id):
+    """Evaluate one interview response, retrying transient evaluator failures"""
+    try:
+        run_evaluation(job_id)
+    except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            mark_failed(job_id, exc)
+            return
+        raise self.retry(exc=exc)
+
+
+@shared_task(acks_late=True)
+def process_media_upload_task(upload_id):
+    """Post-process a completed media upload and queue its evaluation"""
+    process_media_upload(upload_id)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30, acks_late=True)
+def transcribe_response_task(self, response_id):
+    """Transcribe an audio answer and queue its evaluation"""
+    try:
+        transcribe_response(response_id)
+    except RecordingUnavailable as exc:
+        mark_transcription_failed(response_id, exc)
+    except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            mark_transcription_failed(response_id, exc)
+            return
+        raise self.retry(exc=exc)
+
+
+@shared_task
+def sweep_evaluation_jobs_task():
+    """Redispatch evaluation jobs, media uploads and transcriptions whose dispatch was lost or whose worker died"""
+    return len(sweep_evaluation_jobs()) + len(sweep_media_uploads()) + len(sweep_transcriptions())
+
+
+@shared_task
+def rebuild_question_index_task():
+    """Rebuild the local question index if questions or templates changed since the last build"""
+    if not index_settings()['ENABLED']:
+        return None
+    return rebuild_index()
@@ -1,3 +1,587 @@
-from django.test import TestCase
+import asyncio
+import math
+import shutil
+import tempfile
+import threading
+import wave
+from datetime import timedelta
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.interview.models import Interview, InterviewQuestion, InterviewResponse, InterviewTemplate, MediaUpload
+from apps.users.models import User
+from . import transcription, vector_index
+from .batching import MicroBatcher
+from .evaluators import ProviderEvaluator, get_evaluator
+from .cache import cache_key
+from .models import EvaluationJob
+from .pipeline import mark_failed, run_evaluation, sweep_evaluation_jobs, transcribe_response
+from .providers import _build
+from .providers.base import ConcurrencyLimit, EvaluationItem, ProviderError, ProviderUnavailable, QuestionSpec
+from .providers.openai_provider import OpenAIProvider
+from .tasks import evaluate_response_task
+from .vector_index import HashingEmbedder, QuestionIndex, build_index, rebuild_index, retrieve_questions
 
-# Create your tests here.
+
+def completion(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def write_recording(path, seconds, transcript, rate=8000):
+    """Silent 8-bit WAV with a LocalStubBackend sidecar transcript"""
+    with wave.open(str(path), 'wb') as recording:
+        recording.setnchannels(1)
+        recording.setsampwidth(1)
+        recording.setframerate(rate)
+        recording.writeframes(b'\x80' * rate * seconds)
+    Path(f'{path}.txt').write_text(transcript, encoding='utf-8')
+    return path
+
+
+TRANSCRIPT = 'indexes trade write speed for faster reads on the columns they cover'
+INDEXED = [
+    {'text': 'How does a PostgreSQL index speed up queries?', 'type': 'technical', 'difficulty': 'easy'},
+    {'text': 'Explain Django middleware ordering.', 'type': 'technical', 'difficulty': 'easy'},
+    {'text': 'Tell me about a conflict with a teammate.', 'type': 'behavioral', 'difficulty': 'easy'},
+    {'text': 'Design a PostgreSQL sharding strategy.', 'type': 'system_design', 'difficulty': 'hard'},
+]
+
+
+class ConcurrencyLimitTests(SimpleTestCase):
+
+    def test_limit_holds_across_event_loops(self):
+        limit = ConcurrencyLimit(2)
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        async def work():
+            await limit.acquire()
+            try:
+                with lock:
+                    active[0] += 1
+                    peak[0] = max(peak[0], active[0])
+                await asyncio.sleep(0.02)
+                with lock:
+                    active[0] -= 1
+            finally:
+                limit.release()
+
+        # Every thread runs its own event loop, like async_to_sync callers
+        threads = [threading.Thread(target=async_to_sync(work)) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(peak[0], 2)
+        self.assertEqual(limit._value, 2)
+
+    def test_cancelled_waiter_does_not_leak_a_slot(self):
+        limit = ConcurrencyLimit(1)
+
+        async def scenario():
+            await limit.acquire()
+            waiter = asyncio.ensure_future(limit.acquire())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            limit.release()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+            await asyncio.wait_for(limit.acquire(), 1)
+            limit.release()
+
+        asyncio.run(scenario())
+        self.assertEqual(limit._value, 1)
+
+
+class OpenAIResponseParsingTests(SimpleTestCase):
+
+    def setUp(self):
+        with mock.patch('openai.AsyncOpenAI'):
+            self.provider = OpenAIProvider(api_key='test', model='test')
+        self.item = EvaluationItem(question_text='Q?', question_type='technical', answer_text='A')
+
+    def respond(self, content):
+        return mock.patch.object(
+            self.provider.client.chat.completions, 'create', mock.AsyncMock(return_value=completion(content))
+        )
+
+    def test_malformed_responses_raise_provider_error(self):
+        cases = [
+            ('_evaluate', self.item, '["not", "an", "object"]'),
+            ('_evaluate', self.item, '{"score": "high"}'),
+            ('_evaluate', self.item, '{"score": 7, "metrics": {"depth": "deep"}}'),
+            ('_evaluate', self.item, '{"score": 7, "metrics": [1, 2]}'),
+            ('_evaluate', self.item, 'not json'),
+            ('_generate_questions', QuestionSpec('dev', 'technical', 'easy'), '{"questions": [{"type": "x"}]}'),
+            ('_evaluate_batch', [self.item], '{"evaluations": {"score": 7}}'),
+        ]
+        for method, arg, content in cases:
+            with self.subTest(content=content), self.respond(content):
+                with self.assertRaises(ProviderError):
+                    asyncio.run(getattr(self.provider, method)(arg))
+
+    def test_metrics_are_read_as_floats(self):
+        with self.respond('{"score": "7.5", "feedback": "ok", "metrics": {"depth": "8"}}'):
+            result = asyncio.run(self.provider._evaluate(self.item))
+        self.assertEqual(result.score, 7.5)
+        self.assertEqual(result.metrics, {'depth': 8.0})
+
+
+class CacheKeyTests(SimpleTestCase):
+
+    def setUp(self):
+        self.provider = SimpleNamespace(name='openai', model='m', prompt_version='1')
+
+    def key(self, **fields):
+        item = dict(question_text='What is a Python GIL?', question_type='technical', answer_text='It is a lock.')
+        item.update(fields)
+        return cache_key(self.provider, 'evaluate', EvaluationItem(**item))
+
+    def test_answer_case_is_part_of_the_key(self):
+        self.assertNotEqual(self.key(answer_text='Use SELECT FOR UPDATE'), self.key(answer_text='use select for update'))
+        self.assertEqual(self.key(answer_text='It  is a\nlock.'), self.key())
+
+    def test_question_text_is_case_and_whitespace_insensitive(self):
+        self.assertEqual(self.key(question_text='what is a  python gil?'), self.key())
+
+    def test_skill_order_does_not_matter(self):
+        spec = lambda skills: cache_key(self.provider, 'generate_questions', QuestionSpec('Dev', 'technical', 'easy', skills))
+        self.assertEqual(spec(['Python', 'SQL']), spec(['sql', 'python']))
+
+    def test_offline_provider_is_not_cached_by_default(self):
+        with self.settings(AI_PROVIDERS={'plain': {'BACKEND': 'apps.ai_engine.providers.offline.OfflineProvider'}}):
+            self.assertFalse(_build('plain').cache)
+
+
+class MicroBatcherTests(SimpleTestCase):
+
+    def setUp(self):
+        self.calls = []
+
+    def handler(self, items):
+        self.calls.append(list(items))
+        if 'bad' in items:
+            raise ProviderError('cannot evaluate bad')
+        return [item.upper() for item in items]
+
+    def test_concurrent_items_share_one_call(self):
+        batcher = MicroBatcher(self.handler, max_items=4, max_wait_ms=1000)
+        futures = [batcher.submit(item) for item in ('a', 'b', 'c', 'd')]
+        self.assertEqual([future.result(5) for future in futures], ['A', 'B', 'C', 'D'])
+        self.assertEqual(self.calls, [['a', 'b', 'c', 'd']])
+
+    def test_partial_batch_is_sent_after_max_wait(self):
+        batcher = MicroBatcher(self.handler, max_items=10, max_wait_ms=20)
+        self.assertEqual(batcher.submit('a').result(5), 'A')
+        self.assertEqual(self.calls, [['a']])
+
+    def test_failed_batch_falls_back_to_single_items(self):
+        batcher = MicroBatcher(self.handler, max_items=3, max_wait_ms=1000)
+        with self.assertLogs('apps.ai_engine.batching', 'WARNING'):
+            futures = [batcher.submit(item) for item in ('a', 'bad', 'c')]
+            self.assertEqual(futures[0].result(5), 'A')
+        self.assertEqual(futures[2].result(5), 'C')
+        with self.assertRaises(ProviderError):
+            futures[1].result(5)
+        self.assertEqual(self.calls, [['a', 'bad', 'c'], ['a'], ['bad'], ['c']])
+
+    def test_cancelled_items_are_not_sent(self):
+        batcher = MicroBatcher(self.handler, max_items=2, max_wait_ms=1000)
+        with batcher.condition:  # Hold the worker until both items are queued
+            first = batcher.submit('a')
+            second = batcher.submit('b')
+            first.cancel()
+        self.assertEqual(second.result(5), 'B')
+        self.assertEqual(self.calls, [['b']])
+
+    def test_evaluator_gives_up_after_result_timeout(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def stuck(items):
+            release.wait(5)
+            return items
+
+        evaluator = ProviderEvaluator.__new__(ProviderEvaluator)
+        evaluator.batcher = MicroBatcher(stuck, max_items=1, max_wait_ms=0)
+        evaluator.timeout = 0.05
+        question = SimpleNamespace(question_text='Q', question_type='technical', expected_answer='',
+                                   evaluation_criteria=[], difficulty='easy')
+        response = SimpleNamespace(text_response='A', code_response='')
+        with self.assertRaises(ProviderUnavailable):
+            evaluator.evaluate_many([(question, response), (question, response)])
+
+
+class PlanSegmentsTests(SimpleTestCase):
+
+    def test_segments_cover_the_duration(self):
+        self.assertEqual(transcription.plan_segments(65, 30), [(0, 30), (30, 60), (60, 65)])
+        self.assertEqual(transcription.plan_segments(60, 30), [(0, 30), (30, 60)])
+        self.assertEqual(transcription.plan_segments(10, 30), [(0, 10)])
+        self.assertEqual(transcription.plan_segments(0, 30), [(0, 0)])  # Still one call for an empty file
+
+
+class TranscribeFileTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = write_recording(Path(directory) / 'answer.wav', 70, TRANSCRIPT)
+
+    def test_inline(self):
+        with override_settings(AI_TRANSCRIPTION={'WORKERS': 0, 'SEGMENT_SECONDS': 30}), \
+                mock.patch.object(transcription, 'get_pool') as get_pool:
+            self.assertEqual(transcription.transcribe_file(self.path), TRANSCRIPT)
+        get_pool.assert_not_called()
+
+    def test_segments_are_transcribed_on_the_pool(self):
+        self.addCleanup(transcription.shutdown_pool)
+        with override_settings(AI_TRANSCRIPTION={'WORKERS': 2, 'SEGMENT_SECONDS': 30}), \
+                mock.patch.object(transcription, 'get_pool', wraps=transcription.get_pool) as get_pool:
+            self.assertEqual(transcription.transcribe_file(self.path), TRANSCRIPT)
+        get_pool.assert_called_once()
+
+    def test_broken_pool_falls_back_to_inline(self):
+        with override_settings(AI_TRANSCRIPTION={'WORKERS': 2, 'SEGMENT_SECONDS': 30}), \
+                mock.patch.object(transcription, 'get_pool', side_effect=BrokenProcessPool('gone')), \
+                self.assertLogs('apps.ai_engine.transcription', 'WARNING'):
+            self.assertEqual(transcription.transcribe_file(self.path), TRANSCRIPT)
+
+    def test_only_allowed_hosts_are_downloaded(self):
+        with override_settings(AI_TRANSCRIPTION={'URL_HOSTS': ['media.example.com']}), \
+                mock.patch.object(transcription, 'urlopen') as urlopen:
+            for url in ('http://10.0.0.1/a.wav', 'file:///etc/passwd', 'https://evil.example.com/a.wav'):
+                with self.subTest(url=url), self.assertRaises(transcription.RecordingUnavailable):
+                    with transcription.fetch_recording(url):
+                        pass
+        urlopen.assert_not_called()
+
+
+@override_settings(AI_TRANSCRIPTION={'WORKERS': 0}, NOTIFICATIONS={'DISPATCH_ON_COMMIT': False})
+class TranscriptionWriteBackTests(TestCase):
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_UPLOAD={'ROOT': root})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.root = Path(root)
+
+        self.user = User.objects.create_user('speaker', 'speaker@example.com', 'pass')
+        self.interview = Interview.objects.create(
+            user=self.user, title='Spoken', description='', interview_type='technical', job_role='Developer',
+            status='in_progress', use_ai=True,
+        )
+        self.questions = [
+            InterviewQuestion.objects.create(
+                interview=self.interview, question_text=f'Question {order}', question_type='technical',
+                difficulty='easy', order=order,
+            )
+            for order in (1, 2)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def recorded_url(self, question):
+        """Content URL of a processed upload answering ``question``"""
+        response, _ = InterviewResponse.objects.get_or_create(interview=self.interview, question=question)
+        upload = MediaUpload.objects.create(
+            user=self.user, response=response, kind='audio', filename='answer.wav', content_type='audio/wav',
+            total_size=1, received_bytes=1, status='processed', storage_path=f'{self.user.id}/{question.id}.wav',
+        )
+        path = self.root / upload.storage_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_recording(path, 5, TRANSCRIPT)
+        return 'http://localhost' + reverse('media-upload-content', args=[upload.id])
+
+    def submit(self, question, **fields):
+        return self.client.post(f'/api/v1/interviews/{self.interview.id}/submit_response/', {
+            'question_id': question.id, **fields,
+        }, format='json')
+
+    def test_audio_answer_is_transcribed_before_evaluation(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.submit(self.questions[0], audio_url=self.recorded_url(self.questions[0]))
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['transcription_status'], 'pending')
+        self.assertEqual(len(callbacks), 1)  # The transcription task, no evaluation yet
+        self.assertFalse(EvaluationJob.objects.exists())
+
+        answer = transcribe_response(response.data['response']['id'])
+        self.assertEqual((answer.text_response, answer.transcription_status), (TRANSCRIPT, 'completed'))
+        self.assertEqual(EvaluationJob.objects.get().response_id, answer.id)
+        self.assertIsNone(transcribe_response(answer.id))  # Duplicate deliveries are no-ops
+
+    def test_interview_completed_before_transcription_is_rescored(self):
+        written = self.submit(self.questions[0], text_response='An index is a sorted lookup structure.').data
+        spoken = self.submit(self.questions[1], audio_url=self.recorded_url(self.questions[1])).data['response']
+
+        response = self.client.post(f'/api/v1/interviews/{self.interview.id}/complete/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['pending_evaluations'], response.data['pending_transcriptions']), (1, 1))
+
+        with mock.patch('apps.ai_engine.tasks.evaluate_response_task.delay', side_effect=run_evaluation), \
+                self.captureOnCommitCallbacks(execute=True):
+            run_evaluation(EvaluationJob.objects.get(response_id=written['response']['id']).id)
+            self.interview.refresh_from_db()
+            self.assertEqual(self.interview.overall_feedback, '')  # Still waiting for the spoken answer
+            transcribe_response(spoken['id'])
+
+        answers = InterviewResponse.objects.filter(interview=self.interview)
+        self.assertTrue(all(answer.is_evaluated for answer in answers))
+        self.interview.refresh_from_db()
+        self.assertAlmostEqual(self.interview.total_score, sum(answer.score for answer in answers))
+        self.assertNotEqual(self.interview.overall_feedback, '')
+
+
+class EvaluationJobTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('candidate', 'candidate@example.com', 'pass')
+        self.interview = Interview.objects.create(
+            user=self.user, title='Backend', description='', interview_type='technical', job_role='Developer',
+            status='in_progress', use_ai=True,
+        )
+        self.questions = [
+            InterviewQuestion.objects.create(
+                interview=self.interview, question_text=f'Question {order}', question_type='technical',
+                difficulty='easy', order=order,
+            )
+            for order in (1, 2)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def answer(self, question, text='An index is a sorted lookup structure.'):
+        """Submit an answer and return its job; the dispatch is left on the commit queue"""
+        response = self.client.post(f'/api/v1/interviews/{self.interview.id}/submit_response/', {
+            'question_id': question.id, 'text_response': text,
+        }, format='json')
+        self.assertEqual(response.status_code, 202)
+        return EvaluationJob.objects.get(response_id=response.data['response']['id'])
+
+    def jobs(self, count):
+        """``count`` queued jobs created directly, without dispatching them"""
+        jobs = []
+        for order in range(3, 3 + count):
+            question = InterviewQuestion.objects.create(
+                interview=self.interview, question_text=f'Question {order}', question_type='technical',
+                difficulty='easy', order=order,
+            )
+            response = InterviewResponse.objects.create(interview=self.interview, question=question, text_response='Yes')
+            jobs.append(EvaluationJob.objects.create(response=response))
+        return jobs
+
+    def evaluator(self, evaluate_many):
+        return mock.patch('apps.ai_engine.pipeline.get_evaluator',
+                          return_value=SimpleNamespace(name='test', evaluate_many=evaluate_many))
+
+    def test_job_moves_from_queued_to_running_to_completed(self):
+        job = self.answer(self.questions[0])
+        self.assertEqual((job.status, job.attempts), ('queued', 0))
+        seen = []
+
+        def evaluate_many(items):
+            seen.append(EvaluationJob.objects.get(id=job.id).status)
+            return get_evaluator().evaluate_many(items)
+
+        with self.evaluator(evaluate_many):
+            run_evaluation(job.id)
+        self.assertEqual(seen, ['running'])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.backend), ('completed', 1, 'test'))
+        self.assertIsNotNone(job.completed_at)
+        self.assertTrue(job.response.is_evaluated)
+
+        with self.evaluator(mock.Mock(side_effect=AssertionError('evaluated twice'))):
+            self.assertEqual(run_evaluation(job.id).status, 'completed')
+
+    def test_evaluator_error_requeues_the_job_until_retries_run_out(self):
+        job = self.answer(self.questions[0])
+        with self.evaluator(mock.Mock(side_effect=ProviderError('bad gateway'))):
+            with self.assertRaises(ProviderError):
+                run_evaluation(job.id)
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts, job.error_message), ('queued', 1, 'bad gateway'))
+
+            evaluate_response_task.apply(args=[job.id])
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error_message), ('failed', 'bad gateway'))
+        self.assertEqual(job.attempts, 1 + evaluate_response_task.max_retries + 1)
+        self.assertFalse(job.response.is_evaluated)
+
+    def test_complete_does_not_wait_for_the_evaluator(self):
+        jobs = [self.answer(question) for question in self.questions]
+        with self.evaluator(mock.Mock(side_effect=AssertionError('evaluated during complete'))):
+            response = self.client.post(f'/api/v1/interviews/{self.interview.id}/complete/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['pending_evaluations'], response.data['pending_transcriptions']), (2, 0))
+        self.interview.refresh_from_db()
+        self.assertEqual((self.interview.status, self.interview.total_score), ('completed', 0))
+
+        first = run_evaluation(jobs[0].id)
+        self.interview.refresh_from_db()
+        self.assertAlmostEqual(self.interview.total_score, first.response.score)
+        self.assertEqual(self.interview.overall_feedback, '')
+
+        second = run_evaluation(jobs[1].id)
+        self.interview.refresh_from_db()
+        self.assertAlmostEqual(self.interview.total_score, first.response.score + second.response.score)
+        self.assertNotEqual(self.interview.overall_feedback, '')
+
+    def test_complete_requeues_failed_jobs(self):
+        job = self.answer(self.questions[0])
+        mark_failed(job.id, ProviderError('bad gateway'))
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(f'/api/v1/interviews/{self.interview.id}/complete/')
+        self.assertEqual(response.data['pending_evaluations'], 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.error_message), ('queued', 0, ''))
+        with mock.patch.object(evaluate_response_task, 'delay') as delay:
+            for callback in callbacks:
+                callback()
+        delay.assert_called_once_with(job.id)
+
+    def test_sweep_redispatches_lost_and_stuck_jobs(self):
+        stale, fresh, stuck, running = self.jobs(4)
+        long_ago = timezone.now() - timedelta(hours=1)
+        EvaluationJob.objects.filter(id=stale.id).update(updated_at=long_ago)
+        EvaluationJob.objects.filter(id=stuck.id).update(status='running', started_at=long_ago)
+        EvaluationJob.objects.filter(id=running.id).update(status='running', started_at=timezone.now())
+
+        with mock.patch.object(evaluate_response_task, 'delay') as delay:
+            self.assertEqual(sorted(sweep_evaluation_jobs()), sorted([stale.id, stuck.id]))
+            self.assertEqual(sweep_evaluation_jobs(), [])  # The clock was restarted
+        self.assertEqual(sorted(call.args[0] for call in delay.call_args_list), sorted([stale.id, stuck.id]))
+
+        statuses = dict(EvaluationJob.objects.values_list('id', 'status'))
+        self.assertEqual(
+            [statuses[job.id] for job in (stale, fresh, stuck, running)], ['queued', 'queued', 'queued', 'running']
+        )
+        self.assertEqual(EvaluationJob.objects.get(id=stuck.id).error_message, 'Worker timed out')
+
+    def test_broker_failure_leaves_the_job_for_the_sweep(self):
+        with mock.patch.object(evaluate_response_task, 'delay', side_effect=ConnectionError('broker down')), \
+                self.assertLogs('apps.ai_engine.pipeline', 'WARNING'), \
+                self.captureOnCommitCallbacks(execute=True):
+            job = self.answer(self.questions[0])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 0))
+
+        EvaluationJob.objects.filter(id=job.id).update(updated_at=timezone.now() - timedelta(hours=1))
+        with mock.patch.object(evaluate_response_task, 'delay', side_effect=run_evaluation):
+            self.assertEqual(sweep_evaluation_jobs(), [job.id])
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'completed')
+
+
+class HashingEmbedderTests(SimpleTestCase):
+
+    def setUp(self):
+        self.embedder = HashingEmbedder(64)
+
+    def test_vectors_are_deterministic_and_normalized(self):
+        vector = self.embedder.embed('PostgreSQL index scans')
+        self.assertEqual(len(vector), 64)
+        self.assertEqual(vector, HashingEmbedder(64).embed('postgresql INDEX scans'))
+        self.assertAlmostEqual(math.sqrt(sum(v * v for v in vector)), 1.0, places=6)
+
+    def test_stopwords_are_ignored(self):
+        self.assertEqual(self.embedder.features('What is the index?'), ['index'])
+        self.assertEqual(self.embedder.embed('what is the'), [0.0] * 64)
+
+
+class QuestionIndexTests(TestCase):
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        self.path = Path(root) / 'question_index'
+        settings_override = override_settings(AI_QUESTION_INDEX={'PATH': str(self.path), 'DIMENSIONS': 64})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # The process-wide index must not leak between tests
+        patcher = mock.patch.object(vector_index, '_index', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.spec = QuestionSpec(
+            job_role='PostgreSQL developer', interview_type='technical', difficulty='easy',
+            required_skills=['index'], count=3,
+        )
+
+    def test_build_and_search(self):
+        self.assertEqual(build_index(entries=INDEXED), 4)
+        self.assertEqual(self.path.with_suffix('.f32').stat().st_size, 4 * 64 * 4)
+        index = QuestionIndex(self.path, HashingEmbedder(64))
+        self.assertEqual(len(index), 4)
+
+        hits = index.search('postgresql index', k=2)
+        self.assertEqual(hits[0][1]['text'], INDEXED[0]['text'])
+        self.assertGreater(hits[0][0], hits[1][0])
+        hard = index.search('postgresql', k=5, accept=lambda entry: entry['difficulty'] == 'hard')
+        self.assertEqual([entry['text'] for _, entry in hard], [INDEXED[3]['text']])
+        self.assertEqual(index.search('kubernetes operators', k=5, min_score=0.1), [])
+
+        with self.assertRaises(ValueError):
+            QuestionIndex(self.path, HashingEmbedder(32))
+
+    def test_retrieve_questions_leaves_the_rest_to_the_llm(self):
+        self.assertEqual(retrieve_questions(self.spec), ([], self.spec))  # Not built yet
+
+        build_index(entries=INDEXED)
+        retrieved, remaining = retrieve_questions(self.spec)
+        self.assertEqual([entry['text'] for entry in retrieved], [INDEXED[0]['text']])
+        self.assertFalse(retrieved[0]['is_ai_generated'])
+        self.assertEqual(remaining.count, 2)
+
+        retrieved, remaining = retrieve_questions(QuestionSpec(**{**self.spec.__dict__, 'count': 1}))
+        self.assertEqual((len(retrieved), remaining), (1, None))
+
+    def test_interview_questions_are_generated_only_for_the_remainder(self):
+        build_index(entries=INDEXED)
+        user = User.objects.create_user('indexed', 'indexed@example.com', 'pass')
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.post('/api/v1/interviews/', {
+            'title': 'Database', 'description': 'Practice', 'interview_type': 'technical', 'difficulty': 'easy',
+            'job_role': 'PostgreSQL developer', 'required_skills': ['index'], 'use_ai': True, 'total_questions': 3,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        questions = InterviewQuestion.objects.filter(interview_id=response.data['interview']['id']).order_by('order')
+        self.assertEqual(
+            [(q.order, q.is_ai_generated) for q in questions], [(1, False), (2, True), (3, True)]
+        )
+        self.assertEqual(questions[0].question_text, INDEXED[0]['text'])
+
+    def test_rebuild_only_when_the_corpus_changed(self):
+        template = InterviewTemplate.objects.create(
+            title='Backend', description='', interview_type='technical', difficulty='easy',
+            questions=[{'question': 'What is an index?'}],
+        )
+        self.assertEqual(rebuild_index(), 1)
+        self.assertIsNone(rebuild_index())
+
+        user = User.objects.create_user('corpus', 'corpus@example.com', 'pass')
+        interview = Interview.objects.create(
+            user=user, title='Backend', description='', interview_type='technical', job_role='Developer',
+        )
+        InterviewQuestion.objects.create(
+            interview=interview, question_text='What is MVCC?', question_type='technical', difficulty='easy', order=1,
+        )
+        self.assertEqual(rebuild_index(), 2)
+
+        template.is_active = False
+        template.save()
+        self.assertEqual(rebuild_index(), 1)
+        self.assertIsNone(rebuild_index())
@@ -0,0 +1,183 @@
+"""
+Speech-to-text stage of the AI pipeline.
+
+Audio answers are cut into fixed-length segments (AI_TRANSCRIPTION
+['SEGMENT_SECONDS']) that are transcribed in parallel on a process pool, so
+throughput grows with the number of cores rather than being bound to one
+interpreter. The transcript is written to InterviewResponse.text_response
+before the response is queued for evaluation.
+
+Recordings come from a completed MediaUpload or, for answers submitted with
+only an ``audio_url``, are downloaded to a temporary file by
+fetch_recording(); only hosts listed in AI_TRANSCRIPTION['URL_HOSTS'] are
+fetched, so a client cannot make the server request arbitrary URLs.
+
+Backends are pluggable: AI_TRANSCRIPTION['BACKEND'] names a class with
+``duration(path)`` (seconds) and ``transcribe(path, start, end)`` (text of
+that time range). LocalStubBackend needs no model and is used for tests and
+local development.
+"""
+import logging
+import math
+import multiprocessing
+import os
+import tempfile
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlsplit
+from urllib.request import urlopen
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def transcription_settings():
+    defaults = {
+        'ENABLED': True,
+        'BACKEND': 'apps.ai_engine.transcription.LocalStubBackend',
+        'OPTIONS': {},
+        'WORKERS': os.cpu_count() or 1,  # 0 transcribes in the calling process
+        'START_METHOD': 'spawn',
+        'SEGMENT_SECONDS': 30,
+        'URL_HOSTS': (),  # hosts audio_url recordings may be downloaded from
+        'DOWNLOAD_TIMEOUT': 30,
+        'MAX_DOWNLOAD_SIZE': 100 * 1024 * 1024,
+    }
+    defaults.update(getattr(settings, 'AI_TRANSCRIPTION', {}))
+    return defaults
+
+
+class LocalStubBackend:
+    """
+    Deterministic backend for tests and local development. The transcript is
+    read from a sidecar file next to the recording (``answer.wav.txt``) and
+    each segment returns the words that fall inside its time range. Without
+    a sidecar the recording transcribes to nothing.
+    """
+
+    def __init__(self, bytes_per_second=32000):
+        self.bytes_per_second = bytes_per_second
+
+    def duration(self, path):
+        try:
+            with wave.open(str(path), 'rb') as recording:
+                return recording.getnframes() / float(recording.getframerate())
+        except (wave.Error, EOFError):
+            return os.path.getsize(path) / float(self.bytes_per_second)
+
+    def transcribe(self, path, start, end):
+        sidecar = Path(f'{path}.txt')
+        if not sidecar.exists():
+            return ''
+        words = sidecar.read_text(encoding='utf-8').split()
+        duration = self.duration(path) or 1.0
+        first = round(len(words) * start / duration)
+        last = round(len(words) * min(end, duration) / duration)
+        return ' '.join(words[first:last])
+
+
+def get_backend(config=None):
+    config = config or transcription_settings()
+    return import_string(config['BACKEND'])(**config['OPTIONS'])
+
+
+class RecordingUnavailable(Exception):
+    """The recording of an answer cannot be fetched; retrying will not help"""
+
+
+@contextmanager
+def fetch_recording(url, config=None):
+    """Download ``url`` to a temporary file and yield its path; the file is removed afterwards"""
+    config = config or transcription_settings()
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or parts.hostname not in config['URL_HOSTS']:
+        raise RecordingUnavailable(f'Recordings are not fetched from {parts.hostname or url!r}')
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / (Path(parts.path).name or 'recording')
+        with urlopen(url, timeout=config['DOWNLOAD_TIMEOUT']) as source, open(path, 'wb') as target:
+            copied = 0
+            for block in iter(lambda: source.read(1024 * 1024), b''):
+                copied += len(block)
+                if copied > config['MAX_DOWNLOAD_SIZE']:
+                    raise RecordingUnavailable(f'Recording is larger than {config["MAX_DOWNLOAD_SIZE"]} bytes')
+                target.write(block)
+        yield path
+
+
+def plan_segments(duration, segment_seconds):
+    """(start, end) second ranges covering ``duration``"""
+    count = max(1, math.ceil(duration / segment_seconds))
+    return [(i * segment_seconds, min((i + 1) * segment_seconds, duration)) for i in range(count)]
+
+
+# Backend instance of a pool worker process, built once by _init_worker
+_worker_backend = None
+
+
+def _init_worker(backend_path, options):
+    global _worker_backend
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    _worker_backend = import_string(backend_path)(**options)
+
+
+def _transcribe_segment(path, start, end):
+    return _worker_backend.transcribe(path, start, end)
+
+
+_pool = None
+
+
+def get_pool(config=None):
+    """
+    Process-wide worker pool, created on first use. Workers are started with
+    AI_TRANSCRIPTION['START_METHOD'] ('spawn' by default, which is safe from
+    threaded servers and Celery workers) and keep their backend loaded.
+    """
+    global _pool
+    config = config or transcription_settings()
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=config['WORKERS'],
+            mp_context=multiprocessing.get_context(config['START_METHOD']),
+            initializer=_init_worker,
+            initargs=(config['BACKEND'], config['OPTIONS']),
+        )
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def transcribe_file(path):
+    """Transcribe the recording at ``path``, segments in parallel when a pool is configured"""
+    config = transcription_settings()
+    backend = get_backend(config)
+    segments = plan_segments(backend.duration(path), config['SEGMENT_SECONDS'])
+    path = str(path)
+
+    texts = None
+    if config['WORKERS'] and len(segments) > 1:
+        try:
+            pool = get_pool(config)
+            starts, ends = zip(*segments)
+            texts = list(pool.map(_transcribe_segment, [path] * len(segments), starts, ends))
+        except (BrokenProcessPool, OSError, AssertionError) as exc:
+            # AssertionError: daemonic processes (e.g. some worker pools) cannot fork
+            logger.warning('Transcription pool unavailable, transcribing inline: %s', exc)
+            shutdown_pool()
+    if texts is None:
+        texts = [backend.transcribe(path, start, end) for start, end in segments]
+
+    return ' '.join(text.strip() for text in texts if text and text.strip())
@@ -0,0 +1,11 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import EvaluationJobViewSet, AICacheViewSet
+
+router = DefaultRouter()
+router.register(r'evaluations', EvaluationJobViewSet, basename='evaluation')
+router.register(r'cache', AICacheViewSet, basename='ai-cache')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,366 @@
+"""
+Local vector index over the existing interview question corpus.
+
+Questions from InterviewQuestion and InterviewTemplate.questions are embedded
+(by default with a hashed bag-of-words embedder; settings.AI_QUESTION_INDEX
+['EMBEDDER'] may name another class with ``dimensions`` and ``embed(text)``)
+and written by ``manage.py build_question_index`` as two files:
+
+* ``<PATH>.f32``  - a row-major float32 matrix, one L2-normalized row per question
+* ``<PATH>.json`` - dimensions, embedder and the question payload of each row
+
+rebuild_question_index_task (scheduled in CELERY_BEAT_SCHEDULE) rebuilds
+the files when the corpus changed since the last build, as recorded by
+corpus_version() in the metadata. PATH must be on storage shared by the
+hosts that generate questions, or the task must run on each of them.
+
+The matrix is memory-mapped when the app starts (and re-mapped after a
+rebuild), so lookups read pages straight from the OS cache. Scoring uses
+NumPy when it is installed and an equivalent pure-Python loop otherwise.
+
+retrieve_questions() returns the top existing questions for a QuestionSpec,
+and question generation only asks the LLM for whatever is still missing.
+"""
+import hashlib
+import heapq
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import sys
+import threading
+from array import array
+from collections import Counter
+from dataclasses import replace
+from pathlib import Path
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+STOPWORDS = set("""
+a an and are as at be but by can do does for from how i in is it me of on or so
+that the their then there these this to was what when where which who why will with
+you your about describe tell would did have has had
+""".split())
+
+# Interview types that are also InterviewQuestion types; others accept general/behavioral
+QUESTION_TYPES = ('technical', 'behavioral', 'coding', 'system_design')
+
+
+def index_settings():
+    defaults = {
+        'ENABLED': True,
+        'PATH': str(settings.BASE_DIR / 'var' / 'question_index'),
+        'EMBEDDER': 'apps.ai_engine.vector_index.HashingEmbedder',
+        'DIMENSIONS': 512,
+        'MIN_SCORE': 0.15,
+    }
+    defaults.update(getattr(settings, 'AI_QUESTION_INDEX', {}))
+    return defaults
+
+
+class HashingEmbedder:
+    """
+    Hashed bag-of-words with signed buckets. Deterministic and
+    dependency-free; bucket collisions are removed by re-ranking candidates
+    on their exact terms (see QuestionIndex.search).
+    """
+
+    def __init__(self, dimensions=512):
+        self.dimensions = dimensions
+
+    def features(self, text):
+        return [w for w in TOKEN_RE.findall((text or '').lower()) if w not in STOPWORDS]
+
+    def embed(self, text):
+        vector = [0.0] * self.dimensions
+        for feature in self.features(text):
+            digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], 'little') % self.dimensions
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector))
+        return [v / norm for v in vector] if norm else vector
+
+
+def get_embedder(config=None):
+    config = config or index_settings()
+    return import_string(config['EMBEDDER'])(dimensions=config['DIMENSIONS'])
+
+
+def query_text_for(spec):
+    return ' '.join([spec.job_role or '', *(spec.required_skills or [])])
+
+
+def term_cosine(query_terms, text, features):
+    """Exact cosine similarity of two bags of terms"""
+    terms = Counter(features(text))
+    dot = sum(count * terms[term] for term, count in query_terms.items())
+    if not dot:
+        return 0.0
+    norm = math.sqrt(sum(c * c for c in query_terms.values())) * math.sqrt(sum(c * c for c in terms.values()))
+    return dot / norm
+
+
+def collect_corpus():
+    """Distinct questions from interviews and templates, as provider-style dicts"""
+    from apps.interview.models import InterviewQuestion, InterviewTemplate
+
+    seen = set()
+    entries = []
+
+    def add(entry):
+        key = ' '.join(entry['text'].lower().split())
+        if key and key not in seen:
+            seen.add(key)
+            entries.append(entry)
+
+    rows = InterviewQuestion.objects.order_by('-id').values(
+        'question_text', 'question_type', 'difficulty', 'expected_duration_minutes',
+        'expected_answer', 'evaluation_criteria',
+    )
+    for row in rows.iterator(chunk_size=2000):
+        add({
+            'text': row['question_text'],
+            'type': row['question_type'],
+            'difficulty': row['difficulty'],
+            'expected_duration_minutes': row['expected_duration_minutes'],
+            'expected_answer': row['expected_answer'],
+            'evaluation_criteria': row['evaluation_criteria'] or [],
+        })
+
+    for template in InterviewTemplate.objects.filter(is_active=True).only('difficulty', 'questions'):
+        for question in template.questions:
+            if not question.get('question'):
+                continue
+            add({
+                'text': question['question'],
+                'type': question.get('type', 'general'),
+                'difficulty': question.get('difficulty', template.difficulty),
+                'expected_duration_minutes': question.get('expected_duration_minutes', 5),
+                'expected_answer': question.get('expected_answer', ''),
+                'evaluation_criteria': question.get('evaluation_criteria', []),
+            })
+    return entries
+
+
+def corpus_version():
+    """
+    Cheap fingerprint of the corpus: the newest question id plus the number
+    and last update of the active templates
+    """
+    from apps.interview.models import InterviewQuestion, InterviewTemplate
+
+    last_question = InterviewQuestion.objects.aggregate(last=Max('id'))['last']
+    templates = InterviewTemplate.objects.filter(is_active=True).aggregate(count=Count('id'), updated=Max('updated_at'))
+    updated = templates['updated'].isoformat() if templates['updated'] else None
+    return f"{last_question}:{templates['count']}:{updated}"
+
+
+def build_index(path=None, entries=None):
+    """
+    Embed the corpus and write the matrix and metadata files. Both are written
+    under temporary names and renamed, so readers never map a partial file.
+    Returns the number of indexed questions.
+    """
+    config = index_settings()
+    base = Path(path or config['PATH'])
+    base.parent.mkdir(parents=True, exist_ok=True)
+    embedder = get_embedder(config)
+    version = None
+    if entries is None:
+        # Taken first: rows added while collecting only cause one more rebuild
+        version = corpus_version()
+        entries = collect_corpus()
+
+    matrix_tmp = base.with_suffix('.f32.tmp')
+    with open(matrix_tmp, 'wb') as matrix_file:
+        for entry in entries:
+            row = array('f', embedder.embed(entry['text']))
+            if sys.byteorder != 'little':
+                row.byteswap()
+            row.tofile(matrix_file)
+        matrix_file.flush()
+        os.fsync(matrix_file.fileno())
+
+    meta_tmp = base.with_suffix('.json.tmp')
+    with open(meta_tmp, 'w', encoding='utf-8') as meta_file:
+        json.dump({
+            'embedder': config['EMBEDDER'],
+            'dimensions': embedder.dimensions,
+            'count': len(entries),
+            'built_at': timezone.now().isoformat(),
+            'corpus_version': version,
+            'entries': entries,
+        }, meta_file)
+
+    # Matrix first: a reader only trusts a matrix whose size matches the metadata
+    os.replace(matrix_tmp, base.with_suffix('.f32'))
+    os.replace(meta_tmp, base.with_suffix('.json'))
+    return len(entries)
+
+
+def rebuild_index(path=None):
+    """
+    Rebuild the index if questions or templates changed since it was built.
+    Returns the number of indexed questions, or None when it is up to date.
+    """
+    base = Path(path or index_settings()['PATH'])
+    try:
+        with open(base.with_suffix('.json'), encoding='utf-8') as meta_file:
+            built = json.load(meta_file).get('corpus_version')
+    except (OSError, ValueError):
+        built = None
+    if built is not None and built == corpus_version():
+        return None
+    return build_index(base)
+
+
+def top_rows(scores, n):
+    """Row numbers of the ``n`` highest scores, best first"""
+    n = min(n, len(scores))
+    if n <= 0:
+        return []
+    if np is not None:
+        rows = np.argpartition(-scores, n - 1)[:n]
+        return rows[np.argsort(-scores[rows])].tolist()
+    return heapq.nlargest(n, range(len(scores)), key=scores.__getitem__)
+
+
+class QuestionIndex:
+    """A memory-mapped question matrix plus its metadata"""
+
+    def __init__(self, base, embedder):
+        self.base = Path(base)
+        self.embedder = embedder
+        self.meta_path = self.base.with_suffix('.json')
+        self.matrix_path = self.base.with_suffix('.f32')
+        self.version = self.meta_path.stat().st_mtime_ns
+
+        with open(self.meta_path, encoding='utf-8') as meta_file:
+            meta = json.load(meta_file)
+        self.entries = meta['entries']
+        self.dimensions = meta['dimensions']
+        if self.dimensions != embedder.dimensions:
+            raise ValueError(f'Index has {self.dimensions} dimensions, embedder has {embedder.dimensions}')
+
+        expected = len(self.entries) * self.dimensions * 4
+        if self.matrix_path.stat().st_size != expected:
+            raise ValueError(f'{self.matrix_path} does not match its metadata; rebuild the index')
+
+        self.matrix = None
+        self._mmap = None
+        if not self.entries:
+            return
+        if np is not None:
+            self.matrix = np.memmap(self.matrix_path, dtype='<f4', mode='r', shape=(len(self.entries), self.dimensions))
+        else:
+            with open(self.matrix_path, 'rb') as matrix_file:
+                self._mmap = mmap.mmap(matrix_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.matrix = memoryview(self._mmap).cast('f')
+
+    def __len__(self):
+        return len(self.entries)
+
+    def scores(self, query):
+        """Cosine similarity of ``query`` with every row"""
+        if np is not None:
+            return self.matrix @ np.asarray(query, dtype=np.float32)
+
+        # Hashed queries are sparse: only the populated columns contribute
+        scores = [0.0] * len(self.entries)
+        for column, weight in enumerate(query):
+            if weight:
+                values = self.matrix[column::self.dimensions].tolist()
+                scores = [score + weight * value for score, value in zip(scores, values)]
+        return scores
+
+    def search(self, text, k=10, min_score=0.0, accept=None):
+        """
+        Top ``k`` (score, entry) pairs for ``text``, best first. The matrix
+        yields candidates; when the embedder exposes ``features`` they are
+        re-scored on exact terms so hash collisions cannot rank.
+        """
+        if not self.entries:
+            return []
+        scores = self.scores(self.embedder.embed(text))
+        features = getattr(self.embedder, 'features', None)
+        # Over-fetch when re-ranking or filtering so the final k stay full
+        ranked = top_rows(scores, max(k * 20, 200) if features or accept else k)
+
+        query_terms = Counter(features(text)) if features else None
+        results = []
+        for row in ranked:
+            entry = self.entries[row]
+            score = term_cosine(query_terms, entry['text'], features) if features else float(scores[row])
+            if score >= min_score and (accept is None or accept(entry)):
+                results.append((score, entry))
+        results.sort(key=lambda pair: pair[0], reverse=True)
+        return results[:k]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_question_index():
+    """
+    The process-wide index, re-mapped when a rebuild has replaced the files.
+    Returns None when the index is disabled or has not been built.
+    """
+    global _index
+    config = index_settings()
+    if not config['ENABLED']:
+        return None
+
+    meta_path = Path(config['PATH']).with_suffix('.json')
+    try:
+        version = meta_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    if _index is None or _index.version != version:
+        with _index_lock:
+            if _index is None or _index.version != version:
+                try:
+                    _index = QuestionIndex(config['PATH'], get_embedder(config))
+                except (OSError, ValueError) as exc:
+                    logger.warning('Question index unavailable: %s', exc)
+                    return None
+    return _index
+
+
+def accepts_spec(spec):
+    """Filter for entries that fit the interview's type and difficulty"""
+    if spec.interview_type in QUESTION_TYPES:
+        allowed = {spec.interview_type, 'general'}
+    else:
+        allowed = {'general', 'behavioral'}
+    return lambda entry: entry['type'] in allowed and entry['difficulty'] == spec.difficulty
+
+
+def retrieve_questions(spec):
+    """
+    Split a QuestionSpec into existing questions from the index and the spec
+    for whatever the LLM still has to generate (None when nothing is left).
+    Retrieved questions are marked ``is_ai_generated: False``.
+    """
+    index = get_question_index()
+    if index is None or spec.count <= 0:
+        return [], spec
+
+    config = index_settings()
+    hits = index.search(query_text_for(spec), k=spec.count, min_score=config['MIN_SCORE'], accept=accepts_spec(spec))
+    retrieved = [dict(entry, is_ai_generated=False) for _, entry in hits]
+    remaining = spec.count - len(retrieved)
+    return retrieved, (replace(spec, count=remaining) if remaining > 0 else None)
@@ -1,3 +1,47 @@
-from django.shortcuts import render
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.response import Response
+from .cache import get_cache
+from .models import EvaluationJob
+from .serializers import EvaluationJobSerializer
 
-# Create your views here.
+
+class EvaluationJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Poll the status/result of asynchronous response evaluations
+    GET /api/v1/ai/evaluations/?interview={id}
+    GET /api/v1/ai/evaluations/{id}/
+    """
+    serializer_class = EvaluationJobSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        queryset = EvaluationJob.objects.filter(
+            response__interview__user=self.request.user
+        ).select_related('response__question')
+        
+        interview_id = self.request.query_params.get('interview')
+        if interview_id:
+            queryset = queryset.filter(response__interview_id=interview_id)
+        
+        status_filter = self.request.query_params.get('status')
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        
+        return queryset
+
+
+class AICacheViewSet(viewsets.ViewSet):
+    """
+    Inspect the AI generation/evaluation cache
+    """
+    permission_classes = [IsAdminUser]
+    
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """
+        Hit/miss counters for this process and the size of each tier
+        GET /api/v1/ai/cache/stats/
+        """
+        return Response(get_cache().snapshot())
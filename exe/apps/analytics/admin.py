@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import UserAnalytics, ActivityLog, PerformanceTrend
+from .models import UserAnalytics, ActivityLog, PerformanceTrend, ExamDailyFact
 
 
 @admin.register(UserAnalytics)
@@ -100,3 +100,18 @@ class PerformanceTrendAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at']
     date_hierarchy = 'period_start'
 
+
+@admin.register(ExamDailyFact)
+class ExamDailyFactAdmin(admin.ModelAdmin):
+    list_display = [
+        'exam',
+        'date',
+        'attempts_count',
+        'passed_count',
+        'total_time_minutes',
+        'updated_at',
+    ]
+    list_filter = ['date']
+    search_fields = ['exam__title']
+    readonly_fields = ['created_at', 'updated_at']
+    date_hierarchy = 'date'
@@ -0,0 +1,207 @@
+"""
+Cohort analytics for instructors and recruiters.
+
+Exam cohorts are answered from ExamDailyFact rows, so the cost of a query is
+proportional to the number of days in the window rather than the number of
+candidates. The facts are kept current by rollup_exam_facts_task: Celery
+beat rolls up today every 15 minutes and re-does yesterday once it is
+complete (manage.py rollup_analytics backfills other windows). Ad-hoc user cohorts fall back to a single grouped query over
+exam_attempts that produces the same histogram shape.
+"""
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Count, Sum, Q, IntegerField
+from django.db.models.functions import Floor, Cast, TruncDate, Greatest, Least
+from django.utils import timezone
+from apps.exams.models import ExamAttempt
+from .models import ExamDailyFact
+
+
+BUCKETS = ExamDailyFact.HISTOGRAM_BUCKETS
+DEFAULT_PERCENTILES = (25, 50, 75, 90, 95, 99)
+
+
+def empty_histogram():
+    return [0] * BUCKETS
+
+
+def merge_histograms(histograms):
+    """Sum a sequence of score histograms bucket by bucket"""
+    merged = empty_histogram()
+    for histogram in histograms:
+        for bucket, count in enumerate(histogram[:BUCKETS]):
+            merged[bucket] += count
+    return merged
+
+
+def percentiles_from_histogram(histogram, percentiles=DEFAULT_PERCENTILES):
+    """
+    Return {percentile: score} using the nearest-rank method over the buckets.
+    Runs in O(buckets) regardless of how many attempts the histogram holds.
+    """
+    total = sum(histogram)
+    if total == 0:
+        return {p: None for p in percentiles}
+
+    targets = sorted((max(1, -(-p * total // 100)), p) for p in percentiles)
+    result = {}
+    running = 0
+    index = 0
+    for bucket, count in enumerate(histogram):
+        running += count
+        while index < len(targets) and running >= targets[index][0]:
+            result[targets[index][1]] = bucket
+            index += 1
+        if index == len(targets):
+            break
+    return result
+
+
+def percentage_bucket_expression(field='percentage'):
+    """Clamp a percentage column into an integer histogram bucket in SQL"""
+    return Cast(
+        Least(Greatest(Floor(field), 0), BUCKETS - 1),
+        output_field=IntegerField()
+    )
+
+
+def summarize(attempts, passed, percentage_sum, total_time, histogram):
+    """Shape aggregated cohort numbers into the API response"""
+    return {
+        'attempts': attempts,
+        'passed': passed,
+        'failed': attempts - passed,
+        'pass_rate': round((passed / attempts) * 100, 2) if attempts > 0 else 0,
+        'average_score': round(percentage_sum / attempts, 2) if attempts > 0 else 0,
+        'percentiles': {
+            f'p{p}': value
+            for p, value in percentiles_from_histogram(histogram).items()
+        },
+        'total_time_minutes': total_time,
+        'average_time_minutes': round(total_time / attempts, 2) if attempts > 0 else 0,
+        'score_distribution': [
+            {'range': f'{k}-{min(k + 9, BUCKETS - 1)}', 'count': sum(histogram[k:k + 10])}
+            for k in range(0, BUCKETS, 10)
+        ],
+    }
+
+
+def exam_cohort(exam_id, start_date, end_date):
+    """Cohort statistics for one exam, served entirely from daily facts"""
+    facts = ExamDailyFact.objects.filter(
+        exam_id=exam_id,
+        date__gte=start_date,
+        date__lte=end_date,
+    ).values_list(
+        'attempts_count', 'passed_count', 'percentage_sum',
+        'total_time_minutes', 'score_histogram'
+    )
+
+    attempts = passed = total_time = 0
+    percentage_sum = 0.0
+    histograms = []
+    for fact_attempts, fact_passed, fact_sum, fact_time, histogram in facts:
+        attempts += fact_attempts
+        passed += fact_passed
+        percentage_sum += fact_sum
+        total_time += fact_time
+        histograms.append(histogram)
+
+    return summarize(attempts, passed, percentage_sum, total_time, merge_histograms(histograms))
+
+
+def user_cohort(user_ids, exam_id=None, start_date=None, end_date=None, created_by=None):
+    """
+    Cohort statistics for an explicit set of users.
+    One grouped query returns per-bucket counts and sums; no per-user loops.
+    With ``created_by`` only attempts at exams created by that user count.
+    """
+    attempts = ExamAttempt.objects.filter(user_id__in=user_ids, status='completed')
+    if created_by is not None:
+        attempts = attempts.filter(exam__created_by=created_by)
+    if exam_id:
+        attempts = attempts.filter(exam_id=exam_id)
+    if start_date:
+        attempts = attempts.filter(end_time__date__gte=start_date)
+    if end_date:
+        attempts = attempts.filter(end_time__date__lte=end_date)
+
+    rows = attempts.annotate(
+        bucket=percentage_bucket_expression()
+    ).values('bucket').annotate(
+        count=Count('id'),
+        passed=Count('id', filter=Q(is_passed=True)),
+        percentage_sum=Sum('percentage'),
+        time_sum=Sum('time_taken_minutes'),
+    )
+
+    histogram = empty_histogram()
+    total = passed = total_time = 0
+    percentage_sum = 0.0
+    for row in rows:
+        histogram[row['bucket']] += row['count']
+        total += row['count']
+        passed += row['passed']
+        percentage_sum += row['percentage_sum'] or 0.0
+        total_time += row['time_sum'] or 0
+
+    return summarize(total, passed, percentage_sum, total_time, histogram)
+
+
+def rollup_exam_facts(start_date, end_date):
+    """
+    Rebuild ExamDailyFact rows for every day in the window: the days'
+    existing facts are replaced, so an exam whose attempts were deleted
+    loses its fact rows too. Re-running over the same window is idempotent.
+    Returns the number of fact rows written.
+    """
+    rows = ExamAttempt.objects.filter(
+        status='completed',
+        end_time__date__gte=start_date,
+        end_time__date__lte=end_date,
+    ).annotate(
+        day=TruncDate('end_time'),
+        bucket=percentage_bucket_expression(),
+    ).values('exam_id', 'day', 'bucket').annotate(
+        count=Count('id'),
+        passed=Count('id', filter=Q(is_passed=True)),
+        percentage_sum=Sum('percentage'),
+        time_sum=Sum('time_taken_minutes'),
+    ).order_by()
+
+    facts = {}
+    for row in rows.iterator():
+        key = (row['exam_id'], row['day'])
+        fact = facts.get(key)
+        if fact is None:
+            fact = facts[key] = ExamDailyFact(
+                exam_id=row['exam_id'],
+                date=row['day'],
+                score_histogram=empty_histogram(),
+            )
+        fact.attempts_count += row['count']
+        fact.passed_count += row['passed']
+        fact.percentage_sum += row['percentage_sum'] or 0.0
+        fact.total_time_minutes += row['time_sum'] or 0
+        fact.score_histogram[row['bucket']] += row['count']
+
+    with transaction.atomic():
+        ExamDailyFact.objects.filter(date__gte=start_date, date__lte=end_date).delete()
+        # Upsert rather than insert: a concurrent rollup of the same day may commit first
+        ExamDailyFact.objects.bulk_create(
+            facts.values(),
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['exam', 'date'],
+            update_fields=[
+                'attempts_count', 'passed_count', 'percentage_sum',
+                'total_time_minutes', 'score_histogram', 'updated_at',
+            ],
+        )
+    return len(facts)
+
+
+def default_window(days=30):
+    """Return (start_date, end_date) covering the last ``days`` days"""
+    end_date = timezone.now().date()
+    return end_date - timedelta(days=days - 1), end_date
@@ -0,0 +1,285 @@
+"""
+Buffered ActivityLog ingestion.
+
+log_activity only validates and enqueues an event; events are written with a
+single bulk_create per batch and their streak side effects are applied per
+batch (one UserAnalytics read and one bulk_update per flush).
+
+Backends (settings.ACTIVITY_INGESTION):
+
+* ``memory`` - per-process queue drained by a daemon thread every
+  ACTIVITY_FLUSH_BATCH_SIZE events or ACTIVITY_FLUSH_INTERVAL_MS milliseconds.
+* ``redis``  - events are pushed to a Redis list shared by all web workers and
+  drained by ``manage.py process_activity_queue``. Falls back to ``memory``
+  when Redis is unreachable.
+* ``sync``   - flush on every enqueue (tests and management scripts).
+
+A batch is written in one transaction. If it fails, its events are retried
+one by one so a single bad event cannot take the rest of the batch down;
+events that still fail are requeued and, after ACTIVITY_FLUSH_MAX_ATTEMPTS,
+dead-lettered (the ``analytics:activity_queue:dead`` Redis list, or the
+error log with the full event for the in-process queue).
+"""
+import atexit
+import json
+import logging
+import threading
+from collections import deque
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from exe.redis_client import get_redis
+from apps.users.models import UserProfile
+from .models import ActivityLog, UserAnalytics
+from .streaks import get_zone, record_activity
+
+logger = logging.getLogger(__name__)
+
+REDIS_QUEUE_KEY = 'analytics:activity_queue'
+REDIS_DEAD_LETTER_KEY = 'analytics:activity_queue:dead'
+
+
+def make_event(user_id, activity_type, description='', exam_attempt_id=None,
+               interview_id=None, metadata=None, created_at=None):
+    """Build a JSON-serializable activity event stamped with its arrival time"""
+    return {
+        'user_id': user_id,
+        'activity_type': activity_type,
+        'description': description or '',
+        'exam_attempt_id': exam_attempt_id,
+        'interview_id': interview_id,
+        'metadata': metadata or {},
+        'created_at': (created_at or timezone.now()).isoformat(),
+    }
+
+
+def flush_events(events):
+    """
+    Persist a batch of events and apply their streak updates.
+    Runs a constant number of queries regardless of batch size.
+    """
+    if not events:
+        return 0
+
+    with transaction.atomic():
+        return _write_events(events)
+
+
+def _write_events(events):
+    logs = []
+    for event in events:
+        logs.append(ActivityLog(
+            user_id=event['user_id'],
+            activity_type=event['activity_type'],
+            description=event['description'],
+            exam_attempt_id=event['exam_attempt_id'],
+            interview_id=event['interview_id'],
+            metadata=event['metadata'],
+            created_at=parse_datetime(event['created_at']),
+        ))
+    ActivityLog.objects.bulk_create(logs, batch_size=1000)
+
+    user_ids = {log.user_id for log in logs}
+    zones = {
+        user_id: get_zone(name)
+        for user_id, name in UserProfile.objects.filter(user_id__in=user_ids).values_list('user_id', 'timezone')
+    }
+    UserAnalytics.objects.bulk_create(
+        [UserAnalytics(user_id=user_id) for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+    analytics_by_user = {a.user_id: a for a in UserAnalytics.objects.filter(user_id__in=user_ids)}
+
+    for log in sorted(logs, key=lambda l: l.created_at):
+        record_activity(analytics_by_user[log.user_id], log.created_at, zones.get(log.user_id, get_zone(None)))
+
+    UserAnalytics.objects.bulk_update(
+        list(analytics_by_user.values()),
+        ['activity_days', 'activity_days_start', 'current_streak_days',
+         'longest_streak_days', 'last_activity_date'],
+    )
+    return len(logs)
+
+
+def max_flush_attempts():
+    return getattr(settings, 'ACTIVITY_FLUSH_MAX_ATTEMPTS', 3)
+
+
+def flush_batch(events):
+    """
+    Write a batch, isolating failures: when the batch write fails each event
+    is written on its own. Returns (written count, events that failed).
+    """
+    try:
+        return flush_events(events), []
+    except Exception as exc:
+        if len(events) == 1:
+            logger.warning('Activity event failed to flush: %s', exc)
+            return 0, events
+        logger.warning('Activity batch of %d failed (%s); retrying events one by one', len(events), exc)
+
+    written = 0
+    failed = []
+    for event in events:
+        try:
+            written += flush_events([event])
+        except Exception as exc:
+            logger.warning('Activity event failed to flush: %s', exc)
+            failed.append(event)
+    return written, failed
+
+
+def split_failed(events):
+    """Count a failed attempt on ``events``; returns (to retry, to dead-letter)"""
+    retry, dead = [], []
+    for event in events:
+        event['attempts'] = event.get('attempts', 0) + 1
+        (dead if event['attempts'] >= max_flush_attempts() else retry).append(event)
+    return retry, dead
+
+
+class SyncActivityQueue:
+    """Writes every event immediately (still through the batch code path)"""
+
+    def enqueue(self, event):
+        flush_events([event])
+
+    def flush(self):
+        return 0
+
+
+class MemoryActivityQueue:
+    """In-process queue flushed by a background thread on size or time"""
+
+    def __init__(self, batch_size, interval_ms):
+        self.batch_size = batch_size
+        self.interval = interval_ms / 1000.0
+        self.events = deque()
+        self.condition = threading.Condition()
+        self.flush_lock = threading.Lock()
+        self.thread = None
+
+    def _ensure_thread(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name='activity-flusher', daemon=True)
+            self.thread.start()
+
+    def enqueue(self, event):
+        with self.condition:
+            self.events.append(event)
+            self._ensure_thread()
+            if len(self.events) >= self.batch_size:
+                self.condition.notify()
+
+    def _take(self):
+        with self.condition:
+            batch = [self.events.popleft() for _ in range(min(self.batch_size, len(self.events)))]
+        return batch
+
+    def flush(self):
+        """
+        Drain everything currently queued. Returns the number of events written.
+        Failed events go back on the queue for the next flush.
+        """
+        written = 0
+        with self.flush_lock:
+            while True:
+                batch = self._take()
+                if not batch:
+                    break
+                batch_written, failed = flush_batch(batch)
+                written += batch_written
+                if failed:
+                    retry, dead = split_failed(failed)
+                    for event in dead:
+                        logger.error('Dead-lettered activity event: %s', json.dumps(event))
+                    with self.condition:
+                        self.events.extend(retry)
+                    break  # Retry on the next flush rather than spinning on a failing database
+        return written
+
+    def _run(self):
+        while True:
+            with self.condition:
+                if len(self.events) < self.batch_size:
+                    self.condition.wait(self.interval)
+            if self.events:
+                self.flush()
+                close_old_connections()
+
+
+class RedisActivityQueue:
+    """Redis list shared by all workers; drained by process_activity_queue"""
+
+    def __init__(self, client, batch_size):
+        self.client = client
+        self.batch_size = batch_size
+
+    def enqueue(self, event):
+        self.client.rpush(REDIS_QUEUE_KEY, json.dumps(event))
+
+    def flush(self):
+        written = 0
+        while True:
+            raw = self.client.lpop(REDIS_QUEUE_KEY, self.batch_size)
+            if not raw:
+                break
+            batch_written, failed = flush_batch([json.loads(item) for item in raw])
+            written += batch_written
+            if failed:
+                retry, dead = split_failed(failed)
+                pipe = self.client.pipeline()
+                if retry:
+                    pipe.rpush(REDIS_QUEUE_KEY, *[json.dumps(event) for event in retry])
+                if dead:
+                    logger.error('Dead-lettered %d activity events to %s', len(dead), REDIS_DEAD_LETTER_KEY)
+                    pipe.rpush(REDIS_DEAD_LETTER_KEY, *[json.dumps(event) for event in dead])
+                pipe.execute()
+                break
+        return written
+
+    def requeue_dead(self):
+        """Move dead-lettered events back onto the queue with a fresh attempt count"""
+        moved = 0
+        while True:
+            raw = self.client.lpop(REDIS_DEAD_LETTER_KEY, self.batch_size)
+            if not raw:
+                return moved
+            events = [dict(json.loads(item), attempts=0) for item in raw]
+            self.client.rpush(REDIS_QUEUE_KEY, *[json.dumps(event) for event in events])
+            moved += len(events)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_activity_queue():
+    """Return the process-wide activity queue for settings.ACTIVITY_INGESTION"""
+    global _queue
+    if _queue is not None:
+        return _queue
+
+    with _queue_lock:
+        if _queue is None:
+            backend = getattr(settings, 'ACTIVITY_INGESTION', 'memory')
+            batch_size = getattr(settings, 'ACTIVITY_FLUSH_BATCH_SIZE', 100)
+            interval_ms = getattr(settings, 'ACTIVITY_FLUSH_INTERVAL_MS', 500)
+
+            client = get_redis() if backend == 'redis' else None
+            if backend == 'sync':
+                _queue = SyncActivityQueue()
+            elif client is not None:
+                _queue = RedisActivityQueue(client, batch_size)
+            else:
+                _queue = MemoryActivityQueue(batch_size, interval_ms)
+                atexit.register(_queue.flush)
+    return _queue
+
+
+def enqueue_activity(user_id, activity_type, **fields):
+    """Queue one activity event; returns the event that was queued"""
+    event = make_event(user_id, activity_type, **fields)
+    get_activity_queue().enqueue(event)
+    return event
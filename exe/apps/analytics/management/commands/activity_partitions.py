@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from apps.analytics.partitions import ensure_partitions, apply_retention, is_partitioned, existing_partitions
+
+
+class Command(BaseCommand):
+    help = 'Manage monthly ActivityLog partitions and archive/drop months past the retention window'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['ensure', 'retain', 'list'])
+        parser.add_argument('--months-ahead', type=int, default=3, help='Future monthly partitions to keep ready (ensure)')
+        parser.add_argument('--retention-months', type=int, default=None, help='Override ACTIVITY_LOG_RETENTION_MONTHS (retain)')
+        parser.add_argument('--keep-detached', action='store_true', help='Detach expired partitions without dropping them (retain)')
+
+    def handle(self, *args, **options):
+        action = options['action']
+
+        if action == 'list':
+            if not is_partitioned():
+                self.stdout.write('Activity table is not partitioned on this database')
+                return
+            for name in existing_partitions():
+                self.stdout.write(name)
+            return
+
+        if action == 'ensure':
+            created = ensure_partitions(options['months_ahead'])
+            self.stdout.write(self.style.SUCCESS(f'Created {len(created)} partitions'))
+            for name, moved in created:
+                self.stdout.write(f'- {name}' + (f' ({moved} rows moved from the default partition)' if moved else ''))
+            return
+
+        retention = options['retention_months'] or settings.ACTIVITY_LOG_RETENTION_MONTHS
+        archived = apply_retention(retention, keep_detached=options['keep_detached'])
+        self.stdout.write(self.style.SUCCESS(f'Archived {len(archived)} months older than {retention} months'))
+        for start, path, count in archived:
+            self.stdout.write(f'- {start:%Y-%m}: {count} rows -> {path}')
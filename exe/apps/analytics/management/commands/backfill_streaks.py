@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from apps.analytics.streaks import backfill_streaks
+
+
+class Command(BaseCommand):
+    help = 'Rebuild activity-day bitmaps and streaks from ActivityLog in one pass'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', help='User id to backfill (repeatable). Defaults to all users.')
+
+    def handle(self, *args, **options):
+        updated = backfill_streaks(user_ids=options['user'])
+        self.stdout.write(self.style.SUCCESS(f'Backfilled streaks for {updated} users'))
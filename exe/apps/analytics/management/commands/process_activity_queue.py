@@ -0,0 +1,32 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from apps.analytics.ingestion import get_activity_queue
+
+
+class Command(BaseCommand):
+    help = 'Drain the shared activity queue into ActivityLog in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+        parser.add_argument('--interval-ms', type=int, default=500, help='Sleep between drains when idle')
+        parser.add_argument('--requeue-dead', action='store_true',
+                            help='Move dead-lettered events (Redis backend) back onto the queue and exit')
+
+    def handle(self, *args, **options):
+        queue = get_activity_queue()
+
+        if options['requeue_dead']:
+            if not hasattr(queue, 'requeue_dead'):
+                raise CommandError('Dead letters are only kept by the redis ingestion backend')
+            self.stdout.write(self.style.SUCCESS(f'Requeued {queue.requeue_dead()} activity events'))
+            return
+
+        while True:
+            written = queue.flush()
+            if options['once']:
+                self.stdout.write(self.style.SUCCESS(f'Flushed {written} activity events'))
+                return
+            close_old_connections()
+            if not written:
+                time.sleep(options['interval_ms'] / 1000.0)
@@ -0,0 +1,30 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from apps.analytics.cohorts import rollup_exam_facts
+
+
+class Command(BaseCommand):
+    help = 'Roll up completed exam attempts into per-(exam, day) fact tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First day to roll up (YYYY-MM-DD). Defaults to yesterday.')
+        parser.add_argument('--end', help='Last day to roll up (YYYY-MM-DD). Defaults to today.')
+        parser.add_argument('--days', type=int, default=None, help='Roll up the last N days instead of --start/--end')
+
+    def handle(self, *args, **options):
+        today = timezone.now().date()
+
+        if options['days']:
+            start_date = today - timedelta(days=options['days'] - 1)
+            end_date = today
+        else:
+            start_date = parse_date(options['start']) if options['start'] else today - timedelta(days=1)
+            end_date = parse_date(options['end']) if options['end'] else today
+
+        written = rollup_exam_facts(start_date, end_date)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rolled up {written} exam/day facts for {start_date} to {end_date}'
+        ))
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        ('exams', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamDailyFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('attempts_count', models.IntegerField(default=0)),
+                ('passed_count', models.IntegerField(default=0)),
+                ('percentage_sum', models.FloatField(default=0.0)),
+                ('total_time_minutes', models.IntegerField(default=0)),
+                ('score_histogram', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_facts', to='exams.exam')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['exam', 'date'], name='analytics_e_exam_id_791bda_idx'), models.Index(fields=['date'], name='analytics_e_date_10ec94_idx')],
+                'unique_together': {('exam', 'date')},
+            },
+        ),
+    ]
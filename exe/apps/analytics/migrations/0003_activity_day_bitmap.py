@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_exam_daily_fact'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='useranalytics',
+            name='activity_days',
+            field=models.BinaryField(blank=True, default=bytes),
+        ),
+        migrations.AddField(
+            model_name='useranalytics',
+            name='activity_days_start',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,94 @@
+from datetime import datetime, timezone as dt_timezone
+from django.db import migrations
+
+
+TABLE = 'analytics_activitylog'
+LEGACY = f'{TABLE}_legacy'
+# A fresh sequence: the legacy identity sequence is dropped with the old table
+SEQUENCE = f'{TABLE}_partitioned_id_seq'
+MONTHS_AHEAD = 3
+
+
+def add_months(value, months):
+    index = value.year * 12 + value.month - 1 + months
+    return value.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_activity_log(apps, schema_editor):
+    """
+    Rebuild analytics_activitylog as a table partitioned by month on
+    created_at (PostgreSQL only). The primary key becomes (id, created_at),
+    as PostgreSQL requires the partition key in every unique constraint;
+    Django still addresses rows by id.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE tablename = %s "
+            "AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE contype IN ('p', 'u'))",
+            [TABLE],
+        )
+        index_defs = [row[0] for row in cursor.fetchall()]
+
+        cursor.execute(f'ALTER TABLE {TABLE} RENAME TO {LEGACY}')
+        cursor.execute(f'SELECT MIN(created_at), MAX(id) FROM {LEGACY}')
+        oldest, max_id = cursor.fetchone()
+
+        cursor.execute(f'CREATE SEQUENCE IF NOT EXISTS {SEQUENCE}')
+        cursor.execute('SELECT setval(%s, %s, %s)', [SEQUENCE, max_id or 1, max_id is not None])
+        cursor.execute(f"""
+            CREATE TABLE {TABLE} (
+                id bigint NOT NULL DEFAULT nextval('{SEQUENCE}'),
+                activity_type varchar(50) NOT NULL,
+                description text NOT NULL,
+                exam_attempt_id integer NULL,
+                interview_id integer NULL,
+                metadata jsonb NOT NULL,
+                created_at timestamp with time zone NOT NULL,
+                user_id bigint NOT NULL
+                    REFERENCES users (id) DEFERRABLE INITIALLY DEFERRED,
+                PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at)
+        """)
+        cursor.execute(f'ALTER SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id')
+        cursor.execute(f'CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT')
+
+        now = datetime.now(dt_timezone.utc)
+        start = datetime((oldest or now).year, (oldest or now).month, 1, tzinfo=dt_timezone.utc)
+        last = add_months(datetime(now.year, now.month, 1, tzinfo=dt_timezone.utc), MONTHS_AHEAD)
+        while start <= last:
+            cursor.execute(
+                f'CREATE TABLE {TABLE}_p{start:%Y%m} PARTITION OF {TABLE} '
+                f'FOR VALUES FROM (%s) TO (%s)',
+                [start, add_months(start, 1)],
+            )
+            start = add_months(start, 1)
+
+        cursor.execute(
+            f'INSERT INTO {TABLE} (id, activity_type, description, exam_attempt_id, '
+            f'interview_id, metadata, created_at, user_id) '
+            f'SELECT id, activity_type, description, exam_attempt_id, '
+            f'interview_id, metadata, created_at, user_id FROM {LEGACY}'
+        )
+        cursor.execute(f'DROP TABLE {LEGACY}')
+
+        # The definitions were captured before the rename, so they already
+        # target the new table; recreating them under their original names
+        # keeps later Django index migrations working.
+        for index_def in index_defs:
+            cursor.execute(index_def)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0004_activity_log_event_time'),
+        ('users', '0002_alter_usersession_session_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_activity_log, migrations.RunPython.noop, elidable=False),
+    ]
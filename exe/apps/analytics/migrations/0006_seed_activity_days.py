@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.db import migrations
+
+
+def seed_activity_days(apps, schema_editor):
+    """
+    Rows that predate the bitmap only know their counters. Seed the bitmap
+    with the current run (the days up to last_activity_date) so the first
+    out-of-order event does not rebuild the streaks from a single bit.
+    """
+    UserAnalytics = apps.get_model('analytics', 'UserAnalytics')
+    rows = UserAnalytics.objects.filter(
+        activity_days_start__isnull=True, last_activity_date__isnull=False
+    ).only('id', 'current_streak_days', 'last_activity_date')
+
+    batch = []
+    for analytics in rows.iterator(chunk_size=2000):
+        run = max(analytics.current_streak_days, 1)
+        bits = (1 << run) - 1
+        analytics.activity_days = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+        analytics.activity_days_start = analytics.last_activity_date - timedelta(days=run - 1)
+        batch.append(analytics)
+        if len(batch) >= 2000:
+            UserAnalytics.objects.bulk_update(batch, ['activity_days', 'activity_days_start'])
+            batch = []
+    if batch:
+        UserAnalytics.objects.bulk_update(batch, ['activity_days', 'activity_days_start'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0005_partition_activity_log'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_activity_days, migrations.RunPython.noop),
+    ]
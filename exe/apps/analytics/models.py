@@ -32,6 +32,10 @@ class UserAnalytics(models.Model):
     longest_streak_days = models.IntegerField(default=0)
     last_activity_date = models.DateField(null=True, blank=True)
     
+    # Bitmap of active days in the user's timezone (bit 0 = activity_days_start)
+    activity_days = models.BinaryField(default=bytes, blank=True)
+    activity_days_start = models.DateField(null=True, blank=True)
+    
     # Skill Tracking (JSON field for flexibility)
     skill_scores = models.JSONField(default=dict, blank=True)  # {skill_name: average_score}
     weak_areas = models.JSONField(default=list, blank=True)  # [skill_name, ...]
@@ -85,32 +89,10 @@ class UserAnalytics(models.Model):
             ])
             self.total_interview_time_minutes = int(total_time)
     
-    def update_streak(self):
-        """Update activity streak"""
-        today = timezone.now().date()
-        
-        if self.last_activity_date:
-            days_diff = (today - self.last_activity_date).days
-            
-            if days_diff == 0:
-                # Same day, no change
-                pass
-            elif days_diff == 1:
-                # Consecutive day, increment streak
-                self.current_streak_days += 1
-                if self.current_streak_days > self.longest_streak_days:
-                    self.longest_streak_days = self.current_streak_days
-            else:
-                # Streak broken, reset
-                self.current_streak_days = 1
-        else:
-            # First activity
-            self.current_streak_days = 1
-        
-        self.last_activity_date = today
-        
-        if self.current_streak_days > self.longest_streak_days:
-            self.longest_streak_days = self.current_streak_days
+    def update_streak(self, when=None):
+        """Update activity streak for an activity at ``when`` (default now)"""
+        from .streaks import record_activity
+        record_activity(self, when)
     
     def recalculate_all(self):
         """Recalculate all statistics"""
@@ -142,8 +124,8 @@ class ActivityLog(models.Model):
     # Metadata
     metadata = models.JSONField(default=dict, blank=True)  # Extra data like scores, duration, etc.
     
-    # Timestamp
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Timestamp (set when the event is received, not when the batch is flushed)
+    created_at = models.DateTimeField(default=timezone.now)
     
     class Meta:
         ordering = ['-created_at']
@@ -198,3 +180,39 @@ class PerformanceTrend(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.period_type} ({self.period_start} to {self.period_end})"
 
+
+
+class ExamDailyFact(models.Model):
+    """
+    Pre-aggregated per-(exam, day) facts maintained by the rollup job.
+    Scores are kept as a 101-bucket histogram of whole percentages so cohort
+    percentiles can be merged across days without touching exam_attempts.
+    """
+    HISTOGRAM_BUCKETS = 101
+    
+    exam = models.ForeignKey('exams.Exam', on_delete=models.CASCADE, related_name='daily_facts')
+    date = models.DateField()
+    
+    # Attempt metrics for this day
+    attempts_count = models.IntegerField(default=0)
+    passed_count = models.IntegerField(default=0)
+    percentage_sum = models.FloatField(default=0.0)
+    total_time_minutes = models.IntegerField(default=0)
+    
+    # score_histogram[p] = number of attempts whose percentage rounds down to p
+    score_histogram = models.JSONField(default=list, blank=True)
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-date']
+        unique_together = ['exam', 'date']
+        indexes = [
+            models.Index(fields=['exam', 'date']),
+            models.Index(fields=['date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.exam_id} on {self.date} ({self.attempts_count} attempts)"
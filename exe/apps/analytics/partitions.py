@@ -0,0 +1,225 @@
+"""
+Monthly range partitions, retention and archival for ActivityLog.
+
+On PostgreSQL the activity table is declaratively partitioned by
+``created_at`` (see migration 0005) into ``analytics_activitylog_pYYYYMM``
+tables plus a default partition. ensure_partitions() creates upcoming months
+ahead of time (scheduled daily through Celery beat, see
+settings.CELERY_BEAT_SCHEDULE) and moves rows that landed in the default
+partition into the partition of their month; apply_retention() exports every month older than the retention
+window to a gzipped JSONL archive and only then detaches and drops its
+partition, so hot queries prune down to the recent months.
+
+On other databases there are no partitions; retention archives the same rows
+and deletes them in place.
+"""
+import gzip
+import io
+import json
+import os
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import ActivityLog
+
+
+TABLE = ActivityLog._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+ARCHIVE_FIELDS = [
+    'id', 'user_id', 'activity_type', 'description',
+    'exam_attempt_id', 'interview_id', 'metadata', 'created_at',
+]
+
+
+def is_partitioned():
+    """True when the activity table is a PostgreSQL partitioned table"""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = %s",
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def month_start(value):
+    """First instant (UTC) of the month containing ``value``"""
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(value, months):
+    index = value.year * 12 + value.month - 1 + months
+    return value.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(start):
+    return f'{TABLE}_p{start:%Y%m}'
+
+
+def existing_partitions():
+    """Names of the monthly partitions currently attached"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s AND child.relname <> %s
+            ORDER BY child.relname
+            """,
+            [TABLE, DEFAULT_PARTITION],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def default_partition_months():
+    """Months that have rows in the default partition"""
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC') FROM {qn(DEFAULT_PARTITION)}"
+        )
+        return [row[0].replace(tzinfo=dt_timezone.utc) for row in cursor.fetchall()]
+
+
+def create_partition(start):
+    """
+    Create the partition for the month starting at ``start`` if it is missing.
+
+    PostgreSQL refuses to add a partition while the default partition holds
+    rows of its range, so such rows are moved into the new table before it
+    is attached. The default partition is locked for the duration, so no
+    row of the month can land there in between. Returns the number of rows
+    moved.
+    """
+    end = add_months(start, 1)
+    qn = connection.ops.quote_name
+    name = qn(partition_name(start))
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {qn(DEFAULT_PARTITION)} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(
+            f"SELECT 1 FROM {qn(DEFAULT_PARTITION)} WHERE created_at >= %s AND created_at < %s LIMIT 1",
+            [start, end],
+        )
+        if cursor.fetchone() is None:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {qn(TABLE)} FOR VALUES FROM (%s) TO (%s)",
+                [start, end],
+            )
+            return 0
+
+        cursor.execute(f"CREATE TABLE {name} (LIKE {qn(TABLE)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {qn(DEFAULT_PARTITION)} WHERE created_at >= %s AND created_at < %s "
+            f"RETURNING *) INSERT INTO {name} SELECT * FROM moved",
+            [start, end],
+        )
+        moved = cursor.rowcount
+        # Attaching builds the partition's copies of the parent's indexes
+        cursor.execute(f"ALTER TABLE {qn(TABLE)} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)", [start, end])
+        return moved
+
+
+def ensure_partitions(months_ahead=3, now=None):
+    """
+    Make sure partitions exist for the current month, ``months_ahead`` more
+    and every month with rows in the default partition. Returns a list of
+    (partition name, rows moved out of the default partition).
+    """
+    if not is_partitioned():
+        return []
+    current = month_start(now or timezone.now())
+    months = {add_months(current, offset) for offset in range(months_ahead + 1)}
+    months.update(default_partition_months())
+
+    created = []
+    existing = set(existing_partitions())
+    for start in sorted(months):
+        if partition_name(start) not in existing:
+            moved = create_partition(start)
+            created.append((partition_name(start), moved))
+    return created
+
+
+def archive_path(start):
+    archive_dir = Path(getattr(settings, 'ACTIVITY_ARCHIVE_DIR', settings.BASE_DIR / 'archive' / 'activity'))
+    return archive_dir / f'{partition_name(start)}.jsonl.gz'
+
+
+def export_month(start, chunk_size=5000):
+    """
+    Stream one month of activity rows to a gzipped JSONL file.
+    The file is written under a temporary name and renamed once complete,
+    so a partially written archive is never mistaken for a finished one.
+    Returns (path, row_count).
+    """
+    end = add_months(start, 1)
+    path = archive_path(start)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+
+    rows = ActivityLog.objects.filter(
+        created_at__gte=start, created_at__lt=end
+    ).order_by().values(*ARCHIVE_FIELDS)
+
+    count = 0
+    with open(tmp_path, 'wb') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb') as compressed:
+            with io.TextIOWrapper(compressed, encoding='utf-8') as archive:
+                for row in rows.iterator(chunk_size=chunk_size):
+                    archive.write(json.dumps(row, cls=DjangoJSONEncoder))
+                    archive.write('\n')
+                    count += 1
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(tmp_path, path)
+    return path, count
+
+
+def drop_month(start, keep_detached=False):
+    """Detach (and by default drop) a month's partition, then purge any stragglers"""
+    end = add_months(start, 1)
+    qn = connection.ops.quote_name
+    name = partition_name(start)
+
+    with transaction.atomic():
+        if is_partitioned() and name in existing_partitions():
+            with connection.cursor() as cursor:
+                cursor.execute(f"ALTER TABLE {qn(TABLE)} DETACH PARTITION {qn(name)}")
+                if not keep_detached:
+                    cursor.execute(f"DROP TABLE {qn(name)}")
+        # Rows from this month that landed in the default partition, or all of
+        # them on an unpartitioned table.
+        ActivityLog.objects.filter(created_at__gte=start, created_at__lt=end).delete()
+
+
+def apply_retention(retention_months=None, keep_detached=False, now=None):
+    """
+    Archive and remove every month that ended before the retention window.
+    Returns a list of (month_start, archive_path, row_count).
+    """
+    if retention_months is None:
+        retention_months = getattr(settings, 'ACTIVITY_LOG_RETENTION_MONTHS', 12)
+    cutoff = add_months(month_start(now or timezone.now()), -retention_months)
+
+    months = {
+        month_start(day)
+        for day in ActivityLog.objects.filter(created_at__lt=cutoff).dates('created_at', 'month')
+    }
+    if is_partitioned():
+        for name in existing_partitions():
+            start = datetime.strptime(name.rsplit('_p', 1)[1], '%Y%m').replace(tzinfo=dt_timezone.utc)
+            if start < cutoff:
+                months.add(start)
+
+    archived = []
+    for start in sorted(months):
+        path, count = export_month(start)
+        drop_month(start, keep_detached=keep_detached)
+        archived.append((start, path, count))
+    return archived
@@ -0,0 +1,14 @@
+from rest_framework.permissions import BasePermission
+
+
+class IsInstructorOrRecruiter(BasePermission):
+    """
+    Allows access to teachers, recruiters and admins (cohort-level data)
+    """
+    allowed_user_types = ('teacher', 'recruiter', 'admin')
+    
+    def has_permission(self, request, view):
+        user = request.user
+        if not user or not user.is_authenticated:
+            return False
+        return user.is_staff or user.user_type in self.allowed_user_types
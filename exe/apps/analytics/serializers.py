@@ -132,3 +132,33 @@ class DashboardSummarySerializer(serializers.Serializer):
     
     # Performance trends
     weekly_trends = PerformanceTrendSerializer(many=True)
+
+
+class CohortQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the cohort endpoints
+    """
+    days = serializers.IntegerField(required=False, default=30, min_value=1, max_value=366)
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    exam_id = serializers.IntegerField(required=False, min_value=1)
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, max_length=10000
+    )
+    
+    def validate(self, data):
+        if data.get('start') and data.get('end') and data['start'] > data['end']:
+            raise serializers.ValidationError('start must not be after end')
+        return data
+
+
+class ActivityLogCreateSerializer(serializers.Serializer):
+    """
+    Payload of log_activity, validated before the event is queued so a bad
+    value cannot fail the batch it is flushed with
+    """
+    activity_type = serializers.ChoiceField(choices=ActivityLog.ACTIVITY_TYPES)
+    description = serializers.CharField(required=False, allow_blank=True, default='', max_length=2000)
+    exam_attempt_id = serializers.IntegerField(required=False, allow_null=True, min_value=1, max_value=2 ** 31 - 1)
+    interview_id = serializers.IntegerField(required=False, allow_null=True, min_value=1, max_value=2 ** 31 - 1)
+    metadata = serializers.DictField(required=False, default=dict)
@@ -0,0 +1,194 @@
+"""
+Activity streaks derived from a per-user bitmap of active days.
+
+UserAnalytics.activity_days stores one bit per calendar day (bit 0 is
+UserAnalytics.activity_days_start), with days bucketed in the user's
+UserProfile.timezone rather than server UTC. Recording an activity sets one
+bit and extends the running streak in O(1); the bitmap is only walked when a
+day arrives out of order or when streaks are backfilled from ActivityLog.
+"""
+from datetime import timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from django.utils import timezone
+from apps.users.models import UserProfile
+
+
+def get_zone(name):
+    """ZoneInfo for an IANA name, falling back to UTC for blank/unknown names"""
+    if not name:
+        return dt_timezone.utc
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return dt_timezone.utc
+
+
+def user_zone(user):
+    """The user's configured timezone (UserProfile.timezone)"""
+    try:
+        return get_zone(user.profile.timezone)
+    except UserProfile.DoesNotExist:
+        return dt_timezone.utc
+
+
+def local_date(when, zone):
+    """Calendar date of an aware datetime in ``zone``"""
+    return timezone.localtime(when, zone).date()
+
+
+def to_bits(data):
+    return int.from_bytes(bytes(data or b''), 'little')
+
+
+def to_bytes(bits):
+    return bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+
+
+def longest_run(bits):
+    """Length of the longest run of consecutive set bits"""
+    length = 0
+    while bits:
+        bits &= bits << 1
+        length += 1
+    return length
+
+
+def run_ending_at(bits, index):
+    """Length of the run of set bits ending at (and including) ``index``"""
+    if index < 0:
+        return 0
+    # Invert the bits at or below index; the highest set bit is the last gap.
+    gaps = ~bits & ((1 << (index + 1)) - 1)
+    return index + 1 - gaps.bit_length() if gaps else index + 1
+
+
+def set_day(analytics, day):
+    """
+    Mark ``day`` active on the bitmap. Returns True if it was already set.
+    Grows the bitmap backwards when the day precedes the current start.
+    """
+    bits = to_bits(analytics.activity_days)
+    start = analytics.activity_days_start
+
+    if start is None:
+        start = day
+    elif day < start:
+        bits <<= (start - day).days
+        start = day
+
+    mask = 1 << (day - start).days
+    already_set = bool(bits & mask)
+    bits |= mask
+
+    analytics.activity_days = to_bytes(bits)
+    analytics.activity_days_start = start
+    return already_set
+
+
+def recompute(analytics, keep_longest=False):
+    """
+    Rebuild current/longest streak and last activity date from the bitmap.
+    With ``keep_longest`` the stored longest streak is never lowered; rows
+    seeded before the bitmap existed only hold their current run, while
+    their longest streak may be older.
+    """
+    bits = to_bits(analytics.activity_days)
+    start = analytics.activity_days_start
+    if not bits or start is None:
+        analytics.current_streak_days = 0
+        analytics.longest_streak_days = analytics.longest_streak_days if keep_longest else 0
+        analytics.last_activity_date = None
+        return
+
+    last_index = bits.bit_length() - 1
+    analytics.last_activity_date = start + timedelta(days=last_index)
+    analytics.current_streak_days = run_ending_at(bits, last_index)
+    longest = longest_run(bits)
+    analytics.longest_streak_days = max(longest, analytics.longest_streak_days) if keep_longest else longest
+
+
+def record_activity(analytics, when=None, zone=None):
+    """
+    Record an activity at ``when`` (default now) on ``analytics`` without saving.
+    In-order days update the counters in O(1); an out-of-order day can bridge
+    two runs, so the counters are recomputed from the bitmap in that case.
+    """
+    when = when or timezone.now()
+    zone = zone or user_zone(analytics.user)
+    day = local_date(when, zone)
+    last = analytics.last_activity_date
+
+    if set_day(analytics, day):
+        return
+
+    if last is None or day > last:
+        if last is not None and (day - last).days == 1:
+            analytics.current_streak_days += 1
+        else:
+            analytics.current_streak_days = 1
+        analytics.last_activity_date = day
+        analytics.longest_streak_days = max(analytics.longest_streak_days, analytics.current_streak_days)
+    else:
+        # Setting a bit cannot shorten any run, so the stored longest streak stands
+        recompute(analytics, keep_longest=True)
+
+
+def current_streak(analytics, today=None):
+    """
+    The streak as of ``today`` in the user's timezone: a streak whose last
+    active day is before yesterday has lapsed and reads as 0.
+    """
+    if analytics.last_activity_date is None:
+        return 0
+    today = today or local_date(timezone.now(), user_zone(analytics.user))
+    if (today - analytics.last_activity_date).days > 1:
+        return 0
+    return analytics.current_streak_days
+
+
+def backfill_streaks(user_ids=None, chunk_size=5000):
+    """
+    Rebuild every user's bitmap and streak counters from ActivityLog in a
+    single ordered pass. Longest streaks are never lowered: they may predate
+    the retained ActivityLog partitions. Returns the number of UserAnalytics
+    rows updated.
+    """
+    from .models import ActivityLog, UserAnalytics
+
+    logs = ActivityLog.objects.order_by('user_id', 'created_at')
+    profiles = UserProfile.objects.all()
+    if user_ids is not None:
+        logs = logs.filter(user_id__in=user_ids)
+        profiles = profiles.filter(user_id__in=user_ids)
+
+    zones = {user_id: get_zone(name) for user_id, name in profiles.values_list('user_id', 'timezone')}
+
+    # Rows arrive ordered by (user, created_at), so each user's first local
+    # day is the bitmap start and the bitmap is built as the rows stream past.
+    bitmaps = {}
+    for user_id, created_at in logs.values_list('user_id', 'created_at').iterator(chunk_size=chunk_size):
+        day = local_date(created_at, zones.get(user_id, dt_timezone.utc))
+        start, bits = bitmaps.get(user_id, (day, 0))
+        bitmaps[user_id] = (start, bits | (1 << (day - start).days))
+
+    UserAnalytics.objects.bulk_create(
+        [UserAnalytics(user_id=user_id) for user_id in bitmaps],
+        ignore_conflicts=True,
+    )
+    existing = {a.user_id: a for a in UserAnalytics.objects.filter(user_id__in=bitmaps.keys())}
+
+    updated = []
+    for user_id, (start, bits) in bitmaps.items():
+        analytics = existing[user_id]
+        analytics.activity_days = to_bytes(bits)
+        analytics.activity_days_start = start
+        recompute(analytics, keep_longest=True)
+        updated.append(analytics)
+
+    UserAnalytics.objects.bulk_update(
+        updated,
+        ['activity_days', 'activity_days_start', 'current_streak_days',
+         'longest_streak_days', 'last_activity_date'],
+        batch_size=1000,
+    )
+    return len(updated)
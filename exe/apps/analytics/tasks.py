@@ -0,0 +1,18 @@
+from datetime import timedelta
+from celery import shared_task
+from django.utils import timezone
+from .cohorts import rollup_exam_facts
+from .partitions import ensure_partitions
+
+
+@shared_task
+def ensure_activity_partitions_task(months_ahead=3):
+    """Create upcoming ActivityLog partitions (scheduled in CELERY_BEAT_SCHEDULE)"""
+    return ensure_partitions(months_ahead)
+
+
+@shared_task
+def rollup_exam_facts_task(days_ago=0):
+    """Rebuild the ExamDailyFact rows of one day, ``days_ago`` days before today"""
+    day = timezone.now().date() - timedelta(days=days_ago)
+    return rollup_exam_facts(day, day)
@@ -1,3 +1,313 @@
-from django.test import TestCase
+import importlib
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from zoneinfo import ZoneInfo
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.users.models import User
+from apps.exams.models import Exam, ExamAttempt
+from apps.payments.tests import subscribe
+from . import cohorts, ingestion
+from .ingestion import MemoryActivityQueue, make_event
+from .models import ActivityLog, ExamDailyFact, UserAnalytics
+from .partitions import DEFAULT_PARTITION, ensure_partitions, existing_partitions, is_partitioned
+from .streaks import (
+    current_streak, longest_run, record_activity, recompute, run_ending_at, to_bits, to_bytes,
+)
 
-# Create your tests here.
+UTC = dt_timezone.utc
+
+
+def at(day, hour=12):
+    return datetime(day.year, day.month, day.day, hour, tzinfo=UTC)
+
+
+class StreakBitmapTests(SimpleTestCase):
+    """Streak counters derived from the per-user active-day bitmap"""
+
+    def record(self, analytics, *days):
+        for day in days:
+            record_activity(analytics, when=at(day), zone=UTC)
+
+    def test_bit_helpers(self):
+        bits = 0b1110111
+        self.assertEqual(longest_run(bits), 3)
+        self.assertEqual(run_ending_at(bits, 6), 3)
+        self.assertEqual(run_ending_at(bits, 2), 3)
+        self.assertEqual(run_ending_at(bits, 3), 0)
+        self.assertEqual(to_bits(to_bytes(bits)), bits)
+
+    def test_consecutive_days_extend_the_streak(self):
+        analytics = UserAnalytics()
+        start = date(2025, 1, 1)
+        self.record(analytics, *(start + timedelta(days=i) for i in range(3)))
+        self.assertEqual(analytics.current_streak_days, 3)
+        self.assertEqual(analytics.longest_streak_days, 3)
+        self.assertEqual(analytics.last_activity_date, date(2025, 1, 3))
+
+    def test_gap_resets_current_but_keeps_longest(self):
+        analytics = UserAnalytics()
+        self.record(analytics, date(2025, 1, 1), date(2025, 1, 2), date(2025, 1, 5))
+        self.assertEqual(analytics.current_streak_days, 1)
+        self.assertEqual(analytics.longest_streak_days, 2)
+
+    def test_same_day_is_counted_once(self):
+        analytics = UserAnalytics()
+        self.record(analytics, date(2025, 1, 1), date(2025, 1, 1))
+        self.assertEqual(analytics.current_streak_days, 1)
+        self.assertEqual(to_bits(analytics.activity_days), 1)
+
+    def test_out_of_order_day_bridges_two_runs(self):
+        analytics = UserAnalytics()
+        self.record(analytics, date(2025, 1, 1), date(2025, 1, 2), date(2025, 1, 4), date(2025, 1, 3))
+        self.assertEqual(analytics.current_streak_days, 4)
+        self.assertEqual(analytics.longest_streak_days, 4)
+        self.assertEqual(analytics.last_activity_date, date(2025, 1, 4))
+
+    def test_day_before_bitmap_start_grows_it_backwards(self):
+        analytics = UserAnalytics()
+        self.record(analytics, date(2025, 1, 5), date(2025, 1, 4))
+        self.assertEqual(analytics.activity_days_start, date(2025, 1, 4))
+        self.assertEqual(analytics.current_streak_days, 2)
+
+    def test_days_are_bucketed_in_the_user_timezone(self):
+        analytics = UserAnalytics()
+        zone = ZoneInfo('America/New_York')
+        # 03:00 UTC on Jan 2 is still Jan 1 in New York
+        record_activity(analytics, when=datetime(2025, 1, 2, 3, tzinfo=UTC), zone=zone)
+        record_activity(analytics, when=datetime(2025, 1, 2, 15, tzinfo=UTC), zone=zone)
+        self.assertEqual(analytics.activity_days_start, date(2025, 1, 1))
+        self.assertEqual(analytics.current_streak_days, 2)
+
+    def test_out_of_order_day_keeps_longest_of_seeded_row(self):
+        # Row from before the bitmap: only the current run is on the bitmap
+        analytics = UserAnalytics(
+            current_streak_days=2, longest_streak_days=10, last_activity_date=date(2025, 3, 10),
+            activity_days=to_bytes(0b11), activity_days_start=date(2025, 3, 9),
+        )
+        self.record(analytics, date(2025, 3, 1))
+        self.assertEqual(analytics.longest_streak_days, 10)
+        self.assertEqual(analytics.current_streak_days, 2)
+
+    def test_full_recompute_rebuilds_longest(self):
+        analytics = UserAnalytics(longest_streak_days=10, activity_days=to_bytes(0b101),
+                                  activity_days_start=date(2025, 1, 1))
+        recompute(analytics)
+        self.assertEqual(analytics.longest_streak_days, 1)
+
+    def test_lapsed_streak_reads_as_zero(self):
+        analytics = UserAnalytics(current_streak_days=5, last_activity_date=date(2025, 1, 1))
+        self.assertEqual(current_streak(analytics, today=date(2025, 1, 2)), 5)
+        self.assertEqual(current_streak(analytics, today=date(2025, 1, 3)), 0)
+
+
+class SeedActivityDaysMigrationTests(TestCase):
+
+    def test_existing_counters_are_seeded_onto_the_bitmap(self):
+        user = User.objects.create_user('streaker', 'streaker@example.com', 'pass')
+        UserAnalytics.objects.filter(user=user).delete()
+        analytics = UserAnalytics.objects.create(
+            user=user, current_streak_days=3, longest_streak_days=7, last_activity_date=date(2025, 2, 10),
+        )
+        migration = importlib.import_module('apps.analytics.migrations.0006_seed_activity_days')
+        migration.seed_activity_days(apps, None)
+
+        analytics.refresh_from_db()
+        self.assertEqual(analytics.activity_days_start, date(2025, 2, 8))
+        self.assertEqual(to_bits(analytics.activity_days), 0b111)
+
+        # An out-of-order event right after the migration keeps the counters
+        record_activity(analytics, when=at(date(2025, 2, 1)), zone=UTC)
+        self.assertEqual(analytics.current_streak_days, 3)
+        self.assertEqual(analytics.longest_streak_days, 7)
+
+
+class BackfillStreaksTests(TestCase):
+
+    def test_backfill_rebuilds_the_bitmap_and_keeps_longest(self):
+        user = User.objects.create_user('backfilled', 'backfilled@example.com', 'pass')
+        UserAnalytics.objects.filter(user=user).delete()
+        UserAnalytics.objects.create(user=user, current_streak_days=1, longest_streak_days=10)
+        for day in (date(2025, 3, 1), date(2025, 3, 2), date(2025, 3, 4)):
+            ActivityLog.objects.create(user=user, activity_type='login', created_at=at(day))
+
+        call_command('backfill_streaks', user=[user.id], stdout=StringIO())
+
+        analytics = UserAnalytics.objects.get(user=user)
+        self.assertEqual(analytics.activity_days_start, date(2025, 3, 1))
+        self.assertEqual(to_bits(analytics.activity_days), 0b1011)
+        self.assertEqual(analytics.last_activity_date, date(2025, 3, 4))
+        self.assertEqual((analytics.current_streak_days, analytics.longest_streak_days), (1, 10))
+
+
+@override_settings(ACTIVITY_FLUSH_MAX_ATTEMPTS=2)
+class ActivityQueueFlushTests(TestCase):
+    """A failing event is retried and dead-lettered without losing its batch"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('logger', 'logger@example.com', 'pass')
+        self.queue = MemoryActivityQueue(batch_size=10, interval_ms=60000)
+
+    def test_bad_event_is_isolated_and_requeued(self):
+        good = make_event(self.user.id, 'login')
+        bad = make_event(self.user.id, 'login', exam_attempt_id=2 ** 40)  # Out of the column's range
+        self.queue.events.extend([good, bad, make_event(self.user.id, 'exam_started')])
+
+        with self.assertLogs(ingestion.logger, 'WARNING'):
+            self.assertEqual(self.queue.flush(), 2)
+        self.assertEqual(ActivityLog.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(list(self.queue.events), [bad])
+        self.assertEqual(bad['attempts'], 1)
+
+    def test_event_is_dead_lettered_after_max_attempts(self):
+        bad = make_event(self.user.id, 'login', exam_attempt_id=2 ** 40)
+        self.queue.events.append(bad)
+
+        with self.assertLogs(ingestion.logger, 'ERROR'):
+            self.queue.flush()
+            self.queue.flush()
+        self.assertEqual(len(self.queue.events), 0)
+        self.assertEqual(bad['attempts'], 2)
+
+
+@override_settings(ACTIVITY_INGESTION='sync')
+class LogActivityValidationTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('poster', 'poster@example.com', 'pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        ingestion._queue = None
+
+    def tearDown(self):
+        ingestion._queue = None
+
+    def test_invalid_payload_is_rejected_before_queueing(self):
+        url = '/api/v1/analytics/log_activity/'
+        for payload in (
+            {'activity_type': 'nope'},
+            {'activity_type': 'login', 'exam_attempt_id': 'abc'},
+            {'activity_type': 'login', 'interview_id': 2 ** 40},
+            {'activity_type': 'login', 'metadata': 'not-an-object'},
+        ):
+            response = self.client.post(url, payload, format='json')
+            self.assertEqual(response.status_code, 400, payload)
+        self.assertFalse(ActivityLog.objects.filter(user=self.user).exists())
+
+        response = self.client.post(url, {'activity_type': 'login', 'interview_id': 5}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(ActivityLog.objects.get(user=self.user).interview_id, 5)
+
+
+class EnsurePartitionsTests(TestCase):
+
+    def setUp(self):
+        if not is_partitioned():
+            self.skipTest('ActivityLog is only partitioned on PostgreSQL')
+        self.user = User.objects.create_user('archivist', 'archivist@example.com', 'pass')
+
+    def test_rows_in_the_default_partition_move_to_the_new_partition(self):
+        when = datetime(2040, 5, 17, tzinfo=UTC)
+        log = ActivityLog.objects.create(user=self.user, activity_type='login', created_at=when)
+
+        created = ensure_partitions(months_ahead=0, now=datetime(2040, 5, 1, tzinfo=UTC))
+
+        self.assertEqual(created, [('analytics_activitylog_p204005', 1)])
+        self.assertIn('analytics_activitylog_p204005', existing_partitions())
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {DEFAULT_PARTITION}')
+            self.assertEqual(cursor.fetchone()[0], 0)
+            cursor.execute('SELECT count(*) FROM analytics_activitylog_p204005')
+            self.assertEqual(cursor.fetchone()[0], 1)
+        self.assertTrue(ActivityLog.objects.filter(pk=log.pk, created_at=when).exists())
+        # Running again is a no-op
+        self.assertEqual(ensure_partitions(months_ahead=0, now=datetime(2040, 5, 1, tzinfo=UTC)), [])
+
+
+class PercentileTests(SimpleTestCase):
+
+    def test_nearest_rank_percentiles(self):
+        histogram = cohorts.empty_histogram()
+        for score in (10, 20, 30, 40, 50, 60, 70, 80, 90, 100):
+            histogram[score] += 1
+        self.assertEqual(cohorts.percentiles_from_histogram(histogram, (25, 50, 90, 99)),
+                         {25: 30, 50: 50, 90: 90, 99: 100})
+        self.assertEqual(cohorts.percentiles_from_histogram(cohorts.empty_histogram(), (50,)), {50: None})
+
+    def test_merge_adds_bucket_by_bucket(self):
+        a, b = cohorts.empty_histogram(), cohorts.empty_histogram()
+        a[5], b[5], b[7] = 1, 2, 3
+        merged = cohorts.merge_histograms([a, b])
+        self.assertEqual((merged[5], merged[7], sum(merged)), (3, 3, 6))
+
+
+class CohortEndpointTests(TestCase):
+
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher', 'teacher@example.com', 'pass', user_type='teacher')
+        self.exam = Exam.objects.create(
+            title='SQL', description='', duration_minutes=30, total_marks=10, passing_marks=5, created_by=self.teacher,
+        )
+        self.day = timezone.now().date() - timedelta(days=1)
+        self.students = [User.objects.create_user(f'student{i}', f'student{i}@example.com', 'pass') for i in range(4)]
+        self.attempts = [
+            ExamAttempt.objects.create(
+                user=student, exam=self.exam, status='completed', is_completed=True, percentage=score,
+                is_passed=score >= 50, time_taken_minutes=10, end_time=at(self.day),
+            )
+            for student, score in zip(self.students, (20, 55, 80, 95))
+        ]
+        cohorts.rollup_exam_facts(self.day, self.day)
+
+    def get(self, user, path, **params):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.get(f'/api/v1/cohorts/{path}/', params)
+
+    def test_exam_cohort_is_served_from_the_rolled_up_facts(self):
+        response = self.get(self.teacher, 'exam', exam_id=self.exam.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['attempts'], response.data['passed']), (4, 3))
+        self.assertEqual(response.data['pass_rate'], 75.0)
+        self.assertEqual(response.data['average_score'], 62.5)
+        self.assertEqual(response.data['percentiles']['p50'], 55)
+        self.assertEqual(response.data['average_time_minutes'], 10)
+
+    def test_rollup_replaces_the_days_it_recomputes(self):
+        ExamAttempt.objects.filter(pk__in=[a.pk for a in self.attempts[:2]]).delete()
+        cohorts.rollup_exam_facts(self.day, self.day)
+        self.assertEqual(ExamDailyFact.objects.get(exam=self.exam, date=self.day).attempts_count, 2)
+
+        ExamAttempt.objects.filter(exam=self.exam).delete()
+        self.assertEqual(cohorts.rollup_exam_facts(self.day, self.day), 0)
+        self.assertFalse(ExamDailyFact.objects.filter(exam=self.exam).exists())
+
+    def test_cohorts_are_scoped_to_the_exam_owner(self):
+        other = User.objects.create_user('other', 'other@example.com', 'pass', user_type='recruiter')
+        self.assertEqual(self.get(other, 'exam', exam_id=self.exam.id).status_code, 404)
+        self.assertEqual(self.get(self.students[0], 'exam', exam_id=self.exam.id).status_code, 403)
+
+        user_ids = ','.join(str(student.id) for student in self.students)
+        self.assertEqual(self.get(self.teacher, 'users', user_ids=user_ids).data['attempts'], 4)
+        # Attempts at exams the requester did not create are not counted
+        self.assertEqual(self.get(other, 'users', user_ids=user_ids).data['attempts'], 0)
+
+
+class PerformanceTrendsGateTests(TestCase):
+
+    def test_trends_need_advanced_analytics(self):
+        user = User.objects.create_user('trender', 'trender@example.com', 'pass')
+        client = APIClient()
+        client.force_authenticate(user)
+        url = '/api/v1/analytics/performance_trends/'
+        self.assertEqual(client.get(url).status_code, 403)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            subscribe(user, advanced_analytics=True)
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [])
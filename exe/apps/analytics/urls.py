@@ -1,9 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AnalyticsViewSet
+from .views import AnalyticsViewSet, CohortAnalyticsViewSet
 
 router = DefaultRouter()
 router.register(r'analytics', AnalyticsViewSet, basename='analytics')
+router.register(r'cohorts', CohortAnalyticsViewSet, basename='cohort')
 
 urlpatterns = [
     path('', include(router.urls)),
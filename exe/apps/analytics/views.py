@@ -11,10 +11,17 @@ from .serializers import (
     UserAnalyticsSerializer,
     ActivityLogSerializer,
     PerformanceTrendSerializer,
-    DashboardSummarySerializer
+    DashboardSummarySerializer,
+    CohortQuerySerializer,
+    ActivityLogCreateSerializer
 )
-from apps.exams.models import ExamAttempt
+from .permissions import IsInstructorOrRecruiter
+from . import cohorts
+from .streaks import current_streak
+from .ingestion import enqueue_activity
+from apps.exams.models import Exam, ExamAttempt
 from apps.interview.models import Interview
+from apps.payments.entitlements import FEATURE_ERRORS
 
 
 class AnalyticsViewSet(viewsets.ReadOnlyModelViewSet):
@@ -58,7 +65,7 @@ class AnalyticsViewSet(viewsets.ReadOnlyModelViewSet):
         
         summary_data = {
             'total_activities': analytics.total_exams_taken + analytics.total_interviews_taken,
-            'current_streak': analytics.current_streak_days,
+            'current_streak': current_streak(analytics),
             'longest_streak': analytics.longest_streak_days,
             'total_exams': analytics.total_exams_taken,
             'exams_passed': analytics.total_exams_passed,
@@ -188,8 +195,13 @@ class AnalyticsViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=['get'])
     def performance_trends(self, request):
         """
-        Get performance trends over time
+        Get performance trends over time (advanced analytics plans)
         """
+        if not request.entitlements.advanced_analytics:
+            return Response({
+                'error': FEATURE_ERRORS['advanced_analytics']
+            }, status=status.HTTP_403_FORBIDDEN)
+        
         user = request.user
         period_type = request.query_params.get('period', 'weekly')  # daily, weekly, monthly
         limit = int(request.query_params.get('limit', 10))
@@ -224,29 +236,27 @@ class AnalyticsViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=['post'])
     def log_activity(self, request):
         """
-        Log a new user activity
+        Queue a new user activity. The log row and streak update are written
+        in batches by the ingestion buffer, so this returns 202 immediately.
         """
-        user = request.user
-        activity_type = request.data.get('activity_type')
-        description = request.data.get('description', '')
-        metadata = request.data.get('metadata', {})
+        serializer = ActivityLogCreateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        activity = ActivityLog.objects.create(
-            user=user,
-            activity_type=activity_type,
-            description=description,
-            exam_attempt_id=request.data.get('exam_attempt_id'),
-            interview_id=request.data.get('interview_id'),
-            metadata=metadata
+        data = serializer.validated_data
+        event = enqueue_activity(
+            request.user.id,
+            data['activity_type'],
+            description=data['description'],
+            exam_attempt_id=data.get('exam_attempt_id'),
+            interview_id=data.get('interview_id'),
+            metadata=data['metadata'],
         )
         
-        # Update user analytics streak
-        analytics, _ = UserAnalytics.objects.get_or_create(user=user)
-        analytics.update_streak()
-        analytics.save()
-        
-        serializer = ActivityLogSerializer(activity)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response({
+            'message': 'Activity queued',
+            'activity': event
+        }, status=status.HTTP_202_ACCEPTED)
     
     @action(detail=False, methods=['post'])
     def refresh_analytics(self, request):
@@ -260,3 +270,99 @@ class AnalyticsViewSet(viewsets.ReadOnlyModelViewSet):
         serializer = UserAnalyticsSerializer(analytics)
         return Response(serializer.data)
 
+
+class CohortAnalyticsViewSet(viewsets.ViewSet):
+    """
+    Cohort-level analytics for teachers and recruiters
+    """
+    permission_classes = [IsAuthenticated, IsInstructorOrRecruiter]
+    
+    def _query(self, request, body_fields=()):
+        """Validated query parameters (plus ``body_fields`` of a POST body); 400 if invalid"""
+        params = request.query_params.dict()
+        params.update({
+            field: request.data[field] for field in body_fields
+            if request.data.get(field) is not None
+        })
+        if isinstance(params.get('user_ids'), str):
+            params['user_ids'] = [u for u in params['user_ids'].split(',') if u]
+        serializer = CohortQuerySerializer(data=params)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+    
+    def _date_window(self, query):
+        start_date, end_date = cohorts.default_window(query['days'])
+        return query.get('start', start_date), query.get('end', end_date)
+    
+    def _owner_scope(self, request):
+        """Staff and admins see every exam; others only the exams they created"""
+        user = request.user
+        return None if user.is_staff or user.user_type == 'admin' else user
+    
+    def _can_view_exam(self, request, exam_id):
+        owner = self._owner_scope(request)
+        exams = Exam.objects.filter(id=exam_id)
+        if owner is not None:
+            exams = exams.filter(created_by=owner)
+        return exams.exists()
+    
+    @action(detail=False, methods=['get'])
+    def exam(self, request):
+        """
+        Pass rate, score percentiles and time-on-task for every taker of an exam
+        GET /api/v1/cohorts/exam/?exam_id=1&start=2025-01-01&end=2025-01-31
+        """
+        query = self._query(request)
+        exam_id = query.get('exam_id')
+        if not exam_id:
+            return Response({
+                'error': 'exam_id is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not self._can_view_exam(request, exam_id):
+            return Response({
+                'error': 'Exam not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        start_date, end_date = self._date_window(query)
+        data = cohorts.exam_cohort(exam_id, start_date, end_date)
+        data.update({
+            'exam_id': exam_id,
+            'start': start_date,
+            'end': end_date,
+        })
+        return Response(data)
+    
+    @action(detail=False, methods=['get', 'post'])
+    def users(self, request):
+        """
+        Same statistics for an explicit set of users, optionally for one exam.
+        Only attempts at exams created by the requester are counted.
+        GET  /api/v1/cohorts/users/?user_ids=1,2,3&exam_id=1
+        POST /api/v1/cohorts/users/  Body: {"user_ids": [1, 2, 3], "exam_id": 1}
+        """
+        query = self._query(request, ('user_ids', 'exam_id') if request.method == 'POST' else ())
+        user_ids = query.get('user_ids')
+        exam_id = query.get('exam_id')
+        if not user_ids:
+            return Response({
+                'error': 'user_ids is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if exam_id and not self._can_view_exam(request, exam_id):
+            return Response({
+                'error': 'Exam not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        start_date = query.get('start')
+        end_date = query.get('end')
+        
+        data = cohorts.user_cohort(
+            user_ids, exam_id=exam_id, start_date=start_date, end_date=end_date,
+            created_by=self._owner_scope(request)
+        )
+        data.update({
+            'user_count': len(set(user_ids)),
+            'exam_id': exam_id,
+        })
+        return Response(data)
@@ -0,0 +1,212 @@
+"""
+Per-exam leaderboard and percentile service.
+
+Completed attempts are recorded once, on submission, into a sorted score
+structure so that "you scored better than 83% of takers" never needs a
+COUNT(*) over exam_attempts:
+
+* HistogramLeaderboard keeps a 101-bucket histogram in ExamScoreBucket and
+  answers ranks from at most 101 rows; top-N reads the (exam, status,
+  -percentage) index. It is written in the submit transaction and is the
+  record of truth.
+* RedisLeaderboard mirrors it in a sorted set per exam (ZCOUNT/ZREVRANGE
+  are O(log n)). The ZADD runs after commit and is best-effort: a Redis
+  error is logged, reads fall back to the histogram, and
+  sync_leaderboards() (scheduled in CELERY_BEAT_SCHEDULE) rebuilds every
+  sorted set whose size no longer matches the histogram.
+
+get_leaderboard() picks Redis when REDIS_URL is configured and reachable.
+"""
+import logging
+from django.db import transaction
+from django.db.models import F, Count, IntegerField, Sum
+from django.db.models.functions import Floor, Cast, Greatest, Least
+from exe.redis_client import get_redis
+from .models import ExamAttempt, ExamScoreBucket
+
+logger = logging.getLogger(__name__)
+
+MAX_BUCKET = 100
+
+
+def score_bucket(percentage):
+    """Whole-percent bucket for a percentage, clamped to 0..100"""
+    return min(max(int(percentage or 0), 0), MAX_BUCKET)
+
+
+def _percentile(below, total):
+    return round((below / total) * 100, 1) if total > 0 else 0.0
+
+
+def _top_entries(attempt_ids_with_scores):
+    """Resolve [(attempt_id, percentage), ...] to leaderboard rows in one query"""
+    ids = [attempt_id for attempt_id, _ in attempt_ids_with_scores]
+    attempts = ExamAttempt.objects.filter(id__in=ids).select_related('user').only(
+        'id', 'percentage', 'end_time', 'user__id', 'user__username',
+        'user__first_name', 'user__last_name',
+    )
+    by_id = {attempt.id: attempt for attempt in attempts}
+
+    entries = []
+    for position, (attempt_id, percentage) in enumerate(attempt_ids_with_scores, 1):
+        attempt = by_id.get(attempt_id)
+        if attempt is None:
+            continue
+        entries.append({
+            'rank': position,
+            'attempt_id': attempt_id,
+            'user_id': attempt.user.id,
+            'username': attempt.user.username,
+            'full_name': attempt.user.full_name,
+            'percentage': round(percentage, 2),
+            'completed_at': attempt.end_time,
+        })
+    return entries
+
+
+class HistogramLeaderboard:
+    """Database-backed leaderboard using a per-exam percentage histogram"""
+
+    def record(self, attempt):
+        bucket = score_bucket(attempt.percentage)
+        with transaction.atomic():
+            ExamScoreBucket.objects.bulk_create(
+                [ExamScoreBucket(exam_id=attempt.exam_id, bucket=bucket, count=0)],
+                ignore_conflicts=True,
+            )
+            ExamScoreBucket.objects.filter(
+                exam_id=attempt.exam_id, bucket=bucket
+            ).update(count=F('count') + 1)
+
+    def rank(self, exam_id, percentage):
+        bucket = score_bucket(percentage)
+        below = above = total = 0
+        for b, count in ExamScoreBucket.objects.filter(exam_id=exam_id).values_list('bucket', 'count'):
+            total += count
+            if b < bucket:
+                below += count
+            elif b > bucket:
+                above += count
+        return {
+            'rank': above + 1,
+            'total': total,
+            'percentile': _percentile(below, total),
+        }
+
+    def top(self, exam_id, limit=10):
+        rows = ExamAttempt.objects.filter(
+            exam_id=exam_id, status='completed'
+        ).order_by('-percentage', 'end_time').values_list('id', 'percentage')[:limit]
+        return _top_entries(list(rows))
+
+    def rebuild(self, exam_id):
+        rows = ExamAttempt.objects.filter(exam_id=exam_id, status='completed').annotate(
+            bucket=Cast(Least(Greatest(Floor('percentage'), 0), MAX_BUCKET), output_field=IntegerField())
+        ).values('bucket').annotate(count=Count('id')).order_by()
+
+        with transaction.atomic():
+            ExamScoreBucket.objects.filter(exam_id=exam_id).delete()
+            ExamScoreBucket.objects.bulk_create([
+                ExamScoreBucket(exam_id=exam_id, bucket=row['bucket'], count=row['count'])
+                for row in rows
+            ])
+
+
+class RedisLeaderboard:
+    """
+    Leaderboard kept in one Redis sorted set per exam (member = attempt id),
+    on top of the histogram, which is always written and used whenever
+    Redis fails
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.histogram = HistogramLeaderboard()
+
+    @staticmethod
+    def key(exam_id):
+        return f'exam:{exam_id}:leaderboard'
+
+    def record(self, attempt):
+        self.histogram.record(attempt)
+        exam_id, attempt_id, percentage = attempt.exam_id, attempt.id, attempt.percentage
+
+        def add():
+            try:
+                self.client.zadd(self.key(exam_id), {attempt_id: percentage})
+            except Exception as exc:
+                # The next sync_leaderboards() run rebuilds the set
+                logger.warning('Could not add attempt %s to the Redis leaderboard: %s', attempt_id, exc)
+        transaction.on_commit(add)
+
+    def rank(self, exam_id, percentage):
+        key = self.key(exam_id)
+        try:
+            pipe = self.client.pipeline()
+            pipe.zcount(key, '-inf', f'({percentage}')
+            pipe.zcount(key, f'({percentage}', '+inf')
+            pipe.zcard(key)
+            below, above, total = pipe.execute()
+        except Exception as exc:
+            logger.warning('Redis leaderboard read failed for exam %s: %s', exam_id, exc)
+            return self.histogram.rank(exam_id, percentage)
+        return {
+            'rank': above + 1,
+            'total': total,
+            'percentile': _percentile(below, total),
+        }
+
+    def top(self, exam_id, limit=10):
+        try:
+            rows = self.client.zrevrange(self.key(exam_id), 0, limit - 1, withscores=True)
+        except Exception as exc:
+            logger.warning('Redis leaderboard read failed for exam %s: %s', exam_id, exc)
+            return self.histogram.top(exam_id, limit)
+        return _top_entries([(int(member), score) for member, score in rows])
+
+    def rebuild(self, exam_id):
+        self.histogram.rebuild(exam_id)
+        key = self.key(exam_id)
+        pipe = self.client.pipeline()
+        pipe.delete(key)
+        scores = ExamAttempt.objects.filter(
+            exam_id=exam_id, status='completed'
+        ).values_list('id', 'percentage')
+        for attempt_id, percentage in scores.iterator(chunk_size=5000):
+            pipe.zadd(key, {attempt_id: percentage})
+        pipe.execute()
+
+    def sync(self):
+        """Rebuild the sorted sets whose size differs from the histogram; returns their exam ids"""
+        totals = dict(
+            ExamScoreBucket.objects.values('exam_id').annotate(total=Sum('count')).order_by()
+            .values_list('exam_id', 'total')
+        )
+        if not totals:
+            return []
+        pipe = self.client.pipeline()
+        for exam_id in totals:
+            pipe.zcard(self.key(exam_id))
+        stale = [
+            exam_id for (exam_id, total), size in zip(totals.items(), pipe.execute())
+            if size != total
+        ]
+        for exam_id in stale:
+            self.rebuild(exam_id)
+        return stale
+
+
+def get_leaderboard():
+    """Return the Redis leaderboard if Redis is available, else the histogram one"""
+    client = get_redis()
+    if client is not None:
+        return RedisLeaderboard(client)
+    return HistogramLeaderboard()
+
+
+def sync_leaderboards():
+    """Bring the Redis sorted sets back in line with the histograms; returns rebuilt exam ids"""
+    leaderboard = get_leaderboard()
+    if not isinstance(leaderboard, RedisLeaderboard):
+        return []
+    return leaderboard.sync()
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from apps.exams.models import Exam
+from apps.exams.leaderboard import get_leaderboard
+
+
+class Command(BaseCommand):
+    help = 'Rebuild exam leaderboards (Redis sorted sets or score histograms) from completed attempts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--exam', type=int, action='append', help='Exam id to rebuild (repeatable). Defaults to all exams.')
+
+    def handle(self, *args, **options):
+        exam_ids = options['exam'] or list(Exam.objects.values_list('id', flat=True))
+        leaderboard = get_leaderboard()
+
+        for exam_id in exam_ids:
+            leaderboard.rebuild(exam_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {len(exam_ids)} leaderboards using {type(leaderboard).__name__}'
+        ))
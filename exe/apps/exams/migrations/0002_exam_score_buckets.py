@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:02
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamScoreBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)])),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'exam_score_buckets',
+                'ordering': ['exam', 'bucket'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='examattempt',
+            index=models.Index(fields=['exam', 'status', '-percentage'], name='exam_attemp_exam_id_02fb70_idx'),
+        ),
+        migrations.AddField(
+            model_name='examscorebucket',
+            name='exam',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_buckets', to='exams.exam'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='examscorebucket',
+            unique_together={('exam', 'bucket')},
+        ),
+    ]
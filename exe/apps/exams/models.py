@@ -206,6 +206,7 @@ class ExamAttempt(models.Model):
         indexes = [
             models.Index(fields=['user', 'exam']),
             models.Index(fields=['status']),
+            models.Index(fields=['exam', 'status', '-percentage']),
         ]
     
     def __str__(self):
@@ -274,3 +275,23 @@ class Answer(models.Model):
             self.is_correct = False
             self.marks_awarded = 0
         self.save()
+
+
+class ExamScoreBucket(models.Model):
+    """
+    Histogram of completed attempt percentages per exam (one row per whole
+    percent). The leaderboard record of truth; Redis sorted sets mirror it.
+    """
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='score_buckets')
+    bucket = models.PositiveSmallIntegerField(
+        validators=[MinValueValidator(0), MaxValueValidator(100)]
+    )
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        db_table = 'exam_score_buckets'
+        unique_together = ['exam', 'bucket']
+        ordering = ['exam', 'bucket']
+    
+    def __str__(self):
+        return f"{self.exam_id} @ {self.bucket}%: {self.count}"
@@ -0,0 +1,8 @@
+from celery import shared_task
+from .leaderboard import sync_leaderboards
+
+
+@shared_task
+def sync_leaderboards_task():
+    """Rebuild Redis leaderboards that missed scores (scheduled in CELERY_BEAT_SCHEDULE)"""
+    return sync_leaderboards()
@@ -1,3 +1,166 @@
-from django.test import TestCase
+from collections import defaultdict
+from unittest import mock
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.users.models import User
+from .leaderboard import HistogramLeaderboard, RedisLeaderboard
+from .models import Exam, ExamAttempt, ExamScoreBucket, Question
 
-# Create your tests here.
+
+class FakeRedis:
+    """The sorted-set subset of redis-py used by RedisLeaderboard"""
+
+    def __init__(self):
+        self.sets = defaultdict(dict)
+
+    def zadd(self, key, mapping):
+        self.sets[key].update({str(member): float(score) for member, score in mapping.items()})
+
+    def zcount(self, key, low, high):
+        def bound(value, default):
+            if value in ('-inf', '+inf'):
+                return default, False
+            return float(value.lstrip('(')), value.startswith('(')
+
+        (lo, lo_open), (hi, hi_open) = bound(low, float('-inf')), bound(high, float('inf'))
+        return sum(
+            1 for score in self.sets[key].values()
+            if (score > lo if lo_open else score >= lo) and (score < hi if hi_open else score <= hi)
+        )
+
+    def zcard(self, key):
+        return len(self.sets[key])
+
+    def zrevrange(self, key, start, stop, withscores=False):
+        rows = sorted(self.sets[key].items(), key=lambda item: -item[1])[start:stop + 1]
+        return [(member.encode(), score) for member, score in rows]
+
+    def delete(self, key):
+        self.sets.pop(key, None)
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    def execute(self):
+        return [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+class LeaderboardTestCase(TestCase):
+
+    def setUp(self):
+        self.exam = Exam.objects.create(
+            title='SQL', description='', duration_minutes=30, total_marks=10, passing_marks=5, is_published=True,
+        )
+        self.users = [User.objects.create_user(f'taker{i}', f'taker{i}@example.com', 'pass') for i in range(4)]
+
+    def attempt(self, user, percentage):
+        return ExamAttempt.objects.create(
+            user=user, exam=self.exam, status='completed', is_completed=True, percentage=percentage,
+            end_time=timezone.now(),
+        )
+
+    def record_all(self, leaderboard, scores=(90, 70, 70, 40)):
+        attempts = [self.attempt(user, score) for user, score in zip(self.users, scores)]
+        with self.captureOnCommitCallbacks(execute=True):
+            for attempt in attempts:
+                leaderboard.record(attempt)
+        return attempts
+
+
+class HistogramLeaderboardTests(LeaderboardTestCase):
+
+    def test_rank_percentile_and_top(self):
+        leaderboard = HistogramLeaderboard()
+        attempts = self.record_all(leaderboard)
+
+        self.assertEqual(leaderboard.rank(self.exam.id, 70), {'rank': 2, 'total': 4, 'percentile': 25.0})
+        self.assertEqual(leaderboard.rank(self.exam.id, 90), {'rank': 1, 'total': 4, 'percentile': 75.0})
+        top = leaderboard.top(self.exam.id, 3)
+        self.assertEqual([row['attempt_id'] for row in top], [attempts[0].id, attempts[1].id, attempts[2].id])
+        self.assertEqual([row['rank'] for row in top], [1, 2, 3])
+
+    def test_rebuild_matches_recorded_scores(self):
+        leaderboard = HistogramLeaderboard()
+        self.record_all(leaderboard)
+        before = list(ExamScoreBucket.objects.values_list('bucket', 'count'))
+        leaderboard.rebuild(self.exam.id)
+        self.assertEqual(list(ExamScoreBucket.objects.values_list('bucket', 'count')), before)
+
+
+class RedisLeaderboardTests(LeaderboardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = FakeRedis()
+        self.leaderboard = RedisLeaderboard(self.client)
+        self.key = RedisLeaderboard.key(self.exam.id)
+
+    def test_rank_percentile_and_top(self):
+        attempts = self.record_all(self.leaderboard)
+        self.assertEqual(self.client.zcard(self.key), 4)
+        self.assertEqual(self.leaderboard.rank(self.exam.id, 70), {'rank': 2, 'total': 4, 'percentile': 25.0})
+        self.assertEqual(self.leaderboard.top(self.exam.id, 1)[0]['attempt_id'], attempts[0].id)
+
+    def test_rolled_back_score_never_reaches_redis(self):
+        attempt = self.attempt(self.users[0], 80)
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.leaderboard.record(attempt)
+                    raise RuntimeError('submit failed')
+            except RuntimeError:
+                pass
+        self.assertEqual(self.client.zcard(self.key), 0)
+        self.assertFalse(ExamScoreBucket.objects.filter(exam=self.exam, count__gt=0).exists())
+
+    def test_redis_errors_fall_back_to_the_histogram(self):
+        with mock.patch.object(self.client, 'zadd', side_effect=ConnectionError('down')), \
+                self.assertLogs('apps.exams.leaderboard', 'WARNING'):
+            self.record_all(self.leaderboard)
+        self.assertEqual(self.client.zcard(self.key), 0)
+
+        with mock.patch.object(self.client, 'pipeline', side_effect=ConnectionError('down')), \
+                self.assertLogs('apps.exams.leaderboard', 'WARNING'):
+            self.assertEqual(self.leaderboard.rank(self.exam.id, 70), {'rank': 2, 'total': 4, 'percentile': 25.0})
+
+        # The missed scores are restored from the database by the sync job
+        self.assertEqual(self.leaderboard.sync(), [self.exam.id])
+        self.assertEqual(self.client.zcard(self.key), 4)
+        self.assertEqual(self.leaderboard.sync(), [])
+
+
+@override_settings(NOTIFICATIONS={'DISPATCH_ON_COMMIT': False})
+class SubmitAttemptTests(LeaderboardTestCase):
+
+    def test_redis_failure_does_not_fail_the_submission(self):
+        question = Question.objects.create(
+            exam=self.exam, question_text='Pick A', question_type='mcq', correct_answer=['A'], marks=10,
+        )
+        client = APIClient()
+        client.force_authenticate(self.users[0])
+        attempt = ExamAttempt.objects.create(user=self.users[0], exam=self.exam, total_marks=10)
+
+        redis = FakeRedis()
+        with mock.patch('apps.exams.views.get_leaderboard', return_value=RedisLeaderboard(redis)), \
+                mock.patch.object(redis, 'zadd', side_effect=ConnectionError('down')), \
+                self.assertLogs('apps.exams.leaderboard', 'WARNING'), \
+                self.captureOnCommitCallbacks(execute=True):
+            response = client.post(f'/api/v1/attempts/{attempt.id}/submit/', {
+                'answers': [{'question_id': question.id, 'user_answer': ['A']}],
+            }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(HistogramLeaderboard().rank(self.exam.id, 100)['total'], 1)
+        attempt.refresh_from_db()
+        self.assertEqual((attempt.status, attempt.percentage), ('completed', 100.0))
@@ -4,8 +4,12 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.utils import timezone
+from django.db import transaction
 from datetime import timedelta
+from apps.notifications.events import exam_results_ready
+from apps.payments import metering
 from .models import Exam, Question, ExamAttempt, Answer
+from .leaderboard import get_leaderboard
 from .serializers import (
     ExamListSerializer, ExamDetailSerializer, ExamAttemptSerializer,
     ExamAttemptDetailSerializer, AnswerSerializer, AnswerSubmitSerializer,
@@ -33,7 +37,7 @@ class ExamViewSet(viewsets.ReadOnlyModelViewSet):
             queryset = queryset.filter(difficulty=difficulty)
         
         # Filter premium (if user is not premium)
-        if not self.request.user.is_premium:
+        if not self.request.entitlements.is_premium:
             queryset = queryset.filter(is_premium=False)
         
         return queryset
@@ -65,13 +69,22 @@ class ExamViewSet(viewsets.ReadOnlyModelViewSet):
                 'attempt_id': existing_attempt.id
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Create new attempt
-        attempt = ExamAttempt.objects.create(
-            user=user,
-            exam=exam,
-            status='in_progress',
-            total_marks=sum(q.marks for q in exam.questions.all())
-        )
+        total_marks = sum(q.marks for q in exam.questions.all())
+        
+        # Count the attempt against the plan quota; rolled back with the attempt
+        with transaction.atomic():
+            if not metering.consume(user.id, 'exams'):
+                return Response({
+                    'error': metering.QUOTA_ERRORS['exams']
+                }, status=status.HTTP_403_FORBIDDEN)
+            
+            # Create new attempt
+            attempt = ExamAttempt.objects.create(
+                user=user,
+                exam=exam,
+                status='in_progress',
+                total_marks=total_marks
+            )
         
         serializer = ExamAttemptSerializer(attempt)
         return Response({
@@ -94,6 +107,26 @@ class ExamViewSet(viewsets.ReadOnlyModelViewSet):
         
         serializer = QuestionDetailSerializer(questions, many=True, context={'request': request})
         return Response(serializer.data)
+    
+    @action(detail=True, methods=['get'])
+    def leaderboard(self, request, pk=None):
+        """
+        Get the top completed attempts for an exam
+        GET /api/v1/exams/{id}/leaderboard/?limit=10
+        """
+        exam = self.get_object()
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except (TypeError, ValueError):
+            return Response({
+                'error': 'limit must be an integer'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        limit = min(max(limit, 1), 100)
+        
+        return Response({
+            'exam_id': exam.id,
+            'results': get_leaderboard().top(exam.id, limit),
+        })
 
 
 class ExamAttemptViewSet(viewsets.ModelViewSet):
@@ -183,41 +216,57 @@ class ExamAttemptViewSet(viewsets.ModelViewSet):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        # Process all answers
-        for answer_data in serializer.validated_data['answers']:
-            question_id = answer_data['question_id']
-            user_answer = answer_data['user_answer']
-            time_spent = answer_data.get('time_spent_seconds', 0)
+        leaderboard = get_leaderboard()
+        with transaction.atomic():
+            # Re-read under a row lock so a double submit completes (and is
+            # recorded on the leaderboard) only once
+            attempt = ExamAttempt.objects.select_for_update().get(pk=attempt.pk)
+            if attempt.status != 'in_progress':
+                return Response({
+                    'error': 'This attempt is not in progress'
+                }, status=status.HTTP_400_BAD_REQUEST)
             
-            try:
-                question = attempt.exam.questions.get(id=question_id)
-                answer, created = Answer.objects.update_or_create(
-                    attempt=attempt,
-                    question=question,
-                    defaults={
-                        'user_answer': user_answer,
-                        'time_spent_seconds': time_spent
-                    }
-                )
-                answer.evaluate()
-            except Question.DoesNotExist:
-                continue
-        
-        # Mark attempt as completed
-        attempt.status = 'completed'
-        attempt.is_completed = True
-        attempt.end_time = timezone.now()
-        attempt.time_taken_minutes = int((attempt.end_time - attempt.start_time).total_seconds() / 60)
-        attempt.save()
-        
-        # Calculate final score
-        attempt.calculate_score()
+            # Process all answers
+            for answer_data in serializer.validated_data['answers']:
+                question_id = answer_data['question_id']
+                user_answer = answer_data['user_answer']
+                time_spent = answer_data.get('time_spent_seconds', 0)
+                
+                try:
+                    question = attempt.exam.questions.get(id=question_id)
+                    answer, created = Answer.objects.update_or_create(
+                        attempt=attempt,
+                        question=question,
+                        defaults={
+                            'user_answer': user_answer,
+                            'time_spent_seconds': time_spent
+                        }
+                    )
+                    answer.evaluate()
+                except Question.DoesNotExist:
+                    continue
+            
+            # Mark attempt as completed
+            attempt.status = 'completed'
+            attempt.is_completed = True
+            attempt.end_time = timezone.now()
+            attempt.time_taken_minutes = int((attempt.end_time - attempt.start_time).total_seconds() / 60)
+            attempt.save()
+            
+            # Calculate final score
+            attempt.calculate_score()
+            exam_results_ready(attempt)
+            
+            # Record the score for rank/percentile lookups: the histogram in this
+            # transaction, the Redis copy (if any) best-effort after commit
+            leaderboard.record(attempt)
         
         # Return results
         result_serializer = ExamAttemptDetailSerializer(attempt)
         return Response({
             'message': 'Exam submitted successfully',
-            'result': result_serializer.data
+            'result': result_serializer.data,
+            'standing': leaderboard.rank(attempt.exam_id, attempt.percentage)
         }, status=status.HTTP_200_OK)
     
     @action(detail=True, methods=['get'])
@@ -239,6 +288,27 @@ class ExamAttemptViewSet(viewsets.ModelViewSet):
         serializer = ExamAttemptDetailSerializer(attempt, context={'request': request})
         return Response(serializer.data)
     
+    @action(detail=True, methods=['get'])
+    def percentile(self, request, pk=None):
+        """
+        Get rank and percentile of a completed attempt among all takers
+        GET /api/v1/attempts/{id}/percentile/
+        """
+        attempt = self.get_object()
+        
+        if not attempt.is_completed:
+            return Response({
+                'error': 'Exam is not completed yet'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        standing = get_leaderboard().rank(attempt.exam_id, attempt.percentage)
+        return Response({
+            'attempt_id': attempt.id,
+            'exam_id': attempt.exam_id,
+            'percentage': attempt.percentage,
+            **standing
+        })
+    
     @action(detail=False, methods=['get'])
     def my_attempts(self, request):
         """
@@ -0,0 +1,136 @@
+"""
+Adaptive interviews.
+
+An adaptive interview does not fix its questions up front. When it is created
+a pool of candidate questions is generated for every difficulty and stored on
+Interview.question_pool as {'easy': [...], 'medium': [...], 'hard': [...]}.
+Each call to next_question() then picks the bucket closest to the candidate's
+current ability estimate and takes that bucket's next question.
+
+The ability estimate is an Elo-style rating on the same scale as the
+difficulty levels (easy -1, medium 0, hard 1): after every evaluated response
+it moves towards the observed score in proportion to how surprising the score
+was for a question of that difficulty.
+
+State lives in the database only. Evaluations finish in Celery workers and
+questions may be handed out by any web process, so an in-process copy would
+have to be re-read on every step anyway. next_question() locks the
+interview row, rebuilds the session with one query (load_session: the pool
+cursors from the questions saved so far, the ability by replaying their
+evaluated responses) and saves the picked question: three round trips per
+step, with work linear in the questions asked (bounded by total_questions).
+"""
+import math
+from collections import Counter
+from django.conf import settings
+from apps.ai_engine.providers import QuestionSpec, get_provider, run_sync
+from apps.ai_engine.vector_index import retrieve_questions
+
+DIFFICULTY_LEVELS = {'easy': -1.0, 'medium': 0.0, 'hard': 1.0}
+
+
+def adaptive_settings():
+    defaults = {
+        'POOL_SIZE': None,  # questions per difficulty; defaults to total_questions
+        'LEARNING_RATE': 1.0,
+    }
+    defaults.update(getattr(settings, 'ADAPTIVE_INTERVIEW', {}))
+    return defaults
+
+
+def initial_ability(difficulty):
+    return DIFFICULTY_LEVELS.get(difficulty, 0.0)
+
+
+def build_question_pool(interview):
+    """
+    Candidate questions for every difficulty, reused from the question index
+    first and generated by the AI provider (when the interview uses AI) for
+    whatever the index cannot supply.
+    """
+    size = adaptive_settings()['POOL_SIZE'] or interview.total_questions
+    pool = {}
+    for difficulty in DIFFICULTY_LEVELS:
+        questions, remaining = retrieve_questions(QuestionSpec(
+            job_role=interview.job_role,
+            interview_type=interview.interview_type,
+            difficulty=difficulty,
+            required_skills=interview.required_skills,
+            count=size,
+            job_description=interview.job_description,
+        ))
+        if remaining is not None and interview.use_ai:
+            questions += run_sync(get_provider().generate_questions, remaining)
+        pool[difficulty] = questions
+    return pool
+
+
+class AdaptiveSession:
+    """Running ability estimate and pool cursors of one adaptive interview"""
+
+    def __init__(self, interview_id, pool, ability=0.0, learning_rate=1.0):
+        self.interview_id = interview_id
+        self.pool = pool
+        self.ability = ability
+        self.learning_rate = learning_rate
+        self.cursors = {difficulty: 0 for difficulty in DIFFICULTY_LEVELS}
+        self.asked = 0
+        self.observed = set()
+
+    def observe(self, response_id, difficulty, score):
+        """Fold one evaluated response (score 0-10) into the ability estimate"""
+        if response_id in self.observed:
+            return self.ability
+        self.observed.add(response_id)
+        level = DIFFICULTY_LEVELS.get(difficulty, 0.0)
+        # Logistic expectation of a 0-1 score at this difficulty
+        expected = 1.0 / (1.0 + math.exp(level - self.ability))
+        self.ability += self.learning_rate * (score / 10.0 - expected)
+        return self.ability
+
+    def target_difficulty(self):
+        return min(DIFFICULTY_LEVELS, key=lambda d: abs(DIFFICULTY_LEVELS[d] - self.ability))
+
+    def take(self):
+        """
+        Next (difficulty, question dict) nearest the current ability, or None
+        once every bucket is exhausted
+        """
+        target = DIFFICULTY_LEVELS[self.target_difficulty()]
+        # Nearest non-empty bucket; three buckets, so this is constant time
+        for difficulty in sorted(DIFFICULTY_LEVELS, key=lambda d: abs(DIFFICULTY_LEVELS[d] - target)):
+            cursor = self.cursors[difficulty]
+            if cursor < len(self.pool.get(difficulty, ())):
+                self.cursors[difficulty] = cursor + 1
+                self.asked += 1
+                return difficulty, self.pool[difficulty][cursor]
+        return None
+
+
+def load_session(interview):
+    """
+    Session of ``interview`` rebuilt from the database in one query: every
+    saved question was taken from its difficulty bucket in order, and the
+    evaluated responses are replayed in the order they were evaluated
+    """
+    session = AdaptiveSession(
+        interview.id,
+        interview.question_pool,
+        ability=initial_ability(interview.difficulty),
+        learning_rate=adaptive_settings()['LEARNING_RATE'],
+    )
+    counts = Counter()
+    asked = set()
+    rows = (
+        interview.questions.order_by('responses__updated_at')
+        .values_list('id', 'difficulty', 'responses__id', 'responses__is_evaluated', 'responses__score')
+    )
+    for question_id, difficulty, response_id, is_evaluated, score in rows:
+        if question_id not in asked:
+            asked.add(question_id)
+            counts[difficulty] += 1
+        if is_evaluated:
+            session.observe(response_id, difficulty, score)
+    session.cursors = {difficulty: counts.get(difficulty, 0) for difficulty in DIFFICULTY_LEVELS}
+    session.asked = len(asked)
+    return session
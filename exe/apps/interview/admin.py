@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Interview, InterviewQuestion, InterviewResponse, InterviewTemplate
+from .models import Interview, InterviewQuestion, InterviewResponse, InterviewTemplate, InterviewReminder, MediaUpload
 
 
 class InterviewQuestionInline(admin.TabularInline):
@@ -25,7 +25,7 @@ class InterviewAdmin(admin.ModelAdmin):
     
     fieldsets = (
         ('Basic Information', {
-            'fields': ('user', 'title', 'description', 'interview_type', 'difficulty')
+            'fields': ('user', 'template', 'title', 'description', 'interview_type', 'difficulty')
         }),
         ('Job Details', {
             'fields': ('job_role', 'company_name', 'job_description', 'required_skills')
@@ -64,9 +64,25 @@ class InterviewResponseAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at', 'updated_at']
 
 
+@admin.register(MediaUpload)
+class MediaUploadAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'kind', 'status', 'received_bytes', 'total_size', 'created_at']
+    list_filter = ['kind', 'status', 'created_at']
+    search_fields = ['user__username', 'filename', 'sha256']
+    readonly_fields = ['received_bytes', 'sha256', 'storage_path', 'created_at', 'updated_at', 'completed_at']
+
+
+@admin.register(InterviewReminder)
+class InterviewReminderAdmin(admin.ModelAdmin):
+    list_display = ['interview', 'kind', 'scheduled_for', 'sent_at', 'created_at']
+    list_filter = ['kind', 'sent_at']
+    search_fields = ['key', 'interview__title']
+    readonly_fields = ['key', 'created_at']
+
+
 @admin.register(InterviewTemplate)
 class InterviewTemplateAdmin(admin.ModelAdmin):
-    list_display = ['title', 'interview_type', 'difficulty', 'times_used', 'is_active']
+    list_display = ['title', 'interview_type', 'difficulty', 'times_used', 'completed_count', 'average_score', 'is_active']
     list_filter = ['interview_type', 'difficulty', 'is_active', 'is_premium']
     search_fields = ['title', 'description']
-    readonly_fields = ['times_used', 'average_score', 'created_at', 'updated_at']
+    readonly_fields = ['times_used', 'completed_count', 'average_score', 'created_at', 'updated_at']
@@ -0,0 +1,210 @@
+import logging
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.db import transaction
+from django.utils import timezone
+from apps.ai_engine.evaluators import evaluation_item
+from apps.ai_engine.pipeline import enqueue_evaluation, enqueue_transcription, interview_group, record_streamed_result
+from apps.ai_engine.providers import ProviderUnavailable, QuestionSpec, get_provider
+from apps.ai_engine.vector_index import retrieve_questions
+from .models import Interview, InterviewQuestion, InterviewResponse
+from .serializers import InterviewQuestionSerializer, InterviewResponseCreateSerializer, InterviewResponseSerializer
+
+logger = logging.getLogger(__name__)
+
+
+class InterviewConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Live channel for one interview, streaming AI output token by token
+    ws/interviews/{id}/?token=<access token>
+
+    Client messages:
+        {"action": "generate_questions"}
+        {"action": "submit_response", "question_id": 1, "text_response": "...", "time_taken_seconds": 120}
+
+    Server messages:
+        question.token, question.created, questions.completed
+        response.saved, feedback.token, evaluation.completed
+        error
+    """
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        self.interview_id = self.scope['url_route']['kwargs']['interview_id']
+        if not await self.get_interview():
+            await self.close(code=4404)
+            return
+
+        self.group_name = interview_group(self.interview_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        handlers = {
+            'generate_questions': self.generate_questions,
+            'submit_response': self.submit_response,
+        }
+        handler = handlers.get(content.get('action'))
+        if handler is None:
+            await self.send_error('Unknown action')
+            return
+        try:
+            await handler(content)
+        except Exception:
+            logger.exception('Interview socket action %s failed for interview %s', content.get('action'), self.interview_id)
+            await self.send_error('Internal server error')
+            await self.close(code=1011)
+
+    async def send_error(self, error, **extra):
+        await self.send_json({'type': 'error', 'error': error, **extra})
+
+    async def generate_questions(self, content):
+        """Stream AI questions for an interview created with stream_questions"""
+        interview = await self.get_interview()
+        if not interview.use_ai:
+            await self.send_error('Interview does not use AI questions')
+            return
+        if interview.is_adaptive:
+            await self.send_error('Adaptive interviews hand out questions through next_question')
+            return
+        if await database_sync_to_async(interview.questions.exists)():
+            await self.send_error('Questions have already been generated')
+            return
+
+        spec = QuestionSpec(
+            job_role=interview.job_role,
+            interview_type=interview.interview_type,
+            difficulty=interview.difficulty,
+            required_skills=interview.required_skills,
+            count=interview.total_questions,
+            job_description=interview.job_description,
+        )
+
+        # Questions reused from the local index arrive at once; only the
+        # remainder is streamed from the provider
+        retrieved, remaining = await database_sync_to_async(retrieve_questions)(spec)
+        order = 0
+        for data in retrieved:
+            order += 1
+            question = await self.save_question(interview, order, data)
+            if question is None:
+                await self.send_error('Questions are already being generated')
+                return
+            await self.send_json({'type': 'question.created', 'question': question})
+
+        try:
+            if remaining is not None:
+                async for kind, value in get_provider().stream_questions(remaining):
+                    if kind == 'token':
+                        await self.send_json({'type': 'question.token', 'order': order + 1, 'delta': value})
+                        continue
+                    order += 1
+                    question = await self.save_question(interview, order, value)
+                    if question is None:
+                        await self.send_error('Questions are already being generated')
+                        return
+                    await self.send_json({'type': 'question.created', 'question': question})
+        except ProviderUnavailable:
+            await self.send_error('AI provider unavailable', questions_created=order)
+            return
+
+        await self.send_json({'type': 'questions.completed', 'count': order})
+
+    async def submit_response(self, content):
+        """
+        Save a response and stream its AI feedback. If streaming fails the
+        response is queued for regular asynchronous evaluation instead.
+        """
+        interview = await self.get_interview()
+        if interview.status != 'in_progress':
+            await self.send_error('Interview is not in progress')
+            return
+
+        serializer = InterviewResponseCreateSerializer(data=content)
+        if not serializer.is_valid():
+            await self.send_error('Invalid response', details=serializer.errors)
+            return
+
+        response = await self.save_response(interview, dict(serializer.validated_data))
+        if response is None:
+            await self.send_error('Question not found')
+            return
+
+        transcribing = await database_sync_to_async(enqueue_transcription)(response)
+        await self.send_json({'type': 'response.saved', 'response': await self.serialize_response(response)})
+        # Audio-only answers are evaluated once their transcript is written
+        if transcribing or not interview.use_ai:
+            return
+
+        provider = get_provider()
+        started_at = timezone.now()
+        result = None
+        try:
+            async for kind, value in provider.stream_evaluation(evaluation_item(response.question, response)):
+                if kind == 'token':
+                    await self.send_json({'type': 'feedback.token', 'response_id': response.id, 'delta': value})
+                else:
+                    result = value
+        except ProviderUnavailable:
+            job = await database_sync_to_async(enqueue_evaluation)(response)
+            await self.send_error('Live feedback unavailable, evaluation queued', evaluation_id=job.id)
+            return
+
+        # Broadcasts evaluation.completed to every socket on this interview
+        await database_sync_to_async(record_streamed_result)(
+            response, result, f'{provider.name}:{provider.model}', started_at
+        )
+
+    async def evaluation_completed(self, event):
+        """Group event sent by the evaluation pipeline"""
+        await self.send_json({'type': 'evaluation.completed', 'evaluation': event['evaluation']})
+
+    @database_sync_to_async
+    def get_interview(self):
+        return Interview.objects.filter(id=self.interview_id, user=self.scope['user']).first()
+
+    @database_sync_to_async
+    def save_question(self, interview, order, data):
+        """
+        Save question number ``order``. The interview row is locked while
+        checking that the slot is free, so when two sockets generate at once
+        the second one finds its first question taken and stops (returns None).
+        """
+        with transaction.atomic():
+            Interview.objects.select_for_update().only('id').get(id=interview.id)
+            if interview.questions.filter(order=order).exists():
+                return None
+            question = InterviewQuestion.from_ai(interview, order, data)
+            question.save()
+        return InterviewQuestionSerializer(question).data
+
+    @database_sync_to_async
+    def save_response(self, interview, data):
+        question = interview.questions.filter(id=data.pop('question_id')).first()
+        if question is None:
+            return None
+        response, _ = InterviewResponse.objects.update_or_create(
+            interview=interview,
+            question=question,
+            defaults={
+                **data,
+                'submitted_at': timezone.now(),
+                'is_evaluated': False,
+                'transcription_status': ''
+            }
+        )
+        # Cache the relation so building the evaluation item needs no query
+        response.question = question
+        return response
+
+    @database_sync_to_async
+    def serialize_response(self, response):
+        return InterviewResponseSerializer(response).data
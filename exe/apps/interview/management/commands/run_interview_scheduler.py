@@ -0,0 +1,28 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from apps.interview.scheduler import run_tick, scheduler_settings
+
+
+class Command(BaseCommand):
+    help = 'Send reminders for upcoming interviews and cancel no-shows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run a single tick and exit')
+        parser.add_argument('--interval', type=int, default=None, help='Seconds between ticks')
+
+    def handle(self, *args, **options):
+        interval = options['interval'] or scheduler_settings()['INTERVAL_SECONDS']
+
+        while True:
+            started = time.monotonic()
+            stats = run_tick()
+            if options['once'] or stats['reminders_queued'] or stats['cancelled']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Scanned {stats['scanned']} interviews, queued {stats['reminders_queued']} reminders, "
+                    f"cancelled {stats['cancelled']} no-shows"
+                ))
+            if options['once']:
+                return
+            close_old_connections()
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
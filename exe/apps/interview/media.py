@@ -0,0 +1,162 @@
+"""
+Disk storage for resumable interview media uploads.
+
+Chunks are streamed from the request straight into a ``.part`` file in
+fixed-size blocks, so memory use does not depend on chunk or file size.
+Writers of one upload take turns on an exclusive lock on that file
+(locked_part), so no database lock is held while a slow client sends its
+body. Completed files are hashed (SHA-256) in one streaming pass, renamed
+into place and served back with HTTP range support for playback.
+"""
+import fcntl
+import hashlib
+import os
+import re
+from contextlib import contextmanager
+from pathlib import Path
+from django.conf import settings
+
+BLOCK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class UploadError(Exception):
+    """A chunk that cannot be accepted; carries the HTTP status to return"""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def upload_settings():
+    defaults = {
+        'ROOT': str(Path(settings.MEDIA_ROOT) / 'interview_media'),
+        'MAX_SIZE': 500 * 1024 * 1024,
+        'CHUNK_SIZE': 5 * 1024 * 1024,
+        'MAX_CHUNK_SIZE': 16 * 1024 * 1024,
+        'CONTENT_TYPES': ('audio/', 'video/'),
+    }
+    defaults.update(getattr(settings, 'MEDIA_UPLOAD', {}))
+    return defaults
+
+
+def storage_path_for(upload):
+    extension = Path(upload.filename).suffix.lower()[:10]
+    return f'{upload.user_id}/{upload.id}{extension}'
+
+
+def absolute_path(upload):
+    return Path(upload_settings()['ROOT']) / upload.storage_path
+
+
+def partial_path(upload):
+    path = absolute_path(upload)
+    return path.with_name(path.name + '.part')
+
+
+@contextmanager
+def locked_part(upload):
+    """
+    Open (creating it if needed) the upload's partial file for writing and
+    hold an exclusive lock on it until the block exits
+    """
+    path = partial_path(upload)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT, 0o644), 'r+b') as part:
+        fcntl.flock(part.fileno(), fcntl.LOCK_EX)
+        yield part
+
+
+def append_chunk(part, offset, stream, length):
+    """
+    Copy ``length`` bytes from ``stream`` into the open partial file at
+    ``offset``. Returns the number of bytes written and their SHA-256 hex
+    digest. A short read (client disconnected) keeps what arrived so the
+    client can resume.
+    """
+    digest = hashlib.sha256()
+    written = 0
+    # Drop any tail left by an earlier chunk that was never acknowledged
+    part.truncate(offset)
+    part.seek(offset)
+    while written < length:
+        block = stream.read(min(BLOCK_SIZE, length - written))
+        if not block:
+            break
+        part.write(block)
+        digest.update(block)
+        written += len(block)
+    part.flush()
+    os.fsync(part.fileno())
+    return written, digest.hexdigest()
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def finalize(upload):
+    """
+    Hash the finished partial file and move it into place; returns the hex
+    digest. A file already moved by an attempt that died before recording
+    the result is hashed where it is.
+    """
+    part = partial_path(upload)
+    if part.exists():
+        os.replace(part, absolute_path(upload))
+    return file_sha256(absolute_path(upload))
+
+
+def unlink(path):
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def discard(upload):
+    for path in (partial_path(upload), absolute_path(upload)):
+        unlink(path)
+
+
+def parse_range(header, size):
+    """
+    Parse a single ``Range: bytes=...`` header into (start, end) inclusive.
+    Returns None to serve the whole file (no header or multiple ranges) and
+    raises UploadError(416) for unsatisfiable ranges.
+    """
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if match is None:
+        return None
+
+    first, last = match.groups()
+    if first == '' and last == '':
+        raise UploadError('Invalid range', 416)
+    if first == '':
+        # Suffix range: the final N bytes
+        length = min(int(last), size)
+        start, end = size - length, size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise UploadError('Range not satisfiable', 416)
+    return start, end
+
+
+def iter_file(path, start, length):
+    with open(path, 'rb') as source:
+        source.seek(start)
+        remaining = length
+        while remaining > 0:
+            block = source.read(min(BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interview',
+            name='template',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='interviews', to='interview.interviewtemplate'),
+        ),
+        migrations.AddField(
+            model_name='interviewtemplate',
+            name='completed_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='interviewtemplate',
+            index=models.Index(fields=['is_active', '-times_used'], name='interview_t_is_acti_c46697_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='interviewtemplate',
+            index=models.Index(fields=['is_active', '-average_score'], name='interview_t_is_acti_3ccd57_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview', '0003_media_uploads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interview',
+            name='is_adaptive',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='interview',
+            name='question_pool',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
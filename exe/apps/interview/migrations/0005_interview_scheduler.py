@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview', '0004_adaptive_interviews'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InterviewReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=120, unique=True)),
+                ('kind', models.CharField(choices=[('reminder_24h', '24 Hour Reminder'), ('reminder_1h', '1 Hour Reminder'), ('no_show', 'Cancelled (No-show)')], max_length=20)),
+                ('scheduled_for', models.DateTimeField()),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'interview_reminders',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='interview',
+            index=models.Index(fields=['status', 'scheduled_at'], name='interviews_status_5a43b3_idx'),
+        ),
+        migrations.AddField(
+            model_name='interviewreminder',
+            name='interview',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='interview.interview'),
+        ),
+        migrations.AddIndex(
+            model_name='interviewreminder',
+            index=models.Index(fields=['sent_at', 'created_at'], name='interview_r_sent_at_779b17_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview', '0005_interview_scheduler'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mediaupload',
+            index=models.Index(fields=['status', 'updated_at'], name='interview_m_status_a9c515_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interview', '0006_media_upload_sweep_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interviewresponse',
+            name='transcription_status',
+            field=models.CharField(blank=True, choices=[('', 'Not Needed'), ('pending', 'Pending'), ('completed', 'Completed'), ('failed', 'Failed')], max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='interviewresponse',
+            index=models.Index(fields=['transcription_status', 'updated_at'], name='interview_r_transcr_0258e6_idx'),
+        ),
+    ]
@@ -1,4 +1,8 @@
+import uuid
 from django.db import models
+from django.db.models import Avg, Count, F, FloatField, Q, Sum
+from django.db.models.fields.json import KT
+from django.db.models.functions import Cast
 from django.core.validators import MinValueValidator, MaxValueValidator
 from apps.users.models import User
 
@@ -28,7 +32,11 @@ class Interview(models.Model):
         ('cancelled', 'Cancelled'),
     )
     
+    # Keys of InterviewResponse.evaluation_metrics averaged for overall feedback
+    EVALUATION_METRICS = ('clarity', 'relevance', 'depth', 'technical_accuracy')
+    
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='interviews')
+    template = models.ForeignKey('InterviewTemplate', on_delete=models.SET_NULL, null=True, blank=True, related_name='interviews')
     title = models.CharField(max_length=200)
     description = models.TextField()
     interview_type = models.CharField(max_length=50, choices=INTERVIEW_TYPE_CHOICES)
@@ -47,6 +55,11 @@ class Interview(models.Model):
     enable_video = models.BooleanField(default=False)
     enable_audio = models.BooleanField(default=True)
     
+    # Adaptive mode: questions are drawn one at a time from a pool bucketed
+    # by difficulty, following the candidate's running ability estimate
+    is_adaptive = models.BooleanField(default=False)
+    question_pool = models.JSONField(default=dict, blank=True)  # {'easy': [...], 'medium': [...], 'hard': [...]}
+    
     # Status and timing
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='scheduled')
     scheduled_at = models.DateTimeField(null=True, blank=True)
@@ -75,22 +88,45 @@ class Interview(models.Model):
             models.Index(fields=['user', 'status']),
             models.Index(fields=['interview_type']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['status', 'scheduled_at']),  # Scheduler scans
         ]
     
     def __str__(self):
         return f"{self.title} - {self.user.username}"
     
-    def calculate_score(self):
-        """Calculate total score from all responses"""
-        responses = self.responses.all()
-        if not responses:
-            self.total_score = 0.0
-            self.percentage = 0.0
-        else:
-            total = sum(r.score for r in responses)
-            self.total_score = total
-            self.percentage = (total / self.max_score) * 100 if self.max_score > 0 else 0
-        self.save()
+    def response_stats(self):
+        """
+        Score total, response counts and per-metric averages of
+        evaluation_metrics, computed in a single aggregate query
+        """
+        evaluated = Q(is_evaluated=True)
+        aggregates = {
+            'total_score': Sum('score'),
+            'response_count': Count('id'),
+            'evaluated_count': Count('id', filter=evaluated),
+            'average_score': Avg('score', filter=evaluated),
+        }
+        for metric in self.EVALUATION_METRICS:
+            aggregates[metric] = Avg(Cast(KT(f'evaluation_metrics__{metric}'), FloatField()), filter=evaluated)
+        
+        stats = self.responses.aggregate(**aggregates)
+        metric_averages = {metric: stats.pop(metric) for metric in self.EVALUATION_METRICS}
+        stats['metric_averages'] = {metric: value for metric, value in metric_averages.items() if value is not None}
+        return stats
+    
+    def calculate_score(self, save=True, stats=None):
+        """
+        Calculate total score from all responses; returns response_stats().
+        Pass ``stats`` when they were already computed for this interview.
+        """
+        if stats is None:
+            stats = self.response_stats()
+        total = stats['total_score'] or 0.0
+        self.total_score = total
+        self.percentage = (total / self.max_score) * 100 if self.max_score > 0 else 0
+        if save:
+            self.save()
+        return stats
 
 
 class InterviewQuestion(models.Model):
@@ -132,12 +168,34 @@ class InterviewQuestion(models.Model):
     
     def __str__(self):
         return f"Q{self.order}: {self.question_text[:50]}"
+    
+    @classmethod
+    def from_ai(cls, interview, order, data):
+        """Build (without saving) a question from an AI provider or question index dict"""
+        return cls(
+            interview=interview,
+            question_text=data['text'],
+            question_type=data['type'],
+            difficulty=data['difficulty'],
+            expected_duration_minutes=data.get('expected_duration_minutes', 5),
+            expected_answer=data.get('expected_answer', ''),
+            evaluation_criteria=data.get('evaluation_criteria', []),
+            order=order,
+            is_ai_generated=data.get('is_ai_generated', True)
+        )
 
 
 class InterviewResponse(models.Model):
     """
     User's response to interview questions
     """
+    TRANSCRIPTION_STATUS_CHOICES = (
+        ('', 'Not Needed'),
+        ('pending', 'Pending'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    )
+    
     interview = models.ForeignKey(Interview, on_delete=models.CASCADE, related_name='responses')
     question = models.ForeignKey(InterviewQuestion, on_delete=models.CASCADE, related_name='responses')
     
@@ -146,6 +204,8 @@ class InterviewResponse(models.Model):
     audio_url = models.URLField(max_length=500, blank=True)
     video_url = models.URLField(max_length=500, blank=True)
     code_response = models.TextField(blank=True)  # For coding questions
+    # Set while an audio answer without text waits for speech-to-text
+    transcription_status = models.CharField(max_length=20, choices=TRANSCRIPTION_STATUS_CHOICES, blank=True)
     
     # Timing
     time_taken_seconds = models.IntegerField(default=0)
@@ -169,12 +229,72 @@ class InterviewResponse(models.Model):
         ordering = ['created_at']
         indexes = [
             models.Index(fields=['interview', 'question']),
+            models.Index(fields=['transcription_status', 'updated_at']),  # sweep_transcriptions
         ]
     
     def __str__(self):
         return f"Response to {self.question} - Score: {self.score}"
 
 
+class MediaUpload(models.Model):
+    """
+    Resumable, chunked upload of an audio/video answer.
+    Chunks are appended to a .part file; once all bytes have arrived the
+    file is hashed, renamed and attached to its InterviewResponse.
+    """
+    KIND_CHOICES = (
+        ('audio', 'Audio'),
+        ('video', 'Video'),
+    )
+    
+    STATUS_CHOICES = (
+        ('uploading', 'Uploading'),
+        ('complete', 'Complete'),
+        ('processing', 'Processing'),
+        ('processed', 'Processed'),
+        ('failed', 'Failed'),
+    )
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='media_uploads')
+    response = models.ForeignKey(InterviewResponse, on_delete=models.CASCADE, related_name='media_uploads')
+    
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    
+    # Progress
+    total_size = models.BigIntegerField()
+    received_bytes = models.BigIntegerField(default=0)
+    storage_path = models.CharField(max_length=500)  # Relative to MEDIA_UPLOAD['ROOT']
+    
+    # Integrity
+    expected_sha256 = models.CharField(max_length=64, blank=True)  # Declared by the client
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True)  # Computed on completion
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading')
+    error_message = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'interview_media_uploads'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'status']),
+            models.Index(fields=['status', 'updated_at']),  # sweep_media_uploads
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} upload {self.id} ({self.received_bytes}/{self.total_size})"
+    
+    @property
+    def is_complete(self):
+        return self.received_bytes >= self.total_size
+
+
 class InterviewTemplate(models.Model):
     """
     Reusable interview templates
@@ -188,9 +308,10 @@ class InterviewTemplate(models.Model):
     duration_minutes = models.IntegerField(default=30)
     questions = models.JSONField(default=list)  # List of question templates
     
-    # Usage stats
+    # Usage stats (maintained incrementally; see record_completion)
     times_used = models.IntegerField(default=0)
-    average_score = models.FloatField(default=0.0)
+    completed_count = models.IntegerField(default=0)
+    average_score = models.FloatField(default=0.0)  # Mean percentage of completed interviews
     
     # Flags
     is_active = models.BooleanField(default=True)
@@ -203,6 +324,64 @@ class InterviewTemplate(models.Model):
     class Meta:
         db_table = 'interview_templates'
         ordering = ['-times_used', '-created_at']
+        indexes = [
+            models.Index(fields=['is_active', '-times_used']),
+            models.Index(fields=['is_active', '-average_score']),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.interview_type})"
+    
+    @classmethod
+    def record_completion(cls, template_id, percentage):
+        """
+        Fold one completed interview into the running average with a single
+        UPDATE; both assignments read the pre-update column values.
+        """
+        cls.objects.filter(pk=template_id).update(
+            average_score=(F('average_score') * F('completed_count') + percentage) / (F('completed_count') + 1.0),
+            completed_count=F('completed_count') + 1,
+        )
+    
+    @classmethod
+    def record_rescore(cls, template_id, old_percentage, new_percentage):
+        """Replace one completed interview's percentage in the running average"""
+        cls.objects.filter(pk=template_id, completed_count__gt=0).update(
+            average_score=F('average_score') + (new_percentage - old_percentage) / F('completed_count'),
+        )
+
+
+class InterviewReminder(models.Model):
+    """
+    Ledger of scheduler notifications for interviews.
+    The unique key makes every reminder idempotent: rescanning a window or
+    running two schedulers at once cannot notify a user twice.
+    """
+    KIND_CHOICES = (
+        ('reminder_24h', '24 Hour Reminder'),
+        ('reminder_1h', '1 Hour Reminder'),
+        ('no_show', 'Cancelled (No-show)'),
+    )
+    
+    key = models.CharField(max_length=120, unique=True)  # interview:{id}:{kind}:{scheduled_at}
+    interview = models.ForeignKey(Interview, on_delete=models.CASCADE, related_name='reminders')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    scheduled_for = models.DateTimeField()  # Interview.scheduled_at when the reminder was created
+    
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'interview_reminders'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['sent_at', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} for interview {self.interview_id}"
+    
+    @staticmethod
+    def make_key(interview_id, kind, scheduled_at):
+        # Includes the scheduled time so a rescheduled interview is reminded again
+        return f"interview:{interview_id}:{kind}:{int(scheduled_at.timestamp())}"
@@ -0,0 +1,6 @@
+from django.urls import path
+from .consumers import InterviewConsumer
+
+websocket_urlpatterns = [
+    path('ws/interviews/<int:interview_id>/', InterviewConsumer.as_asgi()),
+]
@@ -0,0 +1,235 @@
+"""
+Scheduled interview dispatcher.
+
+Each tick (``manage.py run_interview_scheduler`` or the
+``interview_scheduler_tick_task`` Celery task) walks scheduled interviews
+through the (status, scheduled_at) index in keyset-paginated batches:
+
+* interviews starting within a reminder lead time get an InterviewReminder
+  row; the windows do not overlap, so an interview booked 30 minutes ahead
+  only gets the 1 hour reminder
+* interviews still 'scheduled' NO_SHOW_GRACE_MINUTES after their start are
+  cancelled with one UPDATE per batch and the user is notified
+
+Reminder rows carry a unique idempotency key and are inserted with
+bulk_create(ignore_conflicts=True), so overlapping scans and concurrent
+schedulers never notify twice. Pending rows are handed to the notification
+outbox in batches by send_interview_reminders_task. Rows whose dispatch was
+lost (broker down, retries exhausted) are picked up from the
+(sent_at, created_at) index by sweep_reminders(), which Celery beat runs
+every few minutes. Reminders for interviews that were started, cancelled or
+rescheduled meanwhile are settled without notifying anyone.
+"""
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from apps.notifications.events import interview_reminders
+from .models import Interview, InterviewReminder
+
+logger = logging.getLogger(__name__)
+
+SUBJECTS = {
+    'reminder_24h': 'Your interview "{title}" is tomorrow',
+    'reminder_1h': 'Your interview "{title}" starts within the hour',
+    'no_show': 'Your interview "{title}" was cancelled',
+}
+
+BODIES = {
+    'reminder_24h': 'Your {kind} interview "{title}" is scheduled for {at:%Y-%m-%d %H:%M} UTC.',
+    'reminder_1h': 'Your {kind} interview "{title}" starts at {at:%H:%M} UTC. Good luck!',
+    'no_show': 'Your {kind} interview "{title}" scheduled for {at:%Y-%m-%d %H:%M} UTC was not started '
+               'and has been cancelled. You can schedule a new one at any time.',
+}
+
+
+def scheduler_settings():
+    defaults = {
+        'REMINDERS': {'reminder_24h': 24 * 60, 'reminder_1h': 60},  # kind -> lead time in minutes
+        'NO_SHOW_GRACE_MINUTES': 30,
+        'BATCH_SIZE': 1000,
+        'SEND_BATCH_SIZE': 200,
+        'INTERVAL_SECONDS': 60,
+    }
+    defaults.update(getattr(settings, 'INTERVIEW_SCHEDULER', {}))
+    return defaults
+
+
+def reminder_windows(now, reminders):
+    """(kind, start, end) windows of scheduled_at, non-overlapping and nearest first"""
+    windows = []
+    start = now
+    for kind, minutes in sorted(reminders.items(), key=lambda item: item[1]):
+        end = now + timedelta(minutes=minutes)
+        windows.append((kind, start, end))
+        start = end
+    return windows
+
+
+def iter_scheduled(start, end, batch_size):
+    """
+    Batches of (id, scheduled_at) for scheduled interviews with
+    start < scheduled_at <= end, keyset-paginated on (scheduled_at, id)
+    """
+    queryset = Interview.objects.filter(status='scheduled', scheduled_at__gt=start, scheduled_at__lte=end)
+    last = None
+    while True:
+        page = queryset
+        if last is not None:
+            page = page.filter(Q(scheduled_at__gt=last[1]) | Q(scheduled_at=last[1], id__gt=last[0]))
+        rows = list(page.order_by('scheduled_at', 'id').values_list('id', 'scheduled_at')[:batch_size])
+        if not rows:
+            return
+        yield rows
+        if len(rows) < batch_size:
+            return
+        last = rows[-1]
+
+
+def record_reminders(rows, kind):
+    """
+    Insert the ledger rows for (interview_id, scheduled_at) pairs, skipping
+    keys that already exist. Returns ids of this batch's unsent reminders.
+    """
+    reminders = [
+        InterviewReminder(
+            key=InterviewReminder.make_key(interview_id, kind, scheduled_at),
+            interview_id=interview_id,
+            kind=kind,
+            scheduled_for=scheduled_at,
+        )
+        for interview_id, scheduled_at in rows
+    ]
+    InterviewReminder.objects.bulk_create(reminders, ignore_conflicts=True)
+    return list(
+        InterviewReminder.objects.filter(key__in=[r.key for r in reminders], sent_at__isnull=True)
+        .values_list('id', flat=True)
+    )
+
+
+def dispatch_reminders(reminder_ids):
+    """Send a batch to a worker; a broker error leaves the rows for the sweep"""
+    from .tasks import send_interview_reminders_task
+
+    try:
+        send_interview_reminders_task.delay(reminder_ids)
+    except Exception as exc:
+        logger.warning('Could not dispatch %d interview reminders, leaving them for the sweep: %s',
+                       len(reminder_ids), exc)
+
+
+def enqueue_reminders(reminder_ids, config):
+    size = config['SEND_BATCH_SIZE']
+    for i in range(0, len(reminder_ids), size):
+        batch = reminder_ids[i:i + size]
+        transaction.on_commit(lambda batch=batch: dispatch_reminders(batch))
+
+
+def cancel_no_shows(now, config):
+    """Cancel interviews never started within the grace period; returns (cancelled, reminder ids)"""
+    cutoff = now - timedelta(minutes=config['NO_SHOW_GRACE_MINUTES'])
+    cancelled = 0
+    reminder_ids = []
+    while True:
+        with transaction.atomic():
+            # Locked rows stay 'scheduled' until the UPDATE; one being started
+            # right now is skipped and looked at again on the next tick
+            rows = list(
+                Interview.objects.select_for_update(skip_locked=True)
+                .filter(status='scheduled', scheduled_at__lte=cutoff)
+                .order_by('scheduled_at', 'id')
+                .values_list('id', 'scheduled_at')[:config['BATCH_SIZE']]
+            )
+            if not rows:
+                break
+            cancelled += Interview.objects.filter(id__in=[row[0] for row in rows], status='scheduled').update(
+                status='cancelled',
+                updated_at=timezone.now(),
+            )
+            reminder_ids += record_reminders(rows, 'no_show')
+        if len(rows) < config['BATCH_SIZE']:
+            break
+    return cancelled, reminder_ids
+
+
+def run_tick(now=None):
+    """One scheduler pass; returns counts of what was done"""
+    config = scheduler_settings()
+    now = now or timezone.now()
+    stats = {'scanned': 0, 'reminders_queued': 0, 'cancelled': 0}
+
+    reminder_ids = []
+    for kind, start, end in reminder_windows(now, config['REMINDERS']):
+        for rows in iter_scheduled(start, end, config['BATCH_SIZE']):
+            stats['scanned'] += len(rows)
+            reminder_ids += record_reminders(rows, kind)
+
+    stats['cancelled'], no_show_ids = cancel_no_shows(now, config)
+    reminder_ids += no_show_ids
+
+    stats['reminders_queued'] = len(reminder_ids)
+    enqueue_reminders(reminder_ids, config)
+    return stats
+
+
+def still_due(reminder, now):
+    """False for reminders overtaken by events: the interview was started, cancelled or moved"""
+    if reminder.kind == 'no_show':
+        return True
+    interview = reminder.interview
+    return (
+        interview.status == 'scheduled'
+        and interview.scheduled_at == reminder.scheduled_for
+        and reminder.scheduled_for > now
+    )
+
+
+def send_reminders(reminder_ids):
+    """
+    Publish the unsent reminders among ``reminder_ids`` to the notification
+    outbox and mark them sent, in one transaction. Rows are claimed with
+    SKIP LOCKED, so a reminder queued by two ticks is published once.
+    Reminders that are no longer due are marked sent without a notification.
+    Returns the number published.
+    """
+    with transaction.atomic():
+        reminders = list(
+            InterviewReminder.objects.select_for_update(skip_locked=True, of=('self',))
+            .select_related('interview')
+            .filter(id__in=reminder_ids, sent_at__isnull=True)
+        )
+        if not reminders:
+            return 0
+
+        now = timezone.now()
+        due = [reminder for reminder in reminders if still_due(reminder, now)]
+        if due:
+            interview_reminders(due, SUBJECTS, BODIES)
+        InterviewReminder.objects.filter(id__in=[r.id for r in reminders]).update(sent_at=now)
+    return len(due)
+
+
+def sweep_reminders(stale_after=timedelta(minutes=5), now=None):
+    """
+    Send unsent reminders created more than ``stale_after`` ago, whose
+    dispatch was lost; returns the number published
+    """
+    config = scheduler_settings()
+    cutoff = (now or timezone.now()) - stale_after
+    queryset = InterviewReminder.objects.filter(sent_at__isnull=True, created_at__lte=cutoff)
+    sent = 0
+    last = None
+    while True:
+        page = queryset
+        if last is not None:
+            page = page.filter(Q(created_at__gt=last[1]) | Q(created_at=last[1], id__gt=last[0]))
+        rows = list(page.order_by('created_at', 'id').values_list('id', 'created_at')[:config['SEND_BATCH_SIZE']])
+        if not rows:
+            break
+        sent += send_reminders([row[0] for row in rows])
+        if len(rows) < config['SEND_BATCH_SIZE']:
+            break
+        last = rows[-1]
+    return sent
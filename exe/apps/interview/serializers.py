@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Interview, InterviewQuestion, InterviewResponse, InterviewTemplate
+from .models import Interview, InterviewQuestion, InterviewResponse, InterviewTemplate, MediaUpload
 from apps.users.serializers import UserSerializer
 
 
@@ -34,7 +34,7 @@ class InterviewResponseSerializer(serializers.ModelSerializer):
         model = InterviewResponse
         fields = [
             'id', 'question', 'text_response', 'audio_url', 'video_url',
-            'code_response', 'time_taken_seconds', 'score', 'ai_feedback',
+            'code_response', 'transcription_status', 'time_taken_seconds', 'score', 'ai_feedback',
             'evaluation_metrics', 'is_evaluated', 'started_at', 'submitted_at'
         ]
 
@@ -75,7 +75,7 @@ class InterviewDetailSerializer(serializers.ModelSerializer):
             'id', 'user', 'title', 'description', 'interview_type', 'difficulty',
             'job_role', 'company_name', 'job_description', 'required_skills',
             'duration_minutes', 'total_questions', 'use_ai', 'enable_video',
-            'enable_audio', 'status', 'scheduled_at', 'started_at', 'completed_at',
+            'enable_audio', 'is_adaptive', 'status', 'scheduled_at', 'started_at', 'completed_at',
             'total_score', 'max_score', 'percentage', 'overall_feedback',
             'strengths', 'weaknesses', 'recommendations', 'questions', 'created_at'
         ]
@@ -90,7 +90,7 @@ class InterviewCreateSerializer(serializers.ModelSerializer):
             'title', 'description', 'interview_type', 'difficulty',
             'job_role', 'company_name', 'job_description', 'required_skills',
             'duration_minutes', 'total_questions', 'use_ai', 'enable_video',
-            'enable_audio', 'scheduled_at'
+            'enable_audio', 'is_adaptive', 'scheduled_at'
         ]
 
 
@@ -116,6 +116,32 @@ class InterviewTemplateSerializer(serializers.ModelSerializer):
         model = InterviewTemplate
         fields = [
             'id', 'title', 'description', 'interview_type', 'difficulty',
-            'duration_minutes', 'questions', 'times_used', 'average_score',
-            'is_premium', 'created_at'
+            'duration_minutes', 'questions', 'times_used', 'completed_count',
+            'average_score', 'is_premium', 'created_at'
         ]
+
+
+class MediaUploadSerializer(serializers.ModelSerializer):
+    """Serializer for media upload progress"""
+    offset = serializers.IntegerField(source='received_bytes', read_only=True)
+    interview_id = serializers.IntegerField(source='response.interview_id', read_only=True)
+    question_id = serializers.IntegerField(source='response.question_id', read_only=True)
+    
+    class Meta:
+        model = MediaUpload
+        fields = [
+            'id', 'interview_id', 'question_id', 'response', 'kind', 'filename',
+            'content_type', 'total_size', 'offset', 'sha256', 'status',
+            'error_message', 'created_at', 'completed_at'
+        ]
+
+
+class MediaUploadCreateSerializer(serializers.Serializer):
+    """Serializer for starting a media upload"""
+    interview_id = serializers.IntegerField()
+    question_id = serializers.IntegerField()
+    kind = serializers.ChoiceField(choices=MediaUpload.KIND_CHOICES)
+    filename = serializers.CharField(max_length=255)
+    content_type = serializers.CharField(max_length=100)
+    total_size = serializers.IntegerField(min_value=1)
+    sha256 = serializers.RegexField(r'^[0-9a-fA-F]{64}$', required=False, allow_blank=True)
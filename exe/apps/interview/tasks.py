@@ -0,0 +1,23 @@
+from celery import shared_task
+from .scheduler import run_tick, send_reminders, sweep_reminders
+
+
+@shared_task
+def interview_scheduler_tick_task():
+    """One scheduler pass, for deployments that run Celery beat"""
+    return run_tick()
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30, acks_late=True)
+def send_interview_reminders_task(self, reminder_ids):
+    """Publish a batch of interview reminders to the notification outbox"""
+    try:
+        return send_reminders(reminder_ids)
+    except Exception as exc:
+        raise self.retry(exc=exc)
+
+
+@shared_task
+def sweep_interview_reminders_task():
+    """Send reminders whose dispatch was lost (scheduled in CELERY_BEAT_SCHEDULE)"""
+    return sweep_reminders()
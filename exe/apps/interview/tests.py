@@ -1,3 +1,699 @@
-from django.test import TestCase
+import hashlib
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.ai_engine.models import EvaluationJob
+from apps.ai_engine.pipeline import sweep_media_uploads
+from apps.notifications.models import NotificationOutbox
+from apps.payments import metering
+from apps.payments.entitlements import FEATURE_ERRORS, PREMIUM_ERROR
+from apps.payments.tests import subscribe
+from apps.users.models import User
+from exe.asgi import application
+from . import media
+from .adaptive import AdaptiveSession, load_session
+from .models import (
+    Interview, InterviewQuestion, InterviewReminder, InterviewResponse, InterviewTemplate, MediaUpload
+)
+from .scheduler import run_tick, send_reminders, sweep_reminders
 
-# Create your tests here.
+
+def pool_question(text):
+    return {'text': text, 'type': 'technical', 'is_ai_generated': False}
+
+
+class ParseRangeTests(SimpleTestCase):
+
+    def test_ranges(self):
+        cases = {
+            None: None,
+            '': None,
+            'bytes=0-99': (0, 99),
+            'bytes=100-': (100, 999),
+            'bytes=900-5000': (900, 999),  # End is clamped to the file
+            'bytes=-100': (900, 999),  # Final 100 bytes
+            'bytes=-5000': (0, 999),
+            'bytes=0-0': (0, 0),
+            'bytes=0-1,5-6': None,  # Multiple ranges: whole file
+            'items=0-10': None,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                self.assertEqual(media.parse_range(header, 1000), expected)
+
+    def test_unsatisfiable_ranges(self):
+        for header in ('bytes=1000-', 'bytes=5-3', 'bytes=-', 'bytes=-0'):
+            with self.subTest(header=header):
+                with self.assertRaises(media.UploadError) as raised:
+                    media.parse_range(header, 1000)
+                self.assertEqual(raised.exception.status_code, 416)
+
+
+class MediaUploadTests(TestCase):
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_UPLOAD={'ROOT': root, 'MAX_CHUNK_SIZE': 1024})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user('uploader', 'uploader@example.com', 'pass')
+        self.interview = Interview.objects.create(
+            user=self.user, title='Upload', description='', interview_type='technical',
+            job_role='Developer', status='in_progress', use_ai=False,
+        )
+        self.question = InterviewQuestion.objects.create(
+            interview=self.interview, question_text='Tell us about yourself', question_type='general',
+            difficulty='easy', order=1,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.data = bytes(range(256)) * 4
+
+    def start(self, **fields):
+        body = {
+            'interview_id': self.interview.id,
+            'question_id': self.question.id,
+            'kind': 'audio',
+            'filename': 'answer.webm',
+            'content_type': 'audio/webm',
+            'total_size': len(self.data),
+            **fields,
+        }
+        response = self.client.post('/api/v1/uploads/', body, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def send(self, upload_id, offset, chunk, **headers):
+        return self.client.generic(
+            'PATCH', f'/api/v1/uploads/{upload_id}/', chunk,
+            content_type='application/offset+octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset), **headers,
+        )
+
+    def test_offset_mismatch_returns_the_resume_offset(self):
+        upload_id = self.start()
+        self.assertEqual(self.send(upload_id, 0, self.data[:400]).status_code, 200)
+
+        response = self.send(upload_id, 0, self.data[:400])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Upload-Offset'], '400')
+
+        response = self.send(upload_id, 400, self.data[400:])
+        self.assertEqual(response.status_code, 200)
+        upload = MediaUpload.objects.get(id=upload_id)
+        self.assertEqual(upload.status, 'complete')
+        self.assertEqual(upload.sha256, hashlib.sha256(self.data).hexdigest())
+        self.assertEqual(media.absolute_path(upload).read_bytes(), self.data)
+
+    def test_chunk_with_wrong_checksum_is_not_acknowledged(self):
+        upload_id = self.start()
+        response = self.send(upload_id, 0, self.data[:512], HTTP_UPLOAD_CHECKSUM=f'sha256 {"0" * 64}')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(MediaUpload.objects.get(id=upload_id).received_bytes, 0)
+
+        checksum = hashlib.sha256(self.data[:512]).hexdigest()
+        response = self.send(upload_id, 0, self.data[:512], HTTP_UPLOAD_CHECKSUM=f'sha256 {checksum}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Upload-Offset'], '512')
+
+    def test_chunk_limits(self):
+        upload_id = self.start()
+        self.assertEqual(self.send(upload_id, 0, self.data + b'x').status_code, 413)  # Over MAX_CHUNK_SIZE
+        self.assertEqual(self.send(upload_id, 'abc', b'x').status_code, 400)
+        self.send(upload_id, 0, self.data[:1000])
+        self.assertEqual(self.send(upload_id, 1000, b'x' * 30).status_code, 400)  # Past total_size
+
+    def test_content_honours_range_requests(self):
+        upload_id = self.start()
+        self.send(upload_id, 0, self.data)
+        url = f'/api/v1/uploads/{upload_id}/content/'
+
+        response = self.client.get(url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.data)}')
+        self.assertEqual(b''.join(response.streaming_content), self.data[10:20])
+
+        response = self.client.get(url, HTTP_RANGE=f'bytes={len(self.data)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.data)}')
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.data)
+
+    def test_completion_interrupted_before_the_status_is_recorded_can_be_retried(self):
+        upload_id = self.start()
+        with mock.patch('apps.interview.views.MediaUploadViewSet._complete'):
+            self.assertEqual(self.send(upload_id, 0, self.data).status_code, 200)
+        upload = MediaUpload.objects.get(id=upload_id)
+        self.assertEqual((upload.status, upload.received_bytes), ('uploading', len(self.data)))
+
+        self.assertEqual(self.send(upload_id, 0, self.data).status_code, 409)
+        response = self.send(upload_id, len(self.data), b'')
+        self.assertEqual(response.status_code, 200)
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, 'complete')
+        self.assertEqual(upload.sha256, hashlib.sha256(self.data).hexdigest())
+
+    def test_uploads_whose_dispatch_failed_or_worker_died_are_swept(self):
+        upload_id = self.start()
+        with mock.patch('apps.ai_engine.tasks.process_media_upload_task.delay', side_effect=OSError('no broker')), \
+                self.assertLogs('apps.ai_engine.pipeline', 'WARNING'), \
+                self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.send(upload_id, 0, self.data).status_code, 200)
+        self.assertEqual(MediaUpload.objects.get(id=upload_id).status, 'complete')
+
+        stuck = MediaUpload.objects.create(
+            user=self.user, response=MediaUpload.objects.get(id=upload_id).response, kind='audio',
+            filename='old.webm', content_type='audio/webm', total_size=1, received_bytes=1, status='processing',
+        )
+        self.assertEqual(sweep_media_uploads(), [])
+        MediaUpload.objects.filter(id=upload_id).update(updated_at=timezone.now() - timedelta(minutes=10))
+        MediaUpload.objects.filter(id=stuck.id).update(updated_at=timezone.now() - timedelta(hours=1))
+
+        with mock.patch('apps.ai_engine.tasks.process_media_upload_task.delay') as delay:
+            self.assertEqual(set(map(str, sweep_media_uploads())), {upload_id, str(stuck.id)})
+        self.assertEqual({call.args[0] for call in delay.call_args_list}, {upload_id, str(stuck.id)})
+        self.assertEqual(MediaUpload.objects.get(id=stuck.id).status, 'complete')
+        self.assertEqual(sweep_media_uploads(), [])
+
+
+@override_settings(NOTIFICATIONS={'DISPATCH_ON_COMMIT': False})
+class ScoringTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('scored', 'scored@example.com', 'pass')
+        self.interview = Interview.objects.create(
+            user=self.user, title='Scored', description='', interview_type='technical', job_role='Developer',
+            status='in_progress', use_ai=True, max_score=20,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def answer(self, order, **fields):
+        question = InterviewQuestion.objects.create(
+            interview=self.interview, question_text=f'Question {order}', question_type='technical',
+            difficulty='easy', order=order,
+        )
+        return InterviewResponse.objects.create(interview=self.interview, question=question, **fields)
+
+    def test_interview_without_evaluated_responses(self):
+        self.assertEqual(self.interview.response_stats(), {
+            'total_score': None, 'response_count': 0, 'evaluated_count': 0, 'average_score': None,
+            'metric_averages': {},
+        })
+        self.answer(1, text_response='Not evaluated yet')
+        stats = self.interview.calculate_score(save=False)
+        self.assertEqual((stats['response_count'], stats['evaluated_count'], stats['average_score']), (1, 0, None))
+        self.assertEqual((self.interview.total_score, self.interview.percentage), (0.0, 0.0))
+
+    def test_stats_only_average_evaluated_responses(self):
+        self.answer(1, score=8, is_evaluated=True, evaluation_metrics={'clarity': 8, 'depth': 6})
+        self.answer(2, score=6, is_evaluated=True, evaluation_metrics={'clarity': 6})
+        self.answer(3, text_response='Pending')
+
+        stats = self.interview.calculate_score()
+        self.assertEqual((stats['total_score'], stats['response_count'], stats['evaluated_count']), (14, 3, 2))
+        self.assertEqual(stats['average_score'], 7)
+        self.assertEqual(stats['metric_averages'], {'clarity': 7, 'depth': 6})
+        self.interview.refresh_from_db()
+        self.assertEqual((self.interview.total_score, self.interview.percentage), (14, 70))
+
+    def test_complete_aggregates_the_responses_once(self):
+        self.answer(1, score=9, is_evaluated=True, evaluation_metrics={'clarity': 9})
+        with mock.patch.object(Interview, 'response_stats', autospec=True, side_effect=Interview.response_stats) as stats:
+            response = self.client.post(f'/api/v1/interviews/{self.interview.id}/complete/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(stats.call_count, 1)
+        self.interview.refresh_from_db()
+        self.assertEqual((self.interview.status, self.interview.percentage), ('completed', 45))
+        self.assertTrue(self.interview.overall_feedback)
+
+
+class AdaptiveSessionTests(SimpleTestCase):
+
+    def setUp(self):
+        self.pool = {level: [pool_question(f'{level} {i}') for i in range(2)] for level in ('easy', 'medium', 'hard')}
+
+    def test_takes_the_bucket_nearest_the_ability(self):
+        session = AdaptiveSession(1, self.pool, ability=0.9)
+        self.assertEqual(session.take()[0], 'hard')
+        self.assertEqual(session.take()[0], 'hard')
+        # Hard bucket exhausted: the nearest non-empty one is next
+        self.assertEqual(session.take()[0], 'medium')
+        self.assertEqual(session.asked, 3)
+
+    def test_observing_a_response_twice_counts_once(self):
+        session = AdaptiveSession(1, self.pool)
+        ability = session.observe(7, 'medium', 10)
+        self.assertGreater(ability, 0)
+        self.assertEqual(session.observe(7, 'medium', 10), ability)
+        self.assertLess(session.observe(8, 'medium', 0), ability)
+
+
+class AdaptiveInterviewTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('adaptive', 'adaptive@example.com', 'pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        pool = {level: [pool_question(f'{level} {i}') for i in range(3)] for level in ('easy', 'medium', 'hard')}
+        self.interview = Interview.objects.create(
+            user=self.user, title='Adaptive', description='', interview_type='technical', job_role='Developer',
+            status='in_progress', use_ai=False, is_adaptive=True, total_questions=3, question_pool=pool,
+        )
+
+    def next_question(self):
+        return self.client.post(f'/api/v1/interviews/{self.interview.id}/next_question/')
+
+    def test_questions_are_handed_out_once(self):
+        texts = [self.next_question().data['question']['question_text'] for _ in range(3)]
+        self.assertEqual(len(set(texts)), 3)
+        self.assertEqual(self.next_question().status_code, 400)
+        self.assertEqual(list(self.interview.questions.values_list('order', flat=True)), [1, 2, 3])
+
+    def test_questions_saved_elsewhere_are_not_handed_out_again(self):
+        InterviewQuestion.from_ai(self.interview, 1, dict(self.interview.question_pool['medium'][0],
+                                                          difficulty='medium')).save()
+
+        response = self.next_question()
+        self.assertEqual(response.data['questions_asked'], 2)
+        self.assertNotEqual(response.data['question']['question_text'], 'medium 0')
+
+    @override_settings(ADAPTIVE_INTERVIEW={'LEARNING_RATE': 2.0})
+    def test_session_is_rebuilt_in_one_query(self):
+        first = self.next_question().data['question']
+        self.assertEqual(first['difficulty'], 'medium')
+        # Evaluated by a worker process: the next step sees it without any shared state
+        InterviewResponse.objects.create(
+            interview=self.interview, question_id=first['id'], score=10, is_evaluated=True,
+        )
+
+        with self.assertNumQueries(1):
+            session = load_session(self.interview)
+        self.assertEqual((session.asked, session.cursors['medium']), (1, 1))
+        self.assertEqual(session.ability, 1.0)
+        self.assertEqual(self.next_question().data['question']['difficulty'], 'hard')
+
+    def test_adaptive_interview_needs_a_question_pool(self):
+        body = {
+            'title': 'Empty', 'description': '', 'interview_type': 'technical', 'job_role': 'Developer',
+            'is_adaptive': True, 'use_ai': False,
+        }
+        with mock.patch('apps.interview.views.build_question_pool', return_value={'easy': [], 'medium': [], 'hard': []}):
+            response = self.client.post('/api/v1/interviews/', body, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Interview.objects.filter(title='Empty').exists())
+
+
+class NoShowTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('absent', 'absent@example.com', 'pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def interview(self, title, status, minutes_ago):
+        return Interview.objects.create(
+            user=self.user, title=title, description='', interview_type='technical', job_role='Developer',
+            status=status, use_ai=False, scheduled_at=timezone.now() - timedelta(minutes=minutes_ago),
+        )
+
+    def test_only_cancelled_interviews_get_a_no_show_reminder(self):
+        missed = self.interview('Missed', 'scheduled', 120)
+        started = self.interview('Started', 'in_progress', 120)
+        upcoming = self.interview('Upcoming', 'scheduled', 5)
+
+        with mock.patch('apps.interview.scheduler.enqueue_reminders'):
+            stats = run_tick()
+        self.assertEqual(stats['cancelled'], 1)
+        self.assertEqual(
+            list(InterviewReminder.objects.filter(kind='no_show').values_list('interview_id', flat=True)), [missed.id]
+        )
+        for interview, expected in ((missed, 'cancelled'), (started, 'in_progress'), (upcoming, 'scheduled')):
+            interview.refresh_from_db()
+            self.assertEqual(interview.status, expected)
+
+    def test_cancelled_interview_cannot_be_started(self):
+        interview = self.interview('Late', 'scheduled', 120)
+        with mock.patch('apps.interview.scheduler.enqueue_reminders'):
+            run_tick()
+        response = self.client.post(f'/api/v1/interviews/{interview.id}/start/')
+        self.assertEqual(response.status_code, 400)
+        interview.refresh_from_db()
+        self.assertEqual(interview.status, 'cancelled')
+
+
+@override_settings(NOTIFICATIONS={'DISPATCH_ON_COMMIT': False})
+class ReminderDeliveryTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('reminded', 'reminded@example.com', 'pass')
+        self.interview = Interview.objects.create(
+            user=self.user, title='Soon', description='', interview_type='technical', job_role='Developer',
+            status='scheduled', use_ai=False, scheduled_at=timezone.now() + timedelta(minutes=30),
+        )
+
+    def test_broker_failure_leaves_reminders_for_the_sweep(self):
+        with mock.patch('apps.interview.tasks.send_interview_reminders_task.delay', side_effect=OSError('no broker')), \
+                self.assertLogs('apps.interview.scheduler', 'WARNING'), \
+                self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(run_tick()['reminders_queued'], 1)
+        reminder = InterviewReminder.objects.get(interview=self.interview)
+        self.assertIsNone(reminder.sent_at)
+
+        self.assertEqual(sweep_reminders(), 0)  # Not stale yet
+        self.assertEqual(sweep_reminders(now=timezone.now() + timedelta(minutes=10)), 1)
+        reminder.refresh_from_db()
+        self.assertIsNotNone(reminder.sent_at)
+        self.assertEqual(NotificationOutbox.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(sweep_reminders(now=timezone.now() + timedelta(minutes=10)), 0)
+
+    def test_reminders_for_interviews_no_longer_scheduled_are_settled_silently(self):
+        with mock.patch('apps.interview.scheduler.enqueue_reminders'):
+            run_tick()
+        reminder = InterviewReminder.objects.get(interview=self.interview)
+        Interview.objects.filter(pk=self.interview.pk).update(status='in_progress')
+
+        self.assertEqual(send_reminders([reminder.id]), 0)
+        reminder.refresh_from_db()
+        self.assertIsNotNone(reminder.sent_at)
+        self.assertFalse(NotificationOutbox.objects.filter(user=self.user).exists())
+
+
+class UseTemplateQuotaTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('templated', 'templated@example.com', 'pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.template = InterviewTemplate.objects.create(
+            title='Backend', description='', interview_type='technical', difficulty='easy',
+            questions=[{'question': 'What is an index?'}],
+        )
+
+    def test_template_interviews_count_against_the_quota(self):
+        subscription = subscribe(self.user, max_interviews=1)
+        url = f'/api/v1/templates/{self.template.id}/use_template/'
+
+        self.assertEqual(self.client.post(url, {}, format='json').status_code, 201)
+        response = self.client.post(url, {}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data['error'], metering.QUOTA_ERRORS['interviews'])
+
+        self.assertEqual(Interview.objects.filter(user=self.user).count(), 1)
+        subscription.refresh_from_db()
+        self.assertEqual(subscription.interviews_used, 1)
+        self.template.refresh_from_db()
+        self.assertEqual(self.template.times_used, 1)
+
+
+@override_settings(AI_QUESTION_INDEX={'ENABLED': False})
+class QuestionBulkCreateTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('builder', 'builder@example.com', 'pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def template(self, count):
+        return InterviewTemplate.objects.create(
+            title='Backend', description='', interview_type='technical', difficulty='medium',
+            questions=[
+                {'question': f'Question {i}', 'type': 'technical', 'difficulty': 'hard' if i % 2 else 'easy'}
+                for i in range(1, count + 1)
+            ],
+        )
+
+    def post(self, url, data):
+        """(response, queries) of one request"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response, queries
+
+    def question_inserts(self, queries):
+        return [q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "interview_questions"')]
+
+    def use_template(self, template):
+        return self.post(f'/api/v1/templates/{template.id}/use_template/', {})
+
+    def create(self, count):
+        return self.post('/api/v1/interviews/', {
+            'title': 'AI', 'description': 'Practice', 'interview_type': 'technical', 'difficulty': 'easy',
+            'job_role': 'Developer', 'use_ai': True, 'total_questions': count,
+        })
+
+    def test_template_questions_keep_their_order(self):
+        template = self.template(4)
+        response, _ = self.use_template(template)
+        interview = Interview.objects.get(id=response.data['interview']['id'])
+        questions = list(interview.questions.order_by('order').values_list('order', 'question_text', 'difficulty'))
+        self.assertEqual(questions, [
+            (1, 'Question 1', 'hard'), (2, 'Question 2', 'easy'), (3, 'Question 3', 'hard'), (4, 'Question 4', 'easy'),
+        ])
+        self.assertEqual(interview.total_questions, 4)
+
+    def test_each_use_increments_times_used(self):
+        template = self.template(2)
+        for _ in range(3):
+            self.use_template(template)
+        template.refresh_from_db()
+        self.assertEqual(template.times_used, 3)
+
+    def test_template_questions_are_inserted_in_one_query(self):
+        self.use_template(self.template(1))  # Resolves and caches the entitlements
+        _, small = self.use_template(self.template(1))
+        _, large = self.use_template(self.template(10))
+        self.assertEqual(len(self.question_inserts(large)), 1)
+        self.assertEqual(len(large), len(small))
+
+    def test_generated_questions_are_inserted_in_order_in_one_query(self):
+        self.create(1)  # Resolves and caches the entitlements
+        _, small = self.create(2)
+        response, large = self.create(6)
+        self.assertEqual(len(self.question_inserts(large)), 1)
+        self.assertEqual(len(large), len(small))
+
+        orders = [question['order'] for question in response.data['interview']['questions']]
+        self.assertEqual(orders, list(range(1, 7)))
+        interview = Interview.objects.get(id=response.data['interview']['id'])
+        self.assertEqual(list(interview.questions.order_by('id').values_list('order', flat=True)), orders)
+
+
+class TemplateStatsTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('ranker', 'ranker@example.com', 'pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def template(self, title, **stats):
+        return InterviewTemplate.objects.create(
+            title=title, description='', interview_type='technical', difficulty='easy',
+            questions=[{'question': 'What is an index?'}], **stats,
+        )
+
+    def ranking(self, **params):
+        response = self.client.get('/api/v1/templates/ranking/', params)
+        self.assertEqual(response.status_code, 200)
+        return [template['title'] for template in response.data]
+
+    def test_record_completion_keeps_a_running_average(self):
+        template = self.template('Backend')
+        scores = [80, 60, 100, 40, 55]
+        for count, score in enumerate(scores, 1):
+            InterviewTemplate.record_completion(template.id, score)
+            template.refresh_from_db()
+            self.assertEqual(template.completed_count, count)
+            self.assertAlmostEqual(template.average_score, sum(scores[:count]) / count)
+
+    def test_record_rescore_replaces_one_percentage(self):
+        template = self.template('Backend')
+        for score in (80, 60):
+            InterviewTemplate.record_completion(template.id, score)
+        InterviewTemplate.record_rescore(template.id, 60, 90)
+        template.refresh_from_db()
+        self.assertEqual(template.completed_count, 2)
+        self.assertAlmostEqual(template.average_score, 85)
+
+    def test_completed_interviews_are_folded_into_the_average(self):
+        template = self.template('Backend')
+        for score in (8, 4):
+            interview = Interview.objects.create(
+                user=self.user, template=template, title='Backend', description='', interview_type='technical',
+                job_role='Developer', status='in_progress', use_ai=False, max_score=10,
+            )
+            question = InterviewQuestion.objects.create(
+                interview=interview, question_text='What is an index?', question_type='technical',
+                difficulty='easy', order=1,
+            )
+            InterviewResponse.objects.create(interview=interview, question=question, score=score, is_evaluated=True)
+            self.assertEqual(self.client.post(f'/api/v1/interviews/{interview.id}/complete/').status_code, 200)
+
+        template.refresh_from_db()
+        self.assertEqual(template.completed_count, 2)
+        self.assertAlmostEqual(template.average_score, 60)
+
+    def test_ranking_order(self):
+        self.template('Steady', times_used=5, completed_count=3, average_score=50)
+        self.template('Popular', times_used=9, completed_count=2, average_score=40)
+        self.template('Untried', times_used=5, completed_count=0, average_score=90)
+        self.template('Retired', times_used=100, completed_count=50, average_score=99, is_active=False)
+
+        self.assertEqual(self.ranking(), ['Popular', 'Untried', 'Steady'])
+        self.assertEqual(self.ranking(by='score'), ['Steady', 'Popular'])
+        self.assertEqual(self.ranking(by='score', min_completions=0), ['Untried', 'Steady', 'Popular'])
+        self.assertEqual(self.ranking(by='popularity', min_completions=3), ['Steady'])
+        self.assertEqual(self.ranking(limit=1), ['Popular'])
+
+        self.assertEqual(self.client.get('/api/v1/templates/ranking/', {'by': 'recent'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/templates/ranking/', {'limit': 'ten'}).status_code, 400)
+
+
+class EntitlementGateTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('gated', 'gated@example.com', 'pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.template = InterviewTemplate.objects.create(
+            title='Premium', description='', interview_type='technical', difficulty='easy',
+            questions=[{'question': 'What is an index?'}], is_premium=True,
+        )
+        self.url = f'/api/v1/templates/{self.template.id}/use_template/'
+
+    def test_premium_template_needs_a_premium_plan(self):
+        response = self.client.post(self.url, {}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data['error'], PREMIUM_ERROR)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            subscribe(self.user)
+        self.assertEqual(self.client.post(self.url, {}, format='json').status_code, 201)
+
+    def test_ai_feedback_follows_the_plan(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            subscription = subscribe(self.user, max_interviews=5, ai_feedback_enabled=False)
+        response = self.client.post('/api/v1/interviews/', {
+            'title': 'AI', 'description': 'Practice', 'interview_type': 'technical', 'difficulty': 'easy',
+            'job_role': 'Developer', 'use_ai': True,
+        }, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data['error'], FEATURE_ERRORS['ai_feedback_enabled'])
+        subscription.refresh_from_db()
+        self.assertEqual(subscription.interviews_used, 0)
+
+        response = self.client.post(self.url, {}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(Interview.objects.get(id=response.data['interview']['id']).use_ai)
+
+
+@override_settings(AI_QUESTION_INDEX={'ENABLED': False}, NOTIFICATIONS={'DISPATCH_ON_COMMIT': False})
+class InterviewSocketTests(TransactionTestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('streamer', 'streamer@example.com', 'pass')
+        self.interview = Interview.objects.create(
+            user=self.user, title='Live', description='', interview_type='technical', job_role='Developer',
+            difficulty='easy', status='in_progress', use_ai=True, total_questions=2,
+        )
+
+    def connect(self, interview_id=None, token=None):
+        token = str(AccessToken.for_user(self.user)) if token is None else token
+        return WebsocketCommunicator(
+            application, f'/ws/interviews/{interview_id or self.interview.id}/?token={token}',
+            headers=[(b'origin', b'http://localhost')],
+        )
+
+    @async_to_sync
+    async def handshake(self, communicator):
+        """(connected, close code) of the handshake"""
+        connected, code = await communicator.connect()
+        await communicator.disconnect()
+        return connected, code
+
+    @async_to_sync
+    async def exchange(self, communicator, message, until):
+        """Send ``message`` and collect the server messages up to the one of type ``until``"""
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        await communicator.send_json_to(message)
+        messages = []
+        while not messages or messages[-1]['type'] != until:
+            messages.append(await communicator.receive_json_from(timeout=5))
+        await communicator.disconnect()
+        return messages
+
+    def test_missing_or_invalid_token_is_rejected(self):
+        self.assertEqual(self.handshake(self.connect(token='')), (False, 4401))
+        self.assertEqual(self.handshake(self.connect(token='not-a-jwt')), (False, 4401))
+
+        self.user.is_active = False
+        self.user.save(update_fields=['is_active'])
+        self.assertEqual(self.handshake(self.connect()), (False, 4401))
+
+    def test_only_the_owner_can_join_an_interview(self):
+        other = User.objects.create_user('lurker', 'lurker@example.com', 'pass')
+        token = str(AccessToken.for_user(other))
+        self.assertEqual(self.handshake(self.connect(token=token)), (False, 4404))
+        self.assertEqual(self.handshake(self.connect(interview_id=self.interview.id + 1000)), (False, 4404))
+        self.assertEqual(self.handshake(self.connect()), (True, None))
+
+    def test_generated_questions_are_streamed_and_saved(self):
+        messages = self.exchange(self.connect(), {'action': 'generate_questions'}, until='questions.completed')
+        types = [message['type'] for message in messages]
+        self.assertIn('question.token', types)
+        created = [message['question'] for message in messages if message['type'] == 'question.created']
+        self.assertEqual([question['order'] for question in created], [1, 2])
+        self.assertEqual(messages[-1]['count'], 2)
+        self.assertEqual(
+            list(self.interview.questions.order_by('order').values_list('id', flat=True)),
+            [question['id'] for question in created],
+        )
+
+        messages = self.exchange(self.connect(), {'action': 'generate_questions'}, until='error')
+        self.assertEqual(messages[-1]['error'], 'Questions have already been generated')
+
+    def test_answer_feedback_is_streamed_and_recorded(self):
+        question = InterviewQuestion.objects.create(
+            interview=self.interview, question_text='What is an index?', question_type='technical',
+            difficulty='easy', order=1,
+        )
+        messages = self.exchange(self.connect(), {
+            'action': 'submit_response', 'question_id': question.id,
+            'text_response': 'A sorted lookup structure that avoids full table scans.',
+        }, until='evaluation.completed')
+
+        types = [message['type'] for message in messages]
+        self.assertEqual(types[0], 'response.saved')
+        self.assertIn('feedback.token', types)
+        response = InterviewResponse.objects.get(interview=self.interview, question=question)
+        self.assertTrue(response.is_evaluated)
+        self.assertEqual(messages[-1]['evaluation']['response_id'], response.id)
+        self.assertEqual(EvaluationJob.objects.get(response=response).status, 'completed')
+
+    def test_answers_cannot_target_another_interviews_question(self):
+        other = Interview.objects.create(
+            user=User.objects.create_user('owner', 'owner@example.com', 'pass'), title='Other', description='',
+            interview_type='technical', job_role='Developer', status='in_progress',
+        )
+        question = InterviewQuestion.objects.create(
+            interview=other, question_text='Secret', question_type='technical', difficulty='easy', order=1,
+        )
+        messages = self.exchange(self.connect(), {
+            'action': 'submit_response', 'question_id': question.id, 'text_response': 'Guess',
+        }, until='error')
+        self.assertEqual(messages[-1]['error'], 'Question not found')
+        self.assertFalse(InterviewResponse.objects.exists())
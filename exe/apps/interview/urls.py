@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import InterviewViewSet, InterviewTemplateViewSet
+from .views import InterviewViewSet, InterviewTemplateViewSet, MediaUploadViewSet
 
 router = DefaultRouter()
 router.register(r'interviews', InterviewViewSet, basename='interview')
 router.register(r'templates', InterviewTemplateViewSet, basename='template')
+router.register(r'uploads', MediaUploadViewSet, basename='media-upload')
 
 urlpatterns = [
     path('', include(router.urls)),
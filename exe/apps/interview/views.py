@@ -1,16 +1,36 @@
-from rest_framework import viewsets, status
+import base64
+import binascii
+import logging
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.http import FileResponse, StreamingHttpResponse
+from django.urls import reverse
 from django.utils import timezone
-from django.db.models import Q
-from .models import Interview, InterviewQuestion, InterviewResponse, InterviewTemplate
+from django.db import transaction
+from django.db.models import F, Q, prefetch_related_objects
+from .models import Interview, InterviewQuestion, InterviewResponse, InterviewTemplate, MediaUpload
+from . import media
+from .adaptive import build_question_pool, load_session
+from apps.ai_engine.pipeline import (
+    dispatch_media_upload, enqueue_evaluation, enqueue_transcription, generate_overall_feedback,
+    pending_evaluations, pending_transcriptions
+)
+from apps.ai_engine.transcription import transcription_settings
+from apps.ai_engine.providers import QuestionSpec, get_provider, run_sync
+from apps.ai_engine.vector_index import retrieve_questions
+from apps.payments import metering
+from apps.payments.entitlements import FEATURE_ERRORS, PREMIUM_ERROR
 from .serializers import (
     InterviewListSerializer, InterviewDetailSerializer, InterviewCreateSerializer,
     InterviewResultSerializer, InterviewQuestionSerializer, InterviewResponseSerializer,
-    InterviewResponseCreateSerializer, InterviewTemplateSerializer
+    InterviewResponseCreateSerializer, InterviewTemplateSerializer,
+    MediaUploadSerializer, MediaUploadCreateSerializer
 )
 
+logger = logging.getLogger(__name__)
+
 
 class InterviewViewSet(viewsets.ModelViewSet):
     """
@@ -46,15 +66,52 @@ class InterviewViewSet(viewsets.ModelViewSet):
         return queryset
     
     def create(self, request, *args, **kwargs):
-        """Create new interview"""
+        """
+        Create new interview
+        Pass "stream_questions": true to skip generation here and stream the
+        questions over ws/interviews/{id}/ instead.
+        With "is_adaptive": true a difficulty-bucketed question pool is built
+        and questions are handed out by next_question/.
+        """
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        interview = serializer.save(user=request.user)
+        if serializer.validated_data.get('use_ai', True) and not request.entitlements.ai_feedback_enabled:
+            return Response({
+                'error': FEATURE_ERRORS['ai_feedback_enabled']
+            }, status=status.HTTP_403_FORBIDDEN)
         
-        # Generate AI questions if requested
-        if interview.use_ai:
-            self._generate_ai_questions(interview)
+        # Take the quota first so refused users never trigger question generation;
+        # it is given back if creating the interview fails
+        if not metering.consume(request.user.id, 'interviews'):
+            return Response({
+                'error': metering.QUOTA_ERRORS['interviews']
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        try:
+            # Generate AI questions if requested, before opening the transaction
+            # so no connection sits idle in a transaction during the AI call
+            draft = Interview(user=request.user, **serializer.validated_data)
+            questions = []
+            question_pool = {}
+            if draft.is_adaptive:
+                question_pool = build_question_pool(draft)
+                if not any(question_pool.values()):
+                    metering.release(request.user.id, 'interviews')
+                    return Response({
+                        'error': 'No questions are available for this adaptive interview'
+                    }, status=status.HTTP_400_BAD_REQUEST)
+            elif draft.use_ai and not request.data.get('stream_questions'):
+                questions = self._generate_ai_questions(draft)
+            
+            with transaction.atomic():
+                interview = serializer.save(user=request.user, question_pool=question_pool)
+                for question in questions:
+                    question.interview = interview
+                InterviewQuestion.objects.bulk_create(questions)
+        except Exception:
+            metering.release(request.user.id, 'interviews')
+            raise
         
         return Response({
             'message': 'Interview created successfully',
@@ -74,15 +131,68 @@ class InterviewViewSet(viewsets.ModelViewSet):
                 'error': 'Interview is not in scheduled status'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        interview.status = 'in_progress'
-        interview.started_at = timezone.now()
-        interview.save()
+        # Conditional so a start racing the no-show cancellation cannot undo it
+        started = Interview.objects.filter(pk=interview.pk, status='scheduled').update(
+            status='in_progress',
+            started_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        if not started:
+            return Response({
+                'error': 'Interview is not in scheduled status'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        interview.refresh_from_db()
         
         return Response({
             'message': 'Interview started successfully',
             'interview': InterviewDetailSerializer(interview).data
         })
     
+    @action(detail=True, methods=['post'])
+    def next_question(self, request, pk=None):
+        """
+        Get the next question of an adaptive interview, chosen by the
+        candidate's current ability estimate
+        POST /api/v1/interviews/{id}/next_question/
+        """
+        interview = self.get_object()
+        
+        if not interview.is_adaptive:
+            return Response({
+                'error': 'Interview is not adaptive'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if interview.status != 'in_progress':
+            return Response({
+                'error': 'Interview is not in progress'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        with transaction.atomic():
+            # Concurrent calls for this interview (from any process) queue up
+            # here, and each one sees the questions saved before it
+            Interview.objects.select_for_update().only('id').get(pk=interview.pk)
+            session = load_session(interview)
+            
+            picked = session.take() if session.asked < interview.total_questions else None
+            if picked is None:
+                return Response({
+                    'error': 'No questions left',
+                    'questions_asked': session.asked,
+                    'ability_estimate': session.ability
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            difficulty, data = picked
+            asked, ability = session.asked, session.ability
+            question = InterviewQuestion.from_ai(interview, asked, dict(data, difficulty=difficulty))
+            question.save()
+        
+        return Response({
+            'question': InterviewQuestionSerializer(question).data,
+            'questions_asked': asked,
+            'questions_remaining': interview.total_questions - asked,
+            'ability_estimate': ability
+        })
+    
     @action(detail=True, methods=['get'])
     def questions(self, request, pk=None):
         """
@@ -130,13 +240,29 @@ class InterviewViewSet(viewsets.ModelViewSet):
             question=question,
             defaults={
                 **serializer.validated_data,
-                'submitted_at': timezone.now()
+                'submitted_at': timezone.now(),
+                'is_evaluated': False,
+                'transcription_status': ''
             }
         )
         
-        # Evaluate response with AI if enabled
+        # Audio-only answers are transcribed first; their evaluation follows
+        if enqueue_transcription(response):
+            return Response({
+                'message': 'Response submitted, transcription queued',
+                'response': InterviewResponseSerializer(response).data,
+                'transcription_status': response.transcription_status
+            }, status=status.HTTP_202_ACCEPTED)
+        
+        # Queue AI evaluation; the result is written back asynchronously
         if interview.use_ai:
-            self._evaluate_response(response)
+            job = enqueue_evaluation(response)
+            return Response({
+                'message': 'Response submitted, evaluation queued',
+                'response': InterviewResponseSerializer(response).data,
+                'evaluation_id': job.id,
+                'evaluation_status': job.status
+            }, status=status.HTTP_202_ACCEPTED)
         
         return Response({
             'message': 'Response submitted successfully',
@@ -156,19 +282,43 @@ class InterviewViewSet(viewsets.ModelViewSet):
                 'error': 'Interview is not in progress'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        interview.status = 'completed'
-        interview.completed_at = timezone.now()
-        interview.calculate_score()
-        
-        # Generate overall feedback
-        if interview.use_ai:
-            self._generate_overall_feedback(interview)
-        
-        interview.save()
+        with transaction.atomic():
+            # A double submit waits here and then finds the interview completed,
+            # so it is neither scored nor counted in the template stats twice.
+            # Evaluations landing meanwhile wait too, then re-score the interview
+            locked = Interview.objects.select_for_update().get(pk=interview.pk)
+            if locked.status != 'in_progress':
+                return Response({
+                    'error': 'Interview is not in progress'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            # One aggregate query serves both the score and the feedback
+            stats = interview.response_stats()
+            interview.status = 'completed'
+            interview.completed_at = timezone.now()
+            interview.calculate_score(save=False, stats=stats)
+            interview.save(update_fields=['status', 'completed_at', 'total_score', 'percentage', 'updated_at'])
+            if interview.template_id:
+                InterviewTemplate.record_completion(interview.template_id, interview.percentage)
+            # Answers not evaluated yet are scored by the pipeline when their
+            # results land; the evaluator is never waited for here
+            pending = pending_evaluations(interview) if interview.use_ai else 0
+            transcribing = pending_transcriptions(interview)
+        
+        # Generate overall feedback after the lock is released; it calls the
+        # provider. With answers outstanding the last evaluation generates it
+        if interview.use_ai and not (pending or transcribing):
+            try:
+                generate_overall_feedback(interview, stats)
+            except Exception as exc:
+                logger.warning('Could not generate overall feedback for interview %s: %s', interview.id, exc)
+        prefetch_related_objects([interview], 'questions', 'responses__question')
         
         return Response({
             'message': 'Interview completed successfully',
-            'interview': InterviewResultSerializer(interview).data
+            'interview': InterviewResultSerializer(interview).data,
+            'pending_evaluations': pending,
+            'pending_transcriptions': transcribing
         })
     
     @action(detail=True, methods=['get'])
@@ -184,6 +334,7 @@ class InterviewViewSet(viewsets.ModelViewSet):
                 'error': 'Interview is not completed yet'
             }, status=status.HTTP_400_BAD_REQUEST)
         
+        prefetch_related_objects([interview], 'questions', 'responses__question')
         serializer = InterviewResultSerializer(interview)
         return Response(serializer.data)
     
@@ -198,62 +349,23 @@ class InterviewViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
     
     def _generate_ai_questions(self, interview):
-        """Generate AI questions based on job role and skills"""
-        # TODO: Integrate with OpenAI API
-        # For now, generate sample questions
-        sample_questions = [
-            {
-                'text': f"Tell me about your experience with {skill}",
-                'type': 'technical',
-                'difficulty': interview.difficulty
-            }
-            for skill in interview.required_skills[:3]
-        ]
-        
-        # Add behavioral questions
-        sample_questions.append({
-            'text': f"Describe a challenging situation you faced as a {interview.job_role}",
-            'type': 'behavioral',
-            'difficulty': interview.difficulty
-        })
-        
-        # Create questions
-        for i, q_data in enumerate(sample_questions, 1):
-            InterviewQuestion.objects.create(
-                interview=interview,
-                question_text=q_data['text'],
-                question_type=q_data['type'],
-                difficulty=q_data['difficulty'],
-                order=i,
-                is_ai_generated=True
-            )
-    
-    def _evaluate_response(self, response):
-        """Evaluate response using AI"""
-        # TODO: Integrate with OpenAI API for evaluation
-        # For now, give a sample score
-        response.score = 7.5
-        response.ai_feedback = "Good answer. Consider providing more specific examples."
-        response.evaluation_metrics = {
-            'clarity': 8,
-            'relevance': 7,
-            'depth': 7,
-            'technical_accuracy': 8
-        }
-        response.is_evaluated = True
-        response.save()
-    
-    def _generate_overall_feedback(self, interview):
-        """Generate overall feedback for the interview"""
-        # TODO: Integrate with OpenAI API
-        # For now, generate sample feedback
-        avg_score = interview.total_score / interview.responses.count() if interview.responses.count() > 0 else 0
-        
-        interview.overall_feedback = f"Overall performance: {'Excellent' if avg_score >= 8 else 'Good' if avg_score >= 6 else 'Needs Improvement'}"
-        interview.strengths = ["Clear communication", "Technical knowledge"]
-        interview.weaknesses = ["Could provide more examples", "Time management"]
-        interview.recommendations = ["Practice more coding problems", "Work on system design skills"]
-
+        """
+        Generate (unsaved) AI questions based on job role and skills.
+        Relevant questions from the local index are reused first; the
+        provider only generates the remainder.
+        """
+        questions, remaining = retrieve_questions(QuestionSpec(
+            job_role=interview.job_role,
+            interview_type=interview.interview_type,
+            difficulty=interview.difficulty,
+            required_skills=interview.required_skills,
+            count=interview.total_questions,
+            job_description=interview.job_description,
+        ))
+        if remaining is not None:
+            questions += run_sync(get_provider().generate_questions, remaining)
+        
+        return [InterviewQuestion.from_ai(interview, i, q_data) for i, q_data in enumerate(questions, 1)]
 
 class InterviewTemplateViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -276,6 +388,35 @@ class InterviewTemplateViewSet(viewsets.ReadOnlyModelViewSet):
         
         return queryset
     
+    @action(detail=False, methods=['get'])
+    def ranking(self, request):
+        """
+        Rank templates by popularity or by average score
+        GET /api/v1/templates/ranking/?by=popularity|score&min_completions=5&limit=20
+        """
+        by = request.query_params.get('by', 'popularity')
+        order_by = {
+            'popularity': ['-times_used', '-average_score'],
+            'score': ['-average_score', '-completed_count'],
+        }.get(by)
+        if order_by is None:
+            return Response({
+                'error': 'by must be popularity or score'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+            # Unfinished templates have no meaningful score
+            min_completions = int(request.query_params.get('min_completions', 1 if by == 'score' else 0))
+        except ValueError:
+            return Response({
+                'error': 'limit and min_completions must be integers'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        templates = self.get_queryset().filter(completed_count__gte=min_completions).order_by(*order_by)[:limit]
+        serializer = self.get_serializer(templates, many=True)
+        return Response(serializer.data)
+    
     @action(detail=True, methods=['post'])
     def use_template(self, request, pk=None):
         """
@@ -288,36 +429,350 @@ class InterviewTemplateViewSet(viewsets.ReadOnlyModelViewSet):
         """
         template = self.get_object()
         
-        # Create interview from template
-        interview = Interview.objects.create(
-            user=request.user,
-            title=template.title,
-            description=template.description,
-            interview_type=template.interview_type,
-            difficulty=template.difficulty,
-            job_role=request.data.get('job_role', 'Software Engineer'),
-            company_name=request.data.get('company_name', ''),
-            duration_minutes=template.duration_minutes,
-            total_questions=len(template.questions),
-            status='scheduled'
-        )
-        
-        # Create questions from template
-        for i, q_data in enumerate(template.questions, 1):
-            InterviewQuestion.objects.create(
-                interview=interview,
-                question_text=q_data['question'],
-                question_type=q_data.get('type', 'general'),
-                difficulty=q_data.get('difficulty', template.difficulty),
-                expected_answer=q_data.get('expected_answer', ''),
-                order=i
+        if template.is_premium and not request.entitlements.is_premium:
+            return Response({
+                'error': PREMIUM_ERROR
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        # Count the interview against the plan quota; rolled back with the interview
+        with transaction.atomic():
+            if not metering.consume(request.user.id, 'interviews'):
+                return Response({
+                    'error': metering.QUOTA_ERRORS['interviews']
+                }, status=status.HTTP_403_FORBIDDEN)
+            
+            # Create interview from template
+            interview = Interview.objects.create(
+                user=request.user,
+                template=template,
+                title=template.title,
+                description=template.description,
+                interview_type=template.interview_type,
+                difficulty=template.difficulty,
+                job_role=request.data.get('job_role', 'Software Engineer'),
+                company_name=request.data.get('company_name', ''),
+                duration_minutes=template.duration_minutes,
+                total_questions=len(template.questions),
+                status='scheduled',
+                use_ai=request.entitlements.ai_feedback_enabled
             )
-        
-        # Update template usage
-        template.times_used += 1
-        template.save()
+            
+            # Create questions from template
+            InterviewQuestion.objects.bulk_create([
+                InterviewQuestion(
+                    interview=interview,
+                    question_text=q_data['question'],
+                    question_type=q_data.get('type', 'general'),
+                    difficulty=q_data.get('difficulty', template.difficulty),
+                    expected_answer=q_data.get('expected_answer', ''),
+                    order=i
+                )
+                for i, q_data in enumerate(template.questions, 1)
+            ])
+            
+            # Update template usage atomically
+            InterviewTemplate.objects.filter(pk=template.pk).update(times_used=F('times_used') + 1)
         
         return Response({
             'message': 'Interview created from template',
             'interview': InterviewDetailSerializer(interview).data
         }, status=status.HTTP_201_CREATED)
+
+
+class MediaUploadViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Chunked, resumable audio/video uploads for interview responses
+    
+    POST   /api/v1/uploads/               start an upload
+    PATCH  /api/v1/uploads/{id}/          append a chunk (Upload-Offset header)
+    GET    /api/v1/uploads/{id}/          progress; resume from "offset"
+    DELETE /api/v1/uploads/{id}/          abort and remove the file
+    GET    /api/v1/uploads/{id}/content/  play back (supports Range)
+    """
+    serializer_class = MediaUploadSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return MediaUpload.objects.filter(user=self.request.user).select_related('response')
+    
+    def progress(self, upload, status_code=status.HTTP_200_OK):
+        response = Response(MediaUploadSerializer(upload).data, status=status_code)
+        response['Upload-Offset'] = str(upload.received_bytes)
+        response['Upload-Length'] = str(upload.total_size)
+        return response
+    
+    def retrieve(self, request, *args, **kwargs):
+        return self.progress(self.get_object())
+    
+    def create(self, request, *args, **kwargs):
+        """
+        Start an upload
+        POST /api/v1/uploads/
+        Body: {
+            "interview_id": 1,
+            "question_id": 3,
+            "kind": "audio",
+            "filename": "answer.webm",
+            "content_type": "audio/webm",
+            "total_size": 1048576,
+            "sha256": "<optional hex digest of the whole file>"
+        }
+        """
+        serializer = MediaUploadCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        config = media.upload_settings()
+        
+        if data['total_size'] > config['MAX_SIZE']:
+            return Response({
+                'error': f"File exceeds the maximum size of {config['MAX_SIZE']} bytes"
+            }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        
+        if not data['content_type'].startswith(tuple(config['CONTENT_TYPES'])):
+            return Response({
+                'error': 'Unsupported content type'
+            }, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        
+        interview = Interview.objects.filter(id=data['interview_id'], user=request.user).first()
+        if interview is None:
+            return Response({
+                'error': 'Interview not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        if interview.status != 'in_progress':
+            return Response({
+                'error': 'Interview is not in progress'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            question = interview.questions.get(id=data['question_id'])
+        except InterviewQuestion.DoesNotExist:
+            return Response({
+                'error': 'Question not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        with transaction.atomic():
+            response, _ = InterviewResponse.objects.get_or_create(interview=interview, question=question)
+            upload = MediaUpload(
+                user=request.user,
+                response=response,
+                kind=data['kind'],
+                filename=data['filename'],
+                content_type=data['content_type'],
+                total_size=data['total_size'],
+                expected_sha256=data.get('sha256', '').lower()
+            )
+            upload.storage_path = media.storage_path_for(upload)
+            upload.save()
+        
+        result = self.progress(upload, status.HTTP_201_CREATED)
+        result['Location'] = reverse('media-upload-detail', args=[upload.id])
+        result['Upload-Chunk-Size'] = str(config['CHUNK_SIZE'])
+        return result
+    
+    def partial_update(self, request, *args, **kwargs):
+        """
+        Append a chunk; the raw body is streamed to disk
+        PATCH /api/v1/uploads/{id}/
+        Headers:
+            Upload-Offset: <bytes already received>
+            Upload-Checksum: sha256 <hex or base64 digest of this chunk> (optional)
+        A 409 response carries the offset to resume from.
+        """
+        config = media.upload_settings()
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except (KeyError, ValueError):
+            return Response({
+                'error': 'Upload-Offset and Content-Length headers are required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if length > config['MAX_CHUNK_SIZE']:
+            return Response({
+                'error': f"Chunks are limited to {config['MAX_CHUNK_SIZE']} bytes"
+            }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        
+        checksum = None
+        if 'Upload-Checksum' in request.headers:
+            checksum = self._parse_checksum(request.headers['Upload-Checksum'])
+            if checksum is None:
+                return Response({
+                    'error': 'Upload-Checksum must be "sha256 <digest>"'
+                }, status=status.HTTP_400_BAD_REQUEST)
+        
+        upload = self.get_queryset().filter(pk=kwargs['pk']).first()
+        if upload is None:
+            return Response({
+                'error': 'Upload not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        if upload.status != 'uploading':
+            return Response({
+                'error': 'Upload is already complete'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # The file lock serializes writers of the same upload while the body
+        # is read; the row is only locked by the short UPDATEs that follow
+        with media.locked_part(upload) as part:
+            current = self.get_queryset().filter(pk=upload.pk).first()
+            if current is None or current.status != 'uploading':
+                # Finished or deleted while this request waited for the lock;
+                # drop the empty partial file opening it may have recreated
+                media.unlink(media.partial_path(upload))
+                return Response({
+                    'error': 'Upload is no longer accepting chunks'
+                }, status=status.HTTP_409_CONFLICT)
+            
+            upload = current
+            if offset != upload.received_bytes:
+                return self.offset_mismatch(upload)
+            
+            if offset + length > upload.total_size:
+                return Response({
+                    'error': 'Chunk extends past the declared total_size'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            written, digest = media.append_chunk(part, offset, request.stream, length) if length else (0, None)
+            if checksum is not None and written and digest != checksum:
+                # Not acknowledged: the next chunk at this offset overwrites it
+                return Response({
+                    'error': 'Chunk checksum mismatch',
+                    'offset': upload.received_bytes
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            upload.received_bytes += written
+            upload.updated_at = timezone.now()
+            advanced = MediaUpload.objects.filter(pk=upload.pk, status='uploading', received_bytes=offset).update(
+                received_bytes=upload.received_bytes,
+                updated_at=upload.updated_at
+            )
+            if not advanced:
+                upload = self.get_queryset().filter(pk=upload.pk).first()
+                if upload is None:
+                    return Response({
+                        'error': 'Upload not found'
+                    }, status=status.HTTP_404_NOT_FOUND)
+                return self.offset_mismatch(upload)
+            
+            if upload.is_complete:
+                self._complete(request, upload)
+        
+        if upload.status == 'failed':
+            return Response({
+                'error': upload.error_message
+            }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        return self.progress(upload)
+    
+    def destroy(self, request, *args, **kwargs):
+        """
+        Abort an upload and remove its file
+        DELETE /api/v1/uploads/{id}/
+        """
+        upload = self.get_object()
+        if upload.status == 'processing':
+            return Response({
+                'error': 'Upload is being processed'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        media.discard(upload)
+        upload.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    @action(detail=True, methods=['get'])
+    def content(self, request, pk=None):
+        """
+        Stream a completed upload, honouring single byte-range requests
+        GET /api/v1/uploads/{id}/content/
+        """
+        upload = self.get_object()
+        if upload.status == 'uploading':
+            return Response({
+                'error': 'Upload is not complete'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        path = media.absolute_path(upload)
+        if not path.exists():
+            return Response({
+                'error': 'File not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        size = path.stat().st_size
+        try:
+            byte_range = media.parse_range(request.headers.get('Range'), size)
+        except media.UploadError as exc:
+            result = Response({'error': str(exc)}, status=exc.status_code)
+            result['Content-Range'] = f'bytes */{size}'
+            return result
+        
+        if byte_range is None:
+            result = FileResponse(open(path, 'rb'), content_type=upload.content_type)
+        else:
+            start, end = byte_range
+            result = StreamingHttpResponse(
+                media.iter_file(path, start, end - start + 1),
+                status=status.HTTP_206_PARTIAL_CONTENT,
+                content_type=upload.content_type
+            )
+            result['Content-Range'] = f'bytes {start}-{end}/{size}'
+            result['Content-Length'] = str(end - start + 1)
+        result['Accept-Ranges'] = 'bytes'
+        result['ETag'] = f'"{upload.sha256}"'
+        return result
+    
+    def _parse_checksum(self, header):
+        """Hex digest from an 'Upload-Checksum: sha256 <hex|base64>' header, or None"""
+        algorithm, _, value = header.strip().partition(' ')
+        if algorithm.lower() != 'sha256' or not value:
+            return None
+        value = value.strip()
+        if len(value) == 64:
+            return value.lower()
+        try:
+            digest = base64.b64decode(value, validate=True)
+        except (binascii.Error, ValueError):
+            return None
+        return digest.hex() if len(digest) == 32 else None
+    
+    def offset_mismatch(self, upload):
+        result = Response({
+            'error': 'Offset mismatch',
+            'offset': upload.received_bytes
+        }, status=status.HTTP_409_CONFLICT)
+        result['Upload-Offset'] = str(upload.received_bytes)
+        return result
+    
+    def _complete(self, request, upload):
+        """
+        Hash the finished file, attach it to its response and queue
+        post-processing. Runs under the file lock but outside any transaction;
+        if the request dies before the status is recorded, an empty PATCH at
+        the final offset completes the upload.
+        """
+        upload.sha256 = media.finalize(upload)
+        upload.completed_at = timezone.now()
+        upload.status = 'complete'
+        if upload.expected_sha256 and upload.expected_sha256 != upload.sha256:
+            upload.status = 'failed'
+            upload.error_message = 'SHA-256 of the uploaded file does not match the declared digest'
+            media.discard(upload)
+        
+        with transaction.atomic():
+            MediaUpload.objects.filter(pk=upload.pk, status='uploading').update(
+                sha256=upload.sha256,
+                status=upload.status,
+                error_message=upload.error_message,
+                completed_at=upload.completed_at,
+                updated_at=upload.completed_at
+            )
+            if upload.status == 'complete':
+                url = request.build_absolute_uri(reverse('media-upload-content', args=[upload.id]))
+                InterviewResponse.objects.filter(pk=upload.response_id).update(
+                    **{f'{upload.kind}_url': url, 'updated_at': timezone.now()}
+                )
+                if transcription_settings()['ENABLED']:
+                    # Transcribed by process_media_upload before evaluation
+                    InterviewResponse.objects.filter(pk=upload.response_id, text_response='').update(
+                        transcription_status='pending'
+                    )
+                transaction.on_commit(lambda: dispatch_media_upload(upload.id))
@@ -1,3 +1,32 @@
 from django.contrib import admin
+from .models import Notification, NotificationDigest, NotificationOutbox, NotificationPreference
 
-# Register your models here.
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ['title', 'user', 'kind', 'is_read', 'created_at']
+    list_filter = ['kind', 'is_read', 'created_at']
+    search_fields = ['title', 'message', 'user__username']
+    readonly_fields = ['created_at', 'read_at']
+
+
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'kind', 'status', 'attempts', 'available_at', 'created_at']
+    list_filter = ['status', 'kind']
+    search_fields = ['title', 'dedupe_key', 'user__username']
+    readonly_fields = ['created_at', 'delivered_at', 'last_error']
+
+
+@admin.register(NotificationPreference)
+class NotificationPreferenceAdmin(admin.ModelAdmin):
+    list_display = ['user', 'digest_frequency', 'updated_at']
+    list_filter = ['digest_frequency']
+    search_fields = ['user__username']
+
+
+@admin.register(NotificationDigest)
+class NotificationDigestAdmin(admin.ModelAdmin):
+    list_display = ['user', 'frequency', 'period_start', 'item_count', 'sent_at']
+    list_filter = ['frequency', 'period_start']
+    search_fields = ['user__username']
@@ -0,0 +1,117 @@
+"""
+Delivery backends for the notification outbox.
+
+A backend receives a batch of NotificationOutbox rows and returns the rows
+it could not deliver (an exception fails the whole batch). Each backend
+call runs in its own savepoint, so a database error in one channel does
+not abort the worker's transaction. Backends are
+configured in settings.NOTIFICATIONS['BACKENDS'] as channel -> class path
+and run in that order, so 'in_app' creates the Notification rows that the
+later channels refer to.
+"""
+import logging
+from collections import Counter
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from .models import Notification
+from .unread import publish, record_created, unread_count
+
+logger = logging.getLogger(__name__)
+
+
+def serialize_entry(entry):
+    notification = getattr(entry, 'notification', None)
+    return {
+        'id': notification.id if notification else None,
+        'kind': entry.kind,
+        'title': entry.title,
+        'message': entry.message,
+        'data': entry.data,
+        'is_read': False,
+        'created_at': (notification.created_at if notification else entry.created_at).isoformat(),
+    }
+
+
+class BaseBackend:
+    def deliver(self, entries):
+        """Deliver ``entries``; return the ones that failed"""
+        raise NotImplementedError
+
+
+class InAppBackend(BaseBackend):
+    """Stores the notifications in the user's inbox with one INSERT per batch"""
+
+    def deliver(self, entries):
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                user_id=entry.user_id,
+                kind=entry.kind,
+                title=entry.title,
+                message=entry.message,
+                data=entry.data,
+            )
+            for entry in entries
+        ])
+        for entry, notification in zip(entries, notifications):
+            entry.notification = notification
+        record_created(Counter(entry.user_id for entry in entries))
+        return []
+
+
+class EmailBackend(BaseBackend):
+    """
+    Sends through Django's configured email backend. The connection is
+    opened once and reused for every batch the worker drains; it is
+    re-opened after an error. Messages are sent one at a time, so a
+    rejected address only fails its own entry.
+    """
+
+    def __init__(self):
+        self.connection = None
+
+    def deliver(self, entries):
+        failed = []
+        for entry in entries:
+            if not entry.user.email:
+                continue
+            message = EmailMessage(subject=entry.title, body=entry.message, to=[entry.user.email])
+            try:
+                if self.connection is None:
+                    self.connection = get_connection()
+                    self.connection.open()
+                message.connection = self.connection
+                message.send()
+            except Exception as exc:
+                logger.warning('Email to user %s failed: %s', entry.user_id, exc)
+                self.close()
+                failed.append(entry)
+        return failed
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+            self.connection = None
+
+
+class WebSocketBackend(BaseBackend):
+    """
+    Pushes to the user's channel group once the worker's transaction has
+    committed, so clients never see a notification they cannot fetch yet.
+    Users without an open socket simply miss the push.
+    """
+
+    def deliver(self, entries):
+        payloads = [(entry.user_id, serialize_entry(entry)) for entry in entries]
+
+        def push():
+            for user_id, notification in payloads:
+                publish(user_id, {
+                    'type': 'notification.created',
+                    'notification': notification,
+                    'unread_count': unread_count(user_id),
+                })
+        transaction.on_commit(push)
+        return []
@@ -0,0 +1,61 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from .unread import mark_read, unread_count as cached_unread_count, user_group
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Live notification stream for the connected user
+    ws/notifications/?token=<access token>
+
+    Client messages:
+        {"action": "mark_read", "ids": [1, 2]}
+        {"action": "mark_all_read"}
+
+    Server messages:
+        unread.count         sent on connect and whenever the count changes
+        notification.created a new notification, with the new unread_count
+        error
+    """
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        self.user_id = user.id
+        self.group_name = user_group(self.user_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        await self.send_json({'type': 'unread.count', 'count': await database_sync_to_async(cached_unread_count)(self.user_id)})
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        action = content.get('action')
+        if action == 'mark_read':
+            ids = content.get('ids')
+            if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+                await self.send_json({'type': 'error', 'error': 'ids must be a list of notification ids'})
+                return
+            # The new count reaches every socket of this user through the group
+            await database_sync_to_async(mark_read)(self.user_id, ids)
+        elif action == 'mark_all_read':
+            await database_sync_to_async(mark_read)(self.user_id)
+        else:
+            await self.send_json({'type': 'error', 'error': 'Unknown action'})
+
+    async def notification_created(self, event):
+        """Group event sent by the WebSocket delivery backend"""
+        await self.send_json({
+            'type': 'notification.created',
+            'notification': event['notification'],
+            'unread_count': event['unread_count'],
+        })
+
+    async def unread_count(self, event):
+        """Group event sent when notifications are read"""
+        await self.send_json({'type': 'unread.count', 'count': event['count']})
@@ -0,0 +1,209 @@
+"""
+Daily and weekly notification digests.
+
+Users in digest mode (NotificationPreference.digest_frequency, default
+NOTIFICATIONS['DIGEST_DEFAULT']) do not get an email for each notification
+whose kind is in NOTIFICATIONS['DIGEST_KINDS']; those notifications are
+only stored in the inbox and summarized once per period, together with the
+period's PerformanceTrend snapshot and ActivityLog counts.
+
+send_digests() walks users in id ranges of DIGEST_BATCH_SIZE. Each range
+costs a fixed number of queries (users, notifications, trends, activity,
+already-sent digests) regardless of its size, and its emails go out over
+one mail connection. NotificationDigest rows are claimed before sending,
+so reruns and overlapping runs send each digest at most once; a digest
+whose send fails is unclaimed and retried by the next run.
+
+Celery beat sends the daily digests every morning and the weekly ones on
+Mondays (CELERY_BEAT_SCHEDULE); manage.py send_notification_digests does
+the same by hand.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection
+from django.db.models import Count, Max
+from django.template.loader import render_to_string
+from django.utils import timezone
+from apps.analytics.models import ActivityLog, PerformanceTrend
+from apps.users.models import User
+from .models import Notification, NotificationDigest
+from .outbox import digest_frequency, notification_settings
+
+logger = logging.getLogger(__name__)
+
+MAX_ITEMS = 10  # Notifications listed per digest; the rest are counted
+
+
+def digest_period(frequency, today=None):
+    """(start, end) dates of the last complete day or ISO week before ``today``"""
+    today = today or timezone.now().date()
+    if frequency == 'weekly':
+        end = today - timedelta(days=today.weekday())
+        return end - timedelta(days=7), end
+    return today - timedelta(days=1), today
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min), timezone.get_current_timezone())
+
+
+def load_batch(lo, hi, frequency, start, end, config):
+    """Digest context for every eligible user with lo <= id < hi, in a fixed number of queries"""
+    users = [
+        user for user in User.objects.filter(id__gte=lo, id__lt=hi, is_active=True)
+        .exclude(email='')
+        .select_related('profile', 'notification_preference')
+        if digest_frequency(user, config) == frequency
+        and (getattr(user, 'profile', None) is None or user.profile.notifications_enabled)
+    ]
+    if not users:
+        return []
+
+    ids = [user.id for user in users]
+    sent = set(
+        NotificationDigest.objects.filter(user_id__in=ids, frequency=frequency, period_start=start)
+        .values_list('user_id', flat=True)
+    )
+    users = [user for user in users if user.id not in sent]
+    ids = [user.id for user in users]
+    if not ids:
+        return []
+
+    since, until = day_start(start), day_start(end)
+    notifications = defaultdict(list)
+    rows = (
+        Notification.objects.filter(
+            user_id__in=ids, kind__in=config['DIGEST_KINDS'], created_at__gte=since, created_at__lt=until
+        )
+        .order_by('user_id', '-created_at')
+        .values('user_id', 'kind', 'title', 'message')
+    )
+    for row in rows.iterator(chunk_size=2000):
+        notifications[row.pop('user_id')].append(row)
+
+    trends = {
+        row['user_id']: row
+        for row in PerformanceTrend.objects.filter(
+            user_id__in=ids, period_type=frequency, period_start=start
+        ).values()
+    }
+
+    activity = defaultdict(dict)
+    counts = (
+        ActivityLog.objects.filter(user_id__in=ids, created_at__gte=since, created_at__lt=until)
+        .values('user_id', 'activity_type')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    labels = dict(ActivityLog.ACTIVITY_TYPES)
+    for row in counts:
+        if row['activity_type'] != 'login':
+            activity[row['user_id']][labels.get(row['activity_type'], row['activity_type'])] = row['count']
+
+    digests = []
+    for user in users:
+        items = notifications.get(user.id, [])
+        trend = trends.get(user.id)
+        if not items and not trend and not activity.get(user.id):
+            continue  # Nothing happened; no empty digests
+        digests.append({
+            'user': user,
+            'frequency': frequency,
+            'period_start': start,
+            'period_end': end - timedelta(days=1),
+            'items': items[:MAX_ITEMS],
+            'more_count': max(len(items) - MAX_ITEMS, 0),
+            'item_count': len(items),
+            'trend': trend,
+            'activity': activity.get(user.id, {}),
+        })
+    return digests
+
+
+def render_digest(context):
+    subject = render_to_string('notifications/digest_subject.txt', context).strip()
+    body = render_to_string('notifications/digest.txt', context)
+    return EmailMessage(subject=subject, body=body, to=[context['user'].email])
+
+
+def claim_digests(digests):
+    """
+    Insert the NotificationDigest rows of ``digests`` before anything is
+    sent, skipping ones that already exist; returns the ids of the users
+    whose row this call created. Concurrent or repeated runs therefore
+    never email the same user twice for a period.
+    """
+    rows = [
+        (digest['user'].id, digest['frequency'], digest['period_start'], digest['item_count'], timezone.now())
+        for digest in digests
+    ]
+    placeholders = ', '.join(['(%s, %s, %s, %s, %s)'] * len(rows))
+    with connection.cursor() as cursor:
+        # bulk_create(ignore_conflicts=True) cannot tell which rows it inserted
+        cursor.execute(
+            f"INSERT INTO {NotificationDigest._meta.db_table} (user_id, frequency, period_start, item_count, sent_at) "
+            f"VALUES {placeholders} ON CONFLICT (user_id, frequency, period_start) DO NOTHING RETURNING user_id",
+            [value for row in rows for value in row],
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def send_batch(digests):
+    """
+    Claim one batch of digests, then send the claimed ones over a single
+    mail connection. A digest that fails to send has its claim removed so
+    the next run retries it; returns the number sent.
+    """
+    if not digests:
+        return 0
+    claimed = claim_digests(digests)
+    sent = 0
+    failed = []
+    mail = None
+    try:
+        for digest in digests:
+            if digest['user'].id not in claimed:
+                continue
+            try:
+                if mail is None:
+                    mail = get_connection()
+                    mail.open()
+                message = render_digest(digest)
+                message.connection = mail
+                message.send()
+                sent += 1
+            except Exception as exc:
+                logger.warning('Digest to user %s failed: %s', digest['user'].id, exc)
+                failed.append(digest['user'].id)
+                close_quietly(mail)
+                mail = None
+    finally:
+        close_quietly(mail)
+    if failed:
+        NotificationDigest.objects.filter(
+            user_id__in=failed, frequency=digests[0]['frequency'], period_start=digests[0]['period_start']
+        ).delete()
+    return sent
+
+
+def close_quietly(mail):
+    if mail is not None:
+        try:
+            mail.close()
+        except Exception:
+            pass
+
+
+def send_digests(frequency, today=None, batch_size=None):
+    """Send the digests of the last complete period; returns the number of emails sent"""
+    config = notification_settings()
+    batch_size = batch_size or config['DIGEST_BATCH_SIZE']
+    start, end = digest_period(frequency, today)
+
+    max_id = User.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+    sent = 0
+    for lo in range(1, max_id + 1, batch_size):
+        sent += send_batch(load_batch(lo, lo + batch_size, frequency, start, end, config))
+    return sent
@@ -0,0 +1,85 @@
+"""
+Domain events that notify users. Each function only writes outbox rows, so
+call it inside the transaction that records the event.
+"""
+from .outbox import notify, notify_many
+
+# Per-answer evaluations are frequent; keep them out of the user's mailbox
+LIVE_CHANNELS = ['in_app', 'websocket']
+
+
+def exam_results_ready(attempt):
+    exam = attempt.exam
+    return notify(
+        attempt.user,
+        'exam_results',
+        f'Results ready: {exam.title}',
+        f'You scored {attempt.percentage:.1f}% on "{exam.title}".',
+        data={'exam_id': exam.id, 'attempt_id': attempt.id, 'percentage': attempt.percentage},
+        dedupe_key=f'exam_attempt:{attempt.id}:results',
+    )
+
+
+def responses_evaluated(responses):
+    """One notification per evaluated interview response"""
+    return notify_many([
+        {
+            'user_id': response.interview.user_id,
+            'kind': 'interview_evaluated',
+            'title': f'Answer evaluated: {response.interview.title}',
+            'message': f'Your answer to question {response.question.order} scored {response.score:.1f}/10.',
+            'data': {
+                'interview_id': response.interview_id,
+                'response_id': response.id,
+                'question_id': response.question_id,
+                'score': response.score,
+            },
+            'channels': LIVE_CHANNELS,
+        }
+        for response in responses
+    ])
+
+
+def payment_confirmed(payment):
+    return notify(
+        payment.user,
+        'payment_confirmed',
+        'Payment confirmed',
+        f'We received your payment of {payment.amount} {payment.currency} for the {payment.plan.name} plan.',
+        data={'payment_id': payment.id, 'transaction_id': payment.transaction_id},
+        dedupe_key=f'payment:{payment.id}:confirmed',
+    )
+
+
+def subscriptions_expiring(subscriptions):
+    """Notify the owners of subscriptions ending soon; once per subscription end date"""
+    return notify_many([
+        {
+            'user_id': subscription.user_id,
+            'kind': 'subscription_expiring',
+            'title': f'Your {subscription.plan.name} subscription is ending',
+            'message': f'Your subscription ends on {subscription.end_date:%Y-%m-%d}. Renew to keep your access.',
+            'data': {'subscription_id': subscription.id, 'end_date': subscription.end_date.isoformat()},
+            'dedupe_key': f'subscription:{subscription.id}:expiring:{int(subscription.end_date.timestamp())}',
+        }
+        for subscription in subscriptions
+    ])
+
+
+def interview_reminders(reminders, titles, messages):
+    """Publish scheduler reminders (see apps.interview.scheduler)"""
+    return notify_many([
+        {
+            'user_id': reminder.interview.user_id,
+            'kind': 'interview_reminder',
+            'title': titles[reminder.kind].format(title=reminder.interview.title),
+            'message': messages[reminder.kind].format(
+                title=reminder.interview.title,
+                kind=reminder.interview.get_interview_type_display(),
+                at=reminder.scheduled_for,
+            ),
+            'data': {'interview_id': reminder.interview_id, 'reminder': reminder.kind},
+            'dedupe_key': reminder.key,
+        }
+        for reminder in reminders
+    ])
@@ -0,0 +1,23 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from apps.notifications.outbox import drain_outbox
+
+
+class Command(BaseCommand):
+    help = 'Deliver pending notifications from the outbox in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the outbox once and exit')
+        parser.add_argument('--batch-size', type=int, default=None, help='Rows claimed per transaction')
+        parser.add_argument('--interval-ms', type=int, default=1000, help='Sleep between drains when idle')
+
+    def handle(self, *args, **options):
+        while True:
+            delivered = drain_outbox(batch_size=options['batch_size'])
+            if options['once']:
+                self.stdout.write(self.style.SUCCESS(f'Delivered {delivered} notifications'))
+                return
+            close_old_connections()
+            if not delivered:
+                time.sleep(options['interval_ms'] / 1000.0)
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+from apps.notifications.digest import digest_period, send_digests
+
+
+class Command(BaseCommand):
+    help = 'Send daily or weekly notification digests for the last complete period'
+
+    def add_arguments(self, parser):
+        parser.add_argument('frequency', choices=['daily', 'weekly'])
+        parser.add_argument('--today', help='Treat this date (YYYY-MM-DD) as today')
+        parser.add_argument('--batch-size', type=int, default=None, help='Users per id range')
+
+    def handle(self, *args, **options):
+        today = parse_date(options['today']) if options['today'] else None
+        start, end = digest_period(options['frequency'], today)
+        sent = send_digests(options['frequency'], today=today, batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {sent} {options['frequency']} digests for {start} to {end}"
+        ))
@@ -1,3 +1,125 @@
 from django.db import models
+from django.utils import timezone
+from apps.users.models import User
 
-# Create your models here.
+
+class Notification(models.Model):
+    """
+    In-app notification shown in the user's inbox
+    """
+    KIND_CHOICES = (
+        ('exam_results', 'Exam Results Ready'),
+        ('interview_evaluated', 'Interview Evaluated'),
+        ('interview_reminder', 'Interview Reminder'),
+        ('payment_confirmed', 'Payment Confirmed'),
+        ('subscription_expiring', 'Subscription Expiring'),
+        ('general', 'General'),
+    )
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES, default='general')
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    data = models.JSONField(default=dict, blank=True)  # {'interview_id': 1, ...} for deep links
+    
+    is_read = models.BooleanField(default=False)
+    read_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'notifications'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'is_read', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} for {self.user.username}: {self.title}"
+
+
+class NotificationOutbox(models.Model):
+    """
+    Transactional outbox of notifications waiting for delivery.
+    Rows are written in the same transaction as the domain change that
+    caused them and drained in batches by the outbox worker, which delivers
+    each row through its remaining channels.
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('delivered', 'Delivered'),
+        ('failed', 'Failed'),
+    )
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notification_outbox')
+    kind = models.CharField(max_length=30, choices=Notification.KIND_CHOICES)
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    data = models.JSONField(default=dict, blank=True)
+    channels = models.JSONField(default=list)  # Channels still to deliver: ['in_app', 'email', 'websocket']
+    
+    # Optional idempotency key; a second event with the same key is dropped
+    dedupe_key = models.CharField(max_length=150, unique=True, null=True, blank=True)
+    
+    # Delivery state
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)  # Not retried before this time
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'notification_outbox'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'available_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} for user {self.user_id} ({self.status})"
+
+
+class NotificationPreference(models.Model):
+    """
+    Per-user delivery preferences.
+    Users without a row get settings.NOTIFICATIONS['DIGEST_DEFAULT'].
+    """
+    DIGEST_CHOICES = (
+        ('off', 'Off (email each notification)'),
+        ('daily', 'Daily'),
+        ('weekly', 'Weekly'),
+    )
+    
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='notification_preference')
+    digest_frequency = models.CharField(max_length=10, choices=DIGEST_CHOICES, default='daily')
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'notification_preferences'
+    
+    def __str__(self):
+        return f"{self.user.username}: {self.digest_frequency} digest"
+
+
+class NotificationDigest(models.Model):
+    """
+    Digests that have been sent; one per user per period
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notification_digests')
+    frequency = models.CharField(max_length=10)  # daily / weekly
+    period_start = models.DateField()
+    item_count = models.IntegerField(default=0)  # Notifications summarized
+    sent_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'notification_digests'
+        ordering = ['-period_start']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'frequency', 'period_start'], name='unique_notification_digest'),
+        ]
+    
+    def __str__(self):
+        return f"{self.frequency} digest for {self.user.username} ({self.period_start})"
@@ -0,0 +1,208 @@
+"""
+Notification outbox: publishing and the batch worker.
+
+Domain code calls notify()/notify_many() inside its own transaction; the
+notification is only an extra NotificationOutbox row, so it is committed
+(or rolled back) together with the change that caused it. After commit a
+drain task is nudged; Celery beat also runs it every minute, which picks
+up rows whose nudge was lost. drain_outbox() - run by that task or by
+``manage.py process_notification_outbox`` - claims pending rows with
+SKIP LOCKED, delivers them channel by channel through the configured
+backends and retries failed channels with exponential backoff.
+
+Users whose profile has notifications_enabled = False only receive the
+in-app notification; email and push are skipped. Users in digest mode get
+no individual email for DIGEST_KINDS (see digest.py).
+"""
+import logging
+import threading
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import NotificationOutbox
+
+logger = logging.getLogger(__name__)
+
+# Channels still delivered to users who turned notifications off
+ALWAYS_DELIVERED = ('in_app',)
+
+
+def notification_settings():
+    defaults = {
+        'BACKENDS': {
+            'in_app': 'apps.notifications.backends.InAppBackend',
+            'email': 'apps.notifications.backends.EmailBackend',
+            'websocket': 'apps.notifications.backends.WebSocketBackend',
+        },
+        'DEFAULT_CHANNELS': ['in_app', 'email', 'websocket'],
+        'BATCH_SIZE': 200,
+        'MAX_ATTEMPTS': 5,
+        'RETRY_BACKOFF': 30,  # seconds, doubled per attempt
+        'DISPATCH_ON_COMMIT': True,
+        'DIGEST_KINDS': ['exam_results', 'interview_evaluated'],
+        'DIGEST_DEFAULT': 'daily',
+        'DIGEST_BATCH_SIZE': 500,
+    }
+    defaults.update(getattr(settings, 'NOTIFICATIONS', {}))
+    return defaults
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(channel):
+    """Process-wide backend instance for ``channel``"""
+    backend = _backends.get(channel)
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get(channel)
+            if backend is None:
+                path = notification_settings()['BACKENDS'][channel]
+                backend = _backends[channel] = import_string(path)()
+    return backend
+
+
+def notify_many(events):
+    """
+    Queue notifications. ``events`` are dicts with user (or user_id), kind,
+    title, message and optional data, channels and dedupe_key. Events whose
+    dedupe_key already exists are dropped. Call inside the transaction of
+    the domain change.
+    """
+    config = notification_settings()
+    rows = [
+        NotificationOutbox(
+            user_id=event['user'].pk if 'user' in event else event['user_id'],
+            kind=event['kind'],
+            title=event['title'],
+            message=event['message'],
+            data=event.get('data', {}),
+            channels=list(event.get('channels') or config['DEFAULT_CHANNELS']),
+            dedupe_key=event.get('dedupe_key'),
+        )
+        for event in events
+    ]
+    if not rows:
+        return 0
+    NotificationOutbox.objects.bulk_create(rows, ignore_conflicts=True)
+    if config['DISPATCH_ON_COMMIT']:
+        transaction.on_commit(dispatch_drain)
+    return len(rows)
+
+
+def dispatch_drain():
+    """Nudge a drain; if the broker is down the rows wait for the scheduled drain"""
+    from .tasks import drain_notification_outbox_task
+    try:
+        drain_notification_outbox_task.delay()
+    except Exception as exc:
+        logger.warning('Could not dispatch the notification drain: %s', exc)
+
+
+def notify(user, kind, title, message, data=None, channels=None, dedupe_key=None):
+    return notify_many([{
+        'user': user,
+        'kind': kind,
+        'title': title,
+        'message': message,
+        'data': data or {},
+        'channels': channels,
+        'dedupe_key': dedupe_key,
+    }])
+
+
+def wants_notifications(user):
+    profile = getattr(user, 'profile', None)
+    return profile is None or profile.notifications_enabled
+
+
+def digest_frequency(user, config=None):
+    config = config or notification_settings()
+    preference = getattr(user, 'notification_preference', None)
+    return preference.digest_frequency if preference is not None else config['DIGEST_DEFAULT']
+
+
+def skipped_channels(entry, config):
+    """Channels of ``entry`` not delivered individually to this user"""
+    if not wants_notifications(entry.user):
+        return [c for c in entry.channels if c not in ALWAYS_DELIVERED]
+    if entry.kind in config['DIGEST_KINDS'] and digest_frequency(entry.user, config) != 'off':
+        # Summarized in the user's next digest instead (see digest.py)
+        return ['email']
+    return []
+
+
+def deliver_batch(entries, config):
+    """Deliver claimed rows and record per-row outcome; returns delivered count"""
+    order = list(config['BACKENDS'])
+    by_channel = defaultdict(list)
+    skipped = {}
+    for entry in entries:
+        skipped[entry.id] = skipped_channels(entry, config)
+        for channel in entry.channels:
+            if channel in skipped[entry.id]:
+                continue
+            by_channel[channel].append(entry)
+
+    failures = defaultdict(list)
+    errors = {}
+    for channel in sorted(by_channel, key=lambda c: order.index(c) if c in order else len(order)):
+        batch = by_channel[channel]
+        try:
+            # Savepoint: a failed INSERT rolls back this channel only
+            with transaction.atomic():
+                failed = get_backend(channel).deliver(batch)
+        except Exception as exc:
+            logger.warning('Notification backend %s failed for %d entries: %s', channel, len(batch), exc)
+            failed = batch
+            for entry in batch:
+                errors[entry.id] = f'{channel}: {exc}'
+        for entry in failed:
+            failures[entry.id].append(channel)
+            errors.setdefault(entry.id, f'{channel}: delivery failed')
+
+    now = timezone.now()
+    delivered = 0
+    for entry in entries:
+        entry.attempts += 1
+        if entry.id in failures:
+            entry.channels = failures[entry.id]
+            entry.last_error = errors[entry.id]
+            entry.status = 'failed' if entry.attempts >= config['MAX_ATTEMPTS'] else 'pending'
+            entry.available_at = now + timedelta(seconds=config['RETRY_BACKOFF'] * 2 ** (entry.attempts - 1))
+        else:
+            entry.channels = []
+            entry.status = 'delivered'
+            entry.delivered_at = now
+            delivered += 1
+    NotificationOutbox.objects.bulk_update(
+        entries, ['channels', 'status', 'attempts', 'last_error', 'available_at', 'delivered_at']
+    )
+    return delivered
+
+
+def drain_outbox(batch_size=None, max_batches=None):
+    """Deliver pending outbox rows in batches until none are due; returns delivered count"""
+    config = notification_settings()
+    batch_size = batch_size or config['BATCH_SIZE']
+    delivered = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            entries = list(
+                NotificationOutbox.objects.select_for_update(skip_locked=True, of=('self',))
+                .select_related('user__profile', 'user__notification_preference')
+                .filter(status='pending', available_at__lte=timezone.now())
+                .order_by('id')[:batch_size]
+            )
+            if not entries:
+                break
+            delivered += deliver_batch(entries, config)
+        batches += 1
+        if len(entries) < batch_size:
+            break
+    return delivered
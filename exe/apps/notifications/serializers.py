@@ -0,0 +1,19 @@
+from rest_framework import serializers
+from .models import Notification, NotificationPreference
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    """Serializer for in-app notifications"""
+    
+    class Meta:
+        model = Notification
+        fields = ['id', 'kind', 'title', 'message', 'data', 'is_read', 'read_at', 'created_at']
+
+
+class NotificationPreferenceSerializer(serializers.ModelSerializer):
+    """Serializer for notification delivery preferences"""
+    
+    class Meta:
+        model = NotificationPreference
+        fields = ['digest_frequency', 'updated_at']
+        read_only_fields = ['updated_at']
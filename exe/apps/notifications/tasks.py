@@ -0,0 +1,15 @@
+from celery import shared_task
+from .digest import send_digests
+from .outbox import drain_outbox
+
+
+@shared_task(acks_late=True)
+def drain_notification_outbox_task():
+    """Deliver pending notifications; concurrent runs claim disjoint rows"""
+    return drain_outbox()
+
+
+@shared_task
+def send_notification_digests_task(frequency):
+    """Send the daily or weekly digests (scheduled in CELERY_BEAT_SCHEDULE)"""
+    return send_digests(frequency)
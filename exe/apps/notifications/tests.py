@@ -1,3 +1,104 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from apps.users.models import User
+from .backends import InAppBackend
+from .digest import send_digests
+from .models import Notification, NotificationDigest, NotificationOutbox
+from .outbox import drain_outbox, notify
+from .unread import RedisUnreadCounter
 
-# Create your tests here.
+
+def fail_for(address):
+    original = EmailMessage.send
+
+    def send(message, *args, **kwargs):
+        if address in message.to:
+            raise OSError('mailbox unavailable')
+        return original(message, *args, **kwargs)
+    return send
+
+
+def failing_query(backend, entries):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1 / 0')
+
+
+class OutboxDeliveryTests(TestCase):
+
+    def setUp(self):
+        self.alice = User.objects.create_user('alice', 'alice@example.com', 'pass')
+        self.bob = User.objects.create_user('bob', 'bob@example.com', 'pass')
+
+    def test_failed_email_only_fails_its_own_entry(self):
+        for user in (self.alice, self.bob):
+            notify(user, 'general', 'Hello', 'Welcome', channels=['in_app', 'email'])
+
+        with mock.patch.object(EmailMessage, 'send', autospec=True, side_effect=fail_for('bob@example.com')), \
+                self.assertLogs('apps.notifications', 'WARNING'):
+            self.assertEqual(drain_outbox(), 1)
+
+        self.assertEqual([message.to for message in mail.outbox], [['alice@example.com']])
+        failed = NotificationOutbox.objects.get(user=self.bob)
+        self.assertEqual((failed.status, failed.channels), ('pending', ['email']))
+        self.assertEqual(NotificationOutbox.objects.get(user=self.alice).status, 'delivered')
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_database_error_in_a_backend_does_not_abort_the_drain(self):
+        notify(self.alice, 'general', 'Hello', 'Welcome', channels=['in_app', 'email'])
+
+        with mock.patch.object(InAppBackend, 'deliver', autospec=True, side_effect=failing_query), \
+                self.assertLogs('apps.notifications.outbox', 'WARNING'):
+            self.assertEqual(drain_outbox(), 0)
+
+        entry = NotificationOutbox.objects.get(user=self.alice)
+        self.assertEqual((entry.status, entry.channels, entry.attempts), ('pending', ['in_app'], 1))
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class RedisUnreadCounterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.client = mock.MagicMock()
+        self.client.get.return_value = None
+        self.client.set.return_value = True
+        self.counter = RedisUnreadCounter(self.client)
+
+    def test_recount_that_raced_a_new_notification_is_dropped(self):
+        with mock.patch('apps.notifications.unread.count_from_db', side_effect=[3, 4]):
+            self.assertEqual(self.counter.get(7), 4)
+        self.client.delete.assert_called_once_with('notif_unread:7')
+
+    def test_stable_recount_is_kept(self):
+        with mock.patch('apps.notifications.unread.count_from_db', side_effect=[3, 3]):
+            self.assertEqual(self.counter.get(7), 3)
+        self.client.delete.assert_not_called()
+
+
+class DigestTests(TestCase):
+
+    def setUp(self):
+        yesterday = timezone.now() - timedelta(days=1)
+        for name in ('carol', 'dave'):
+            user = User.objects.create_user(name, f'{name}@example.com', 'pass')
+            notification = Notification.objects.create(user=user, kind='exam_results', title='Results', message='Done')
+            Notification.objects.filter(pk=notification.pk).update(created_at=yesterday)
+
+    def test_digest_is_sent_once_per_period(self):
+        self.assertEqual(send_digests('daily'), 2)
+        self.assertEqual(send_digests('daily'), 0)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(NotificationDigest.objects.count(), 2)
+
+    def test_failed_digest_is_retried_by_the_next_run(self):
+        with mock.patch.object(EmailMessage, 'send', autospec=True, side_effect=fail_for('dave@example.com')), \
+                self.assertLogs('apps.notifications.digest', 'WARNING'):
+            self.assertEqual(send_digests('daily'), 1)
+        self.assertEqual(list(NotificationDigest.objects.values_list('user__username', flat=True)), ['carol'])
+
+        self.assertEqual(send_digests('daily'), 1)
+        self.assertEqual([message.to for message in mail.outbox], [['carol@example.com'], ['dave@example.com']])
@@ -0,0 +1,168 @@
+"""
+Unread notification counts.
+
+The count is cached per user (in Redis when available, otherwise in process
+with a short TTL) and kept current by increments when notifications are
+stored and decrements when they are read, so badges never need a COUNT
+query on the hot path. Increments only apply to counts already cached; a
+missing count is recomputed from the database on the next read, and
+counted a second time after it is stored so a change that raced the
+recount cannot leave a stale value behind.
+
+Changes are published to the user's channel group after the transaction
+commits, so every open tab updates without polling.
+"""
+import logging
+import threading
+import time
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.utils import timezone
+from exe.redis_client import get_redis
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+TTL = 24 * 3600
+LOCAL_TTL = 30
+
+# INCRBY that leaves a missing key missing (it will be recounted on read)
+INCR_IF_EXISTS = """
+if redis.call('exists', KEYS[1]) == 1 then
+    return redis.call('incrby', KEYS[1], ARGV[1])
+end
+return nil
+"""
+
+
+def user_group(user_id):
+    """Channel group that receives one user's notifications"""
+    return f'notifications_user_{user_id}'
+
+
+def count_from_db(user_id):
+    return Notification.objects.filter(user_id=user_id, is_read=False).count()
+
+
+class RedisUnreadCounter:
+    """Shared counts in Redis: notif_unread:{user_id}"""
+
+    def __init__(self, client):
+        self.client = client
+        self.incr_script = client.register_script(INCR_IF_EXISTS)
+
+    def key(self, user_id):
+        return f'notif_unread:{user_id}'
+
+    def get(self, user_id):
+        value = self.client.get(self.key(user_id))
+        if value is not None:
+            return max(int(value), 0)
+        count = count_from_db(user_id)
+        if self.client.set(self.key(user_id), count, ex=TTL, nx=True):
+            # A notification committed between the COUNT and the SET had its
+            # increment dropped (the key was missing); count again and leave
+            # the key missing if anything changed
+            recount = count_from_db(user_id)
+            if recount != count:
+                self.client.delete(self.key(user_id))
+                return recount
+        return count
+
+    def incr(self, user_id, amount):
+        self.incr_script(keys=[self.key(user_id)], args=[amount])
+
+    def reset(self, user_id):
+        self.client.delete(self.key(user_id))
+
+
+class LocalUnreadCounter:
+    """Per-process fallback; the short TTL bounds drift between processes"""
+
+    def __init__(self):
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        with self.lock:
+            cached = self.counts.get(user_id)
+            if cached is not None and cached[1] > time.monotonic():
+                return max(cached[0], 0)
+        count = count_from_db(user_id)
+        with self.lock:
+            self.counts[user_id] = (count, time.monotonic() + LOCAL_TTL)
+        return count
+
+    def incr(self, user_id, amount):
+        with self.lock:
+            cached = self.counts.get(user_id)
+            if cached is not None:
+                self.counts[user_id] = (cached[0] + amount, cached[1])
+
+    def reset(self, user_id):
+        with self.lock:
+            self.counts.pop(user_id, None)
+
+
+_local_counter = LocalUnreadCounter()
+
+
+def get_unread_counter():
+    """Return the Redis counter if Redis is available, else the in-process one"""
+    client = get_redis()
+    if client is not None:
+        return RedisUnreadCounter(client)
+    return _local_counter
+
+
+def unread_count(user_id):
+    return get_unread_counter().get(user_id)
+
+
+def publish(user_id, event):
+    """Best-effort send of ``event`` to the user's group"""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(user_group(user_id), event)
+    except Exception as exc:
+        logger.warning('Could not publish to user %s: %s', user_id, exc)
+
+
+def publish_unread_count(user_id):
+    publish(user_id, {'type': 'unread.count', 'count': unread_count(user_id)})
+
+
+def record_created(counts):
+    """After commit, add newly stored notifications ({user_id: n}) to the cached counts"""
+    def apply():
+        counter = get_unread_counter()
+        for user_id, amount in counts.items():
+            counter.incr(user_id, amount)
+    transaction.on_commit(apply)
+
+
+def mark_read(user_id, notification_ids=None):
+    """
+    Mark the user's notifications (all of them when ``notification_ids`` is
+    None) as read. Returns the number changed; the new count is published
+    after commit.
+    """
+    queryset = Notification.objects.filter(user_id=user_id, is_read=False)
+    if notification_ids is not None:
+        queryset = queryset.filter(id__in=notification_ids)
+    updated = queryset.update(is_read=True, read_at=timezone.now())
+
+    def apply():
+        counter = get_unread_counter()
+        if notification_ids is None:
+            # Recount rather than assume zero: new notifications may have raced in
+            counter.reset(user_id)
+        elif updated:
+            counter.incr(user_id, -updated)
+        publish_unread_count(user_id)
+    if updated or notification_ids is None:
+        transaction.on_commit(apply)
+    return updated
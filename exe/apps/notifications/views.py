@@ -1,3 +1,76 @@
-from django.shortcuts import render
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from .models import Notification, NotificationPreference
+from .outbox import notification_settings
+from .serializers import NotificationSerializer, NotificationPreferenceSerializer
+from .unread import mark_read, unread_count
 
-# Create your views here.
+
+class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for the user's in-app notifications
+    """
+    serializer_class = NotificationSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        queryset = Notification.objects.filter(user=self.request.user)
+        
+        if self.request.query_params.get('unread') in ('1', 'true'):
+            queryset = queryset.filter(is_read=False)
+        
+        kind = self.request.query_params.get('kind')
+        if kind:
+            queryset = queryset.filter(kind=kind)
+        
+        return queryset
+    
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        """
+        Get the number of unread notifications
+        GET /api/v1/notifications/unread_count/
+        """
+        return Response({'unread_count': unread_count(request.user.id)})
+    
+    @action(detail=True, methods=['post'])
+    def mark_read(self, request, pk=None):
+        """
+        Mark one notification as read
+        POST /api/v1/notifications/{id}/mark_read/
+        """
+        notification = self.get_object()
+        if mark_read(request.user.id, [notification.id]):
+            notification.refresh_from_db(fields=['is_read', 'read_at'])
+        return Response(NotificationSerializer(notification).data)
+    
+    @action(detail=False, methods=['post'])
+    def mark_all_read(self, request):
+        """
+        Mark all notifications as read
+        POST /api/v1/notifications/mark_all_read/
+        """
+        updated = mark_read(request.user.id)
+        return Response({
+            'message': 'Notifications marked as read',
+            'updated': updated
+        }, status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['get', 'patch'])
+    def preferences(self, request):
+        """
+        Get or update notification preferences
+        GET/PATCH /api/v1/notifications/preferences/
+        Body: {"digest_frequency": "off" | "daily" | "weekly"}
+        """
+        preference, _ = NotificationPreference.objects.get_or_create(
+            user=request.user,
+            defaults={'digest_frequency': notification_settings()['DIGEST_DEFAULT']}
+        )
+        if request.method == 'PATCH':
+            serializer = NotificationPreferenceSerializer(preference, data=request.data, partial=True)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        return Response(NotificationPreferenceSerializer(preference).data)
@@ -88,10 +88,10 @@ class PaymentAdmin(admin.ModelAdmin):
     list_filter = ['status', 'payment_method', 'currency', 'created_at']
     search_fields = [
         'transaction_id', 'user__username', 'user__email',
-        'razorpay_payment_id', 'stripe_payment_intent_id'
+        'razorpay_payment_id', 'stripe_payment_intent_id', 'idempotency_key'
     ]
     readonly_fields = [
-        'transaction_id', 'paid_at', 'refunded_at',
+        'transaction_id', 'idempotency_key', 'paid_at', 'refunded_at',
         'created_at', 'updated_at'
     ]
     date_hierarchy = 'created_at'
@@ -108,7 +108,7 @@ class PaymentAdmin(admin.ModelAdmin):
         ('Payment Gateway Info', {
             'fields': (
                 'stripe_payment_intent_id', 'razorpay_payment_id',
-                'razorpay_order_id', 'metadata'
+                'razorpay_order_id', 'idempotency_key', 'metadata'
             ),
             'classes': ('collapse',)
         }),
@@ -0,0 +1,231 @@
+"""
+Billing cycle job: bill due subscriptions and expire lapsed ones.
+
+run_billing_cycle() makes two passes, each in keyset-paginated batches with
+one transaction per batch:
+
+1. Renewals walk the (status, next_billing_date) index over active
+   recurring subscriptions due at the cutoff. Per batch it bulk-creates the
+   pending renewal Payments, then rolls next_billing_date one period and
+   marks the subscriptions past_due with one UPDATE per billing period.
+   end_date and the usage counters are left alone: complete_renewal()
+   extends and resets them once the payment is confirmed. That reset is one
+   conditional UPDATE per confirmed payment rather than set-wise per batch,
+   because it has to wait for each user's payment. A past_due subscription is
+   not billed again, so it owes at most one payment; one already more than
+   GRACE_DAYS overdue when the job first sees it is expired unbilled.
+2. Expiry marks active, trial and cancelled subscriptions whose end_date
+   has passed, and past_due ones GRACE_DAYS after it, as expired,
+   set-wise, and cancels their pending renewal payments.
+
+Celery beat runs the job hourly (CELERY_BEAT_SCHEDULE); manage.py
+run_billing_cycle runs it by hand.
+
+Users touched by a batch get is_premium/subscription_end_date recomputed
+in a single UPDATE, and their cached entitlements are dropped.
+
+Renewal payments have a deterministic transaction_id (subscription and
+billing date), and every UPDATE re-checks the condition that selected the
+row. A crashed or repeated run therefore resumes where the last committed
+batch stopped, without duplicate payments or double rolls. Rows are
+claimed with SKIP LOCKED, so concurrent runs split the work.
+"""
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, F, Max, OuterRef, Q, Subquery
+from django.utils import timezone
+from apps.users.models import User
+from .entitlements import invalidate_many
+from .models import Payment, Subscription
+
+BILLING_PERIODS = {
+    'monthly': timedelta(days=30),
+    'quarterly': timedelta(days=90),
+    'yearly': timedelta(days=365),
+}
+
+EXPIRING_STATUSES = ('active', 'trial', 'cancelled')
+
+
+def billing_settings():
+    defaults = {
+        'BATCH_SIZE': 500,
+        'GRACE_DAYS': 7,  # past_due subscriptions are expired this long after end_date
+    }
+    defaults.update(getattr(settings, 'BILLING', {}))
+    return defaults
+
+
+def renewal_transaction_id(subscription):
+    return f"RENEW-{subscription.id}-{subscription.next_billing_date:%Y%m%d}"
+
+
+def sync_users(user_ids, now):
+    """Recompute is_premium/subscription_end_date of ``user_ids`` in one UPDATE"""
+    if not user_ids:
+        return
+    active = Subscription.objects.filter(
+        Q(end_date__isnull=True) | Q(end_date__gt=now),
+        user_id=OuterRef('pk'),
+        status__in=['active', 'trial'],
+    )
+    User.objects.filter(pk__in=user_ids).update(
+        is_premium=Exists(active),
+        subscription_end_date=Subquery(
+            active.order_by().values('user_id').annotate(end=Max('end_date')).values('end')[:1]
+        ),
+    )
+    invalidate_many(user_ids)
+
+
+def lapsed(cutoff, grace):
+    """Subscriptions to expire at ``cutoff``"""
+    return (
+        Q(status__in=EXPIRING_STATUSES, end_date__lte=cutoff)
+        | Q(status='past_due', end_date__lte=cutoff - grace)
+    )
+
+
+def renew_batch(cutoff, after, batch_size, grace):
+    """
+    Bill one batch of subscriptions due at ``cutoff`` past the keyset
+    position ``after`` ((next_billing_date, id) or None). Returns
+    (billed count, keyset position of the last row or None when done).
+    """
+    queryset = (
+        Subscription.objects.select_for_update(skip_locked=True, of=('self',))
+        .select_related('plan')
+        .filter(
+            status='active',
+            next_billing_date__lte=cutoff,
+            next_billing_date__gt=cutoff - grace,
+            plan__plan_type='subscription',
+            plan__billing_period__in=list(BILLING_PERIODS),
+        )
+        .order_by('next_billing_date', 'id')
+    )
+    if after is not None:
+        last_date, last_id = after
+        queryset = queryset.filter(
+            Q(next_billing_date__gt=last_date) | Q(next_billing_date=last_date, id__gt=last_id)
+        )
+
+    with transaction.atomic():
+        batch = list(queryset[:batch_size])
+        if not batch:
+            return 0, None
+
+        Payment.objects.bulk_create([
+            Payment(
+                user_id=subscription.user_id,
+                subscription=subscription,
+                plan=subscription.plan,
+                amount=subscription.plan.price,
+                currency=subscription.plan.currency,
+                status='pending',
+                transaction_id=renewal_transaction_id(subscription),
+                description=f"Renewal: {subscription.plan.name}",
+                metadata={
+                    'renewal': True,
+                    'billing_date': subscription.next_billing_date.isoformat(),
+                    'period_end': (
+                        subscription.next_billing_date + BILLING_PERIODS[subscription.plan.billing_period]
+                    ).isoformat(),
+                },
+            )
+            for subscription in batch
+        ], ignore_conflicts=True)
+
+        by_period = {}
+        for subscription in batch:
+            by_period.setdefault(subscription.plan.billing_period, []).append(subscription.id)
+        billed = 0
+        for period, ids in by_period.items():
+            billed += Subscription.objects.filter(
+                pk__in=ids, status='active', next_billing_date__lte=cutoff
+            ).update(
+                status='past_due',
+                next_billing_date=F('next_billing_date') + BILLING_PERIODS[period],
+                updated_at=timezone.now(),
+            )
+
+        sync_users({subscription.user_id for subscription in batch}, cutoff)
+
+    last = batch[-1]
+    return billed, (last.next_billing_date, last.id)
+
+
+def expire_batch(cutoff, after_id, batch_size, grace):
+    """Expire one batch of lapsed subscriptions; returns (expired count, last id or None)"""
+    with transaction.atomic():
+        batch = list(
+            Subscription.objects.select_for_update(skip_locked=True)
+            .filter(lapsed(cutoff, grace), id__gt=after_id)
+            .order_by('id')
+            .values_list('id', 'user_id')[:batch_size]
+        )
+        if not batch:
+            return 0, None
+        ids = [pk for pk, _ in batch]
+        now = timezone.now()
+        expired = Subscription.objects.filter(lapsed(cutoff, grace), pk__in=ids).update(
+            status='expired', updated_at=now
+        )
+        # A renewal can no longer be paid once its subscription has expired
+        Payment.objects.filter(
+            subscription_id__in=ids, subscription__status='expired', status='pending', metadata__renewal=True
+        ).update(status='cancelled', updated_at=now)
+        sync_users({user_id for _, user_id in batch}, cutoff)
+    return expired, batch[-1][0]
+
+
+def complete_renewal(payment):
+    """
+    Extend the subscription of a confirmed renewal ``payment`` to the end of
+    the period it paid for, reactivate it and reset its usage counters.
+    Conditional on end_date, so confirming twice extends once. Returns
+    whether the subscription was extended.
+    """
+    metadata = payment.metadata or {}
+    if not metadata.get('renewal') or 'period_end' not in metadata or payment.subscription_id is None:
+        return False
+    now = timezone.now()
+    extended = Subscription.objects.filter(
+        pk=payment.subscription_id,
+        status__in=['active', 'past_due'],
+        end_date__lt=datetime.fromisoformat(metadata['period_end']),
+    ).update(
+        status='active',
+        end_date=datetime.fromisoformat(metadata['period_end']),
+        exams_used=0,
+        interviews_used=0,
+        updated_at=now,
+    )
+    if extended:
+        sync_users([payment.user_id], now)
+    return bool(extended)
+
+
+def run_billing_cycle(now=None, batch_size=None):
+    """Bill due subscriptions, then expire lapsed ones; returns counts"""
+    config = billing_settings()
+    cutoff = now or timezone.now()
+    batch_size = batch_size or config['BATCH_SIZE']
+    grace = timedelta(days=config['GRACE_DAYS'])
+    stats = {'billed': 0, 'expired': 0}
+
+    position = None
+    while True:
+        billed, position = renew_batch(cutoff, position, batch_size, grace)
+        stats['billed'] += billed
+        if position is None:
+            break
+
+    last_id = 0
+    while True:
+        expired, last_id = expire_batch(cutoff, last_id, batch_size, grace)
+        stats['expired'] += expired
+        if last_id is None:
+            break
+    return stats
@@ -0,0 +1,219 @@
+"""
+Per-user entitlements: what the user's current plan allows.
+
+resolve() folds the newest active subscription and its plan into a small
+Entitlement record (plan, limits, feature flags, expiry) with one query and
+caches it per user - in Redis when available, otherwise in process with a
+short TTL. EntitlementMiddleware exposes it lazily as
+``request.entitlements``, so gated endpoints read plan features without
+touching the subscription or plan tables: premium exams and interview
+templates (is_premium), AI-evaluated interviews (ai_feedback_enabled) and
+performance trends (advanced_analytics). Refusals use FEATURE_ERRORS and
+PREMIUM_ERROR with a 403.
+
+Cached records never outlive the subscription's end_date, and are dropped
+after commit whenever a Subscription or Payment of the user changes
+(signals.py; bulk jobs call invalidate_many()). Usage counters are not
+part of the record; quotas are enforced by metering.consume().
+"""
+import json
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from exe.redis_client import get_redis
+from .metering import active_subscriptions
+
+logger = logging.getLogger(__name__)
+
+REDIS_PREFIX = 'entitlements:'
+
+FEATURES = ('ai_feedback_enabled', 'advanced_analytics', 'priority_support')
+
+FEATURE_ERRORS = {
+    'ai_feedback_enabled': 'Your plan does not include AI feedback',
+    'advanced_analytics': 'Your plan does not include advanced analytics',
+    'priority_support': 'Your plan does not include priority support',
+}
+
+PREMIUM_ERROR = 'This content requires a premium plan'
+
+
+def entitlement_settings():
+    defaults = {
+        'TTL': 3600,
+        'LOCAL_TTL': 30,
+        # Features of users without an active subscription
+        'FREE_FEATURES': {'ai_feedback_enabled': True, 'advanced_analytics': False, 'priority_support': False},
+    }
+    defaults.update(getattr(settings, 'ENTITLEMENTS', {}))
+    return defaults
+
+
+@dataclass(frozen=True)
+class Entitlement:
+    user_id: int
+    is_premium: bool = False
+    plan_id: int = None
+    plan_name: str = ''
+    subscription_id: int = None
+    status: str = ''
+    max_exams: int = None  # None = unlimited
+    max_interviews: int = None
+    ai_feedback_enabled: bool = False
+    advanced_analytics: bool = False
+    priority_support: bool = False
+    expires_at: datetime = None
+
+    def has_feature(self, feature):
+        return bool(getattr(self, feature))
+
+    def to_dict(self):
+        data = asdict(self)
+        data['expires_at'] = self.expires_at.isoformat() if self.expires_at else None
+        return data
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def from_json(cls, raw):
+        data = json.loads(raw)
+        if data.get('expires_at'):
+            data['expires_at'] = datetime.fromisoformat(data['expires_at'])
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in names})
+
+
+def compute(user):
+    """Entitlement of ``user`` from the database (one query)"""
+    subscription = (
+        active_subscriptions(user.pk).select_related('plan').order_by('-created_at').first()
+    )
+    if subscription is None:
+        return Entitlement(
+            user_id=user.pk,
+            is_premium=user.is_premium,
+            expires_at=user.subscription_end_date if user.is_premium else None,
+            **entitlement_settings()['FREE_FEATURES'],
+        )
+    plan = subscription.plan
+    return Entitlement(
+        user_id=user.pk,
+        is_premium=True,
+        plan_id=plan.id,
+        plan_name=plan.name,
+        subscription_id=subscription.id,
+        status=subscription.status,
+        max_exams=plan.max_exams,
+        max_interviews=plan.max_interviews,
+        expires_at=subscription.end_date,
+        **{feature: getattr(plan, feature) for feature in FEATURES},
+    )
+
+
+def cache_ttl(entitlement, ttl):
+    """``ttl`` capped so a record is never served past its expiry"""
+    if entitlement.expires_at is None:
+        return ttl
+    remaining = int((entitlement.expires_at - timezone.now()).total_seconds())
+    return max(min(ttl, remaining), 0)
+
+
+class RedisEntitlementCache:
+    def __init__(self, client):
+        self.client = client
+
+    def key(self, user_id):
+        return f'{REDIS_PREFIX}{user_id}'
+
+    def get(self, user_id):
+        raw = self.client.get(self.key(user_id))
+        return Entitlement.from_json(raw) if raw is not None else None
+
+    def set(self, entitlement, ttl):
+        if ttl > 0:
+            self.client.set(self.key(entitlement.user_id), entitlement.to_json(), ex=ttl)
+
+    def delete_many(self, user_ids):
+        if user_ids:
+            self.client.delete(*[self.key(user_id) for user_id in user_ids])
+
+
+class LocalEntitlementCache:
+    """Per-process fallback; the short TTL bounds staleness in other processes"""
+
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        with self.lock:
+            cached = self.entries.get(user_id)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+        return None
+
+    def set(self, entitlement, ttl):
+        ttl = min(ttl, entitlement_settings()['LOCAL_TTL'])
+        if ttl > 0:
+            with self.lock:
+                self.entries[entitlement.user_id] = (entitlement, time.monotonic() + ttl)
+
+    def delete_many(self, user_ids):
+        with self.lock:
+            for user_id in user_ids:
+                self.entries.pop(user_id, None)
+
+
+_local_cache = LocalEntitlementCache()
+
+
+def get_entitlement_cache():
+    """Return the Redis cache if Redis is available, else the in-process one"""
+    client = get_redis()
+    if client is not None:
+        return RedisEntitlementCache(client)
+    return _local_cache
+
+
+def resolve(user):
+    """Cached entitlement of ``user``; anonymous users get None"""
+    if not user or not user.is_authenticated:
+        return None
+    cache = get_entitlement_cache()
+    try:
+        entitlement = cache.get(user.pk)
+    except Exception as exc:
+        logger.warning('Entitlement cache read failed for user %s: %s', user.pk, exc)
+        entitlement = None
+    if entitlement is not None:
+        return entitlement
+
+    entitlement = compute(user)
+    try:
+        cache.set(entitlement, cache_ttl(entitlement, entitlement_settings()['TTL']))
+    except Exception as exc:
+        logger.warning('Entitlement cache write failed for user %s: %s', user.pk, exc)
+    return entitlement
+
+
+def invalidate_many(user_ids):
+    """Drop the cached entitlements of ``user_ids`` once the transaction commits"""
+    user_ids = list(set(user_ids))
+
+    def apply():
+        try:
+            get_entitlement_cache().delete_many(user_ids)
+        except Exception as exc:
+            logger.warning('Entitlement cache invalidation failed: %s', exc)
+    if user_ids:
+        transaction.on_commit(apply)
+
+
+def invalidate(user_id):
+    invalidate_many([user_id])
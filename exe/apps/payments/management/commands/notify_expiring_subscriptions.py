@@ -0,0 +1,35 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from apps.notifications.events import subscriptions_expiring
+from apps.payments.models import Subscription
+
+
+class Command(BaseCommand):
+    help = 'Notify users whose subscription ends within the next few days'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=3, help='Look-ahead window in days')
+        parser.add_argument('--batch-size', type=int, default=500, help='Subscriptions per transaction')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        queryset = Subscription.objects.filter(
+            status__in=['active', 'trial'],
+            end_date__gt=now,
+            end_date__lte=now + timedelta(days=options['days']),
+        ).select_related('plan').order_by('id')
+
+        queued = 0
+        last_id = 0
+        while True:
+            batch = list(queryset.filter(id__gt=last_id)[:options['batch_size']])
+            if not batch:
+                break
+            # Dedupe keys include the end date, so reruns do not notify twice
+            with transaction.atomic():
+                queued += subscriptions_expiring(batch)
+            last_id = batch[-1].id
+
+        self.stdout.write(self.style.SUCCESS(f'Queued {queued} subscription expiry notifications'))
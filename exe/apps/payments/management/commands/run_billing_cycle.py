@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from apps.payments.billing import run_billing_cycle
+
+
+class Command(BaseCommand):
+    help = 'Bill subscriptions that are due for renewal and expire lapsed ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Subscriptions per transaction')
+
+    def handle(self, *args, **options):
+        stats = run_billing_cycle(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Billed {stats['billed']} renewals, expired {stats['expired']} subscriptions"
+        ))
@@ -0,0 +1,57 @@
+"""
+Plan quota metering.
+
+consume() checks and increments a user's quota in one conditional UPDATE on
+their current subscription (``WHERE exams_used < max_exams``), so the check
+cannot go stale between read and write and concurrent requests cannot both
+take the last slot. Only a refused UPDATE costs a second query, to tell an
+exhausted quota from a user without a subscription. Users without an
+active subscription are not metered; premium content is gated separately.
+"""
+from django.db.models import F, Q, Subquery
+from django.utils import timezone
+from .models import Subscription
+
+ACTIVE_STATUSES = ('active', 'trial')
+
+QUOTA_ERRORS = {
+    'exams': 'You have used all exams included in your plan for this billing period',
+    'interviews': 'You have used all interviews included in your plan for this billing period',
+}
+
+
+def active_subscriptions(user_id, now=None):
+    """Subscriptions of the user that are currently active (see Subscription.is_active)"""
+    now = now or timezone.now()
+    return Subscription.objects.filter(
+        Q(end_date__isnull=True) | Q(end_date__gt=now),
+        user_id=user_id,
+        status__in=ACTIVE_STATUSES,
+    )
+
+
+def current_subscription(user_id, now=None):
+    """Queryset of the user's newest active subscription, usable as a subquery"""
+    return active_subscriptions(user_id, now).order_by('-created_at').values('pk')[:1]
+
+
+def consume(user_id, resource):
+    """Use one ``resource`` ('exams' or 'interviews'); False if the quota is exhausted"""
+    now = timezone.now()
+    used, _ = Subscription.QUOTAS[resource]
+    updated = Subscription.objects.filter(
+        pk=Subquery(current_subscription(user_id, now)),
+        **Subscription.within_quota(resource),
+    ).update(**{used: F(used) + 1, 'updated_at': now})
+    if updated:
+        return True
+    return not active_subscriptions(user_id, now).exists()
+
+
+def release(user_id, resource):
+    """Give back one ``resource`` taken by consume() when the action failed"""
+    used, _ = Subscription.QUOTAS[resource]
+    now = timezone.now()
+    Subscription.objects.filter(
+        pk=Subquery(current_subscription(user_id, now)), **{f'{used}__gt': 0}
+    ).update(**{used: F(used) - 1, 'updated_at': now})
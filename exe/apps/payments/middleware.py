@@ -0,0 +1,18 @@
+from django.utils.functional import SimpleLazyObject
+from .entitlements import resolve
+
+
+class EntitlementMiddleware:
+    """
+    Sets ``request.entitlements`` to the user's cached Entitlement (None for
+    anonymous users). It is resolved on first access, after DRF has
+    authenticated the request, so JWT users are covered and endpoints that
+    never look at it pay nothing.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.entitlements = SimpleLazyObject(lambda: resolve(getattr(request, 'user', None)))
+        return self.get_response(request)
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from django.utils import timezone
 from decimal import Decimal
@@ -114,15 +116,47 @@ class Subscription(models.Model):
             return True
         return self.interviews_used < self.plan.max_interviews
     
+    # resource -> (usage counter, plan limit)
+    QUOTAS = {
+        'exams': ('exams_used', 'max_exams'),
+        'interviews': ('interviews_used', 'max_interviews'),
+    }
+    
+    UNLIMITED = 2 ** 31 - 1  # Stand-in for a null (unlimited) plan limit
+    
+    @classmethod
+    def within_quota(cls, resource):
+        """
+        Filter kwargs matching subscriptions that can still use one more
+        ``resource``. The plan limit is a correlated subquery rather than a
+        join, so an UPDATE using it stays a plain single-table UPDATE whose
+        condition is re-checked against the locked row.
+        """
+        used, limit = cls.QUOTAS[resource]
+        plan_limit = Subquery(PaymentPlan.objects.filter(pk=OuterRef('plan_id')).order_by().values(limit)[:1])
+        return {f'{used}__lt': Coalesce(plan_limit, Value(cls.UNLIMITED))}
+    
+    def consume(self, resource):
+        """
+        Use one ``resource`` if the plan allows it, as a single conditional
+        UPDATE so concurrent requests cannot overshoot the limit.
+        Returns False when the quota is exhausted.
+        """
+        used, _ = self.QUOTAS[resource]
+        updated = Subscription.objects.filter(
+            pk=self.pk, **Subscription.within_quota(resource)
+        ).update(**{used: F(used) + 1, 'updated_at': timezone.now()})
+        if updated:
+            self.refresh_from_db(fields=[used, 'updated_at'])
+        return bool(updated)
+    
     def increment_exam_usage(self):
-        """Increment exam usage counter"""
-        self.exams_used += 1
-        self.save(update_fields=['exams_used', 'updated_at'])
+        """Increment exam usage counter; False if the plan limit is reached"""
+        return self.consume('exams')
     
     def increment_interview_usage(self):
-        """Increment interview usage counter"""
-        self.interviews_used += 1
-        self.save(update_fields=['interviews_used', 'updated_at'])
+        """Increment interview usage counter; False if the plan limit is reached"""
+        return self.consume('interviews')
     
     def reset_usage(self):
         """Reset usage counters (for new billing period)"""
@@ -167,6 +201,10 @@ class Payment(models.Model):
     razorpay_payment_id = models.CharField(max_length=255, null=True, blank=True)
     razorpay_order_id = models.CharField(max_length=255, null=True, blank=True)
     
+    # Key of the confirmation that completed the payment (Idempotency-Key or gateway payment id);
+    # unique per user, so one key can never complete two of the user's payments
+    idempotency_key = models.CharField(max_length=255, null=True, blank=True)
+    
     # Additional info
     description = models.TextField(null=True, blank=True)
     metadata = models.JSONField(default=dict, blank=True)
@@ -185,15 +223,18 @@ class Payment(models.Model):
             models.Index(fields=['transaction_id']),
             models.Index(fields=['status', 'created_at']),
         ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'idempotency_key'], name='unique_payment_idempotency_key'),
+        ]
     
     def __str__(self):
         return f"Payment {self.transaction_id} - {self.user.username} - {self.amount} {self.currency}"
     
-    def mark_completed(self):
-        """Mark payment as completed"""
+    def mark_completed(self, extra_fields=()):
+        """Mark payment as completed, also saving ``extra_fields`` set by the caller"""
         self.status = 'completed'
         self.paid_at = timezone.now()
-        self.save(update_fields=['status', 'paid_at', 'updated_at'])
+        self.save(update_fields=['status', 'paid_at', 'updated_at', *extra_fields])
     
     def mark_failed(self, error_message=None):
         """Mark payment as failed"""
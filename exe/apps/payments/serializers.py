@@ -179,18 +179,11 @@ class PaymentConfirmSerializer(serializers.Serializer):
     razorpay_payment_id = serializers.CharField(required=False, allow_blank=True)
     razorpay_order_id = serializers.CharField(required=False, allow_blank=True)
     stripe_payment_intent_id = serializers.CharField(required=False, allow_blank=True)
+    # Optional; the Idempotency-Key header takes precedence
+    idempotency_key = serializers.CharField(required=False, allow_blank=True, max_length=255)
     
-    def validate_payment_id(self, value):
-        """Validate payment exists and belongs to user"""
-        try:
-            payment = Payment.objects.get(id=value)
-            if payment.user != self.context['request'].user:
-                raise serializers.ValidationError("Payment does not belong to you")
-            if payment.status not in ['pending', 'processing']:
-                raise serializers.ValidationError("Payment cannot be confirmed")
-            return value
-        except Payment.DoesNotExist:
-            raise serializers.ValidationError("Payment not found")
+    # Ownership and status are checked by the view under the row lock, so
+    # retried confirmations of a completed payment succeed instead of failing here
 
 
 class InvoiceSerializer(serializers.ModelSerializer):
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .entitlements import invalidate
+from .models import Payment, Subscription
+
+
+@receiver([post_save, post_delete], sender=Subscription)
+@receiver([post_save, post_delete], sender=Payment)
+def invalidate_entitlements(sender, instance, **kwargs):
+    """Plan, status or payment changes can change what the user is entitled to"""
+    invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_entitlements(sender, instance, created, **kwargs):
+    """is_premium/subscription_end_date feed the entitlement of users without a subscription"""
+    if not created:
+        invalidate(instance.pk)
@@ -0,0 +1,8 @@
+from celery import shared_task
+from .billing import run_billing_cycle
+
+
+@shared_task
+def run_billing_cycle_task():
+    """Bill due subscriptions and expire lapsed ones (safe to run repeatedly)"""
+    return run_billing_cycle()
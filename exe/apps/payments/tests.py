@@ -1,3 +1,256 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+from django.db import IntegrityError, connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.users.models import User
+from . import entitlements, metering
+from .billing import complete_renewal, run_billing_cycle
+from .models import Invoice, Payment, PaymentPlan, Subscription
 
-# Create your tests here.
+
+def subscribe(user, **limits):
+    plan = PaymentPlan.objects.create(name='Pro', description='', price=Decimal('10.00'), **limits)
+    return Subscription.objects.create(user=user, plan=plan, status='active')
+
+
+class MeteringTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('metered', 'metered@example.com', 'pass')
+
+    def test_consume_stops_at_the_plan_limit(self):
+        subscription = subscribe(self.user, max_interviews=2)
+        self.assertEqual([metering.consume(self.user.id, 'interviews') for _ in range(3)], [True, True, False])
+        subscription.refresh_from_db()
+        self.assertEqual(subscription.interviews_used, 2)
+
+        metering.release(self.user.id, 'interviews')
+        self.assertTrue(metering.consume(self.user.id, 'interviews'))
+        self.assertFalse(metering.consume(self.user.id, 'interviews'))
+
+    def test_quotas_are_counted_separately(self):
+        subscribe(self.user, max_interviews=1, max_exams=0)
+        self.assertFalse(metering.consume(self.user.id, 'exams'))
+        self.assertTrue(metering.consume(self.user.id, 'interviews'))
+
+    def test_unlimited_plan_and_unsubscribed_users_are_not_refused(self):
+        self.assertTrue(metering.consume(self.user.id, 'interviews'))
+        subscription = subscribe(self.user)
+        for _ in range(5):
+            self.assertTrue(metering.consume(self.user.id, 'interviews'))
+        subscription.refresh_from_db()
+        self.assertEqual(subscription.interviews_used, 5)
+
+    def test_expired_subscription_is_not_metered(self):
+        subscription = subscribe(self.user, max_interviews=0)
+        self.assertFalse(metering.consume(self.user.id, 'interviews'))
+        Subscription.objects.filter(pk=subscription.pk).update(status='expired')
+        self.assertTrue(metering.consume(self.user.id, 'interviews'))
+
+
+class ConcurrentMeteringTests(TransactionTestCase):
+
+    def test_concurrent_requests_cannot_overshoot_the_limit(self):
+        user = User.objects.create_user('racer', 'racer@example.com', 'pass')
+        subscription = subscribe(user, max_interviews=3)
+        results = []
+        barrier = threading.Barrier(8)
+
+        def take():
+            try:
+                barrier.wait(5)
+                results.append(metering.consume(user.id, 'interviews'))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=take) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+
+        self.assertEqual(sorted(results), [False] * 5 + [True] * 3)
+        subscription.refresh_from_db()
+        self.assertEqual(subscription.interviews_used, 3)
+
+
+class BillingCycleTests(TestCase):
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.due = self.now - timedelta(days=1)
+        self.user = User.objects.create_user('renewer', 'renewer@example.com', 'pass')
+        self.subscription = subscribe(self.user, max_interviews=5)
+        Subscription.objects.filter(pk=self.subscription.pk).update(
+            end_date=self.due, next_billing_date=self.due, interviews_used=3
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def confirm(self, payment, key='renewal-1'):
+        return self.client.post(
+            '/api/v1/payments/confirm_payment/', {'payment_id': payment.id}, format='json', HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_due_subscription_is_billed_once_and_not_extended(self):
+        self.assertEqual(run_billing_cycle(self.now), {'billed': 1, 'expired': 0})
+        self.assertEqual(run_billing_cycle(self.now), {'billed': 0, 'expired': 0})
+
+        self.subscription.refresh_from_db()
+        self.assertEqual(self.subscription.status, 'past_due')
+        self.assertEqual(self.subscription.end_date, self.due)
+        self.assertEqual(self.subscription.next_billing_date, self.due + timedelta(days=30))
+        self.assertEqual(self.subscription.interviews_used, 3)
+        payment = Payment.objects.get(subscription=self.subscription)
+        self.assertEqual(payment.status, 'pending')
+        self.assertFalse(metering.active_subscriptions(self.user.id).exists())
+
+    def test_confirmed_renewal_extends_the_subscription_once(self):
+        run_billing_cycle(self.now)
+        payment = Payment.objects.get(subscription=self.subscription)
+
+        self.assertEqual(self.confirm(payment).status_code, 200)
+        self.subscription.refresh_from_db()
+        self.assertEqual(self.subscription.status, 'active')
+        self.assertEqual(self.subscription.end_date, self.due + timedelta(days=30))
+        self.assertEqual(self.subscription.interviews_used, 0)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_premium)
+
+        self.assertEqual(self.confirm(payment).status_code, 200)
+        payment.refresh_from_db()
+        self.assertFalse(complete_renewal(payment))
+        self.subscription.refresh_from_db()
+        self.assertEqual(self.subscription.end_date, self.due + timedelta(days=30))
+        self.assertEqual(run_billing_cycle(self.now), {'billed': 0, 'expired': 0})
+
+    def test_unpaid_renewal_expires_after_the_grace_period(self):
+        run_billing_cycle(self.now)
+        later = self.now + timedelta(days=8)
+        self.assertEqual(run_billing_cycle(later), {'billed': 0, 'expired': 1})
+        self.assertEqual(run_billing_cycle(later), {'billed': 0, 'expired': 0})
+
+        self.subscription.refresh_from_db()
+        self.assertEqual(self.subscription.status, 'expired')
+        payment = Payment.objects.get(subscription=self.subscription)
+        self.assertEqual(payment.status, 'cancelled')
+        self.assertEqual(self.confirm(payment).status_code, 400)
+
+    def test_long_overdue_subscription_is_expired_without_billing(self):
+        overdue = self.now - timedelta(days=90)
+        Subscription.objects.filter(pk=self.subscription.pk).update(end_date=overdue, next_billing_date=overdue)
+        self.assertEqual(run_billing_cycle(self.now), {'billed': 0, 'expired': 1})
+        self.assertFalse(Payment.objects.filter(subscription=self.subscription).exists())
+
+
+class ConfirmPaymentRetryTests(TestCase):
+
+    def setUp(self):
+        self.plan = PaymentPlan.objects.create(name='Pack', description='', price=Decimal('5.00'))
+        self.user = User.objects.create_user('payer', 'payer@example.com', 'pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def payment(self, user=None, number=1):
+        user = user or self.user
+        return Payment.objects.create(
+            user=user, plan=self.plan, amount=self.plan.price, transaction_id=f'TXN-{user.id}-{number}'
+        )
+
+    def confirm(self, payment, key, client=None):
+        return (client or self.client).post(
+            '/api/v1/payments/confirm_payment/', {'payment_id': payment.id}, format='json', HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_retry_with_the_same_key_returns_the_first_result(self):
+        payment = self.payment()
+        first = self.confirm(payment, 'key-1')
+        retry = self.confirm(payment, 'key-1')
+        self.assertEqual((first.status_code, retry.status_code), (200, 200))
+        self.assertEqual(retry.data['message'], 'Payment already confirmed')
+        self.assertEqual(retry.data['invoice']['id'], first.data['invoice']['id'])
+        self.assertEqual(Invoice.objects.filter(payment=payment).count(), 1)
+
+        self.assertEqual(self.confirm(payment, 'key-2').status_code, 409)
+
+    def test_key_cannot_complete_a_second_payment_of_the_user(self):
+        self.confirm(self.payment(number=1), 'key-1')
+        second = self.payment(number=2)
+        self.assertEqual(self.confirm(second, 'key-1').status_code, 409)
+        second.refresh_from_db()
+        self.assertEqual(second.status, 'pending')
+
+    def test_keys_are_scoped_per_user(self):
+        other = User.objects.create_user('other', 'other@example.com', 'pass')
+        client = APIClient()
+        client.force_authenticate(other)
+        self.assertEqual(self.confirm(self.payment(), 'shared').status_code, 200)
+        self.assertEqual(self.confirm(self.payment(other), 'shared', client).status_code, 200)
+
+    def test_other_integrity_errors_are_not_reported_as_key_reuse(self):
+        payment = self.payment()
+        with mock.patch.object(Invoice.objects, 'create', side_effect=IntegrityError('duplicate invoice_number')):
+            with self.assertRaises(IntegrityError):
+                self.confirm(payment, 'key-1')
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, 'pending')
+        self.assertEqual(self.confirm(payment, 'key-1').status_code, 200)
+
+
+class EntitlementCacheTests(TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(entitlements, 'get_redis', return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = entitlements.LocalEntitlementCache()
+        cache_patcher = mock.patch.object(entitlements, '_local_cache', self.cache)
+        cache_patcher.start()
+        self.addCleanup(cache_patcher.stop)
+
+        self.user = User.objects.create_user('entitled', 'entitled@example.com', 'pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_resolved_entitlement_is_cached(self):
+        subscription = subscribe(self.user, max_interviews=5, advanced_analytics=True)
+        entitlement = entitlements.resolve(self.user)
+        self.assertEqual((entitlement.subscription_id, entitlement.max_interviews), (subscription.id, 5))
+        self.assertTrue(entitlement.advanced_analytics)
+        with self.assertNumQueries(0):
+            self.assertEqual(entitlements.resolve(self.user), entitlement)
+
+    def test_cache_hit_costs_no_query_on_a_gated_endpoint(self):
+        entitlements.resolve(self.user)
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/subscriptions/entitlements/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['is_premium'])
+
+    def test_subscription_changes_invalidate_on_commit(self):
+        self.assertFalse(entitlements.resolve(self.user).is_premium)
+        with self.captureOnCommitCallbacks(execute=True):
+            subscription = subscribe(self.user, advanced_analytics=True)
+        self.assertTrue(entitlements.resolve(self.user).advanced_analytics)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            subscription.status = 'cancelled'
+            subscription.save()
+        self.assertFalse(entitlements.resolve(self.user).is_premium)
+
+    def test_invalidate_many_drops_every_user_after_commit(self):
+        other = User.objects.create_user('other', 'other@example.com', 'pass')
+        for user in (self.user, other):
+            entitlements.resolve(user)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            entitlements.invalidate_many([self.user.id, other.id, self.user.id])
+            self.assertIsNotNone(self.cache.get(self.user.id))  # Not before commit
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(self.cache.get(self.user.id))
+        self.assertIsNone(self.cache.get(other.id))
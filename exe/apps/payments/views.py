@@ -3,6 +3,9 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
+from django.db import IntegrityError, transaction
+from apps.notifications.events import payment_confirmed
+from .billing import complete_renewal
 from .models import PaymentPlan, Subscription, Payment, Invoice
 from .serializers import (
     PaymentPlanSerializer, SubscriptionSerializer, CreateSubscriptionSerializer,
@@ -58,6 +61,14 @@ class SubscriptionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
     
+    @action(detail=False, methods=['get'])
+    def entitlements(self, request):
+        """
+        Get the current plan limits and features
+        GET /api/v1/subscriptions/entitlements/
+        """
+        return Response(request.entitlements.to_dict())
+    
     @action(detail=False, methods=['post'])
     def create_subscription(self, request):
         """Create a new subscription with payment"""
@@ -138,53 +149,122 @@ class PaymentViewSet(viewsets.ReadOnlyModelViewSet):
     
     @action(detail=False, methods=['post'])
     def confirm_payment(self, request):
-        """Confirm a payment after gateway processing"""
+        """
+        Confirm a payment after gateway processing
+        POST /api/v1/payments/confirm_payment/
+        Header: Idempotency-Key (optional, defaults to the gateway payment id)
+        
+        Idempotent: the payment row is locked for the whole confirmation, and a
+        retry of an already completed payment returns its invoice without
+        writing anything. Keys are unique per user; reusing one for another
+        payment returns 409.
+        """
         serializer = PaymentConfirmSerializer(
             data=request.data,
             context={'request': request}
         )
         
-        if serializer.is_valid():
-            payment_id = serializer.validated_data['payment_id']
-            payment = Payment.objects.get(id=payment_id)
-            
-            # Update payment with gateway info
-            if 'razorpay_payment_id' in serializer.validated_data:
-                payment.razorpay_payment_id = serializer.validated_data['razorpay_payment_id']
-                payment.razorpay_order_id = serializer.validated_data.get('razorpay_order_id', '')
-            
-            if 'stripe_payment_intent_id' in serializer.validated_data:
-                payment.stripe_payment_intent_id = serializer.validated_data['stripe_payment_intent_id']
-            
-            # Mark payment as completed
-            payment.mark_completed()
-            
-            # Update subscription status if needed
-            if payment.subscription:
-                if payment.subscription.status == 'cancelled':
-                    payment.subscription.status = 'active'
-                    payment.subscription.save(update_fields=['status', 'updated_at'])
-            
-            # Create invoice
-            invoice = Invoice.objects.create(
-                user=payment.user,
-                payment=payment,
-                subscription=payment.subscription,
-                invoice_number=f"INV-{timezone.now().strftime('%Y%m%d')}-{uuid.uuid4().hex[:8].upper()}",
-                status='paid',
-                subtotal=payment.amount,
-                total=payment.amount,
-                currency=payment.currency,
-                paid_date=timezone.now().date()
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = serializer.validated_data
+        key = self._idempotency_key(request, data)
+        
+        try:
+            with transaction.atomic():
+                payment = (
+                    Payment.objects.select_for_update(of=('self',))
+                    .select_related('user', 'plan', 'subscription', 'invoice__user')
+                    .filter(id=data['payment_id'], user=request.user)
+                    .first()
+                )
+                if payment is None:
+                    return Response({'error': 'Payment not found'}, status=status.HTTP_404_NOT_FOUND)
+                
+                # Retried confirmation: nothing to do
+                if payment.status == 'completed':
+                    if key and payment.idempotency_key and key != payment.idempotency_key:
+                        return Response(
+                            {'error': 'Payment was already confirmed with a different key'},
+                            status=status.HTTP_409_CONFLICT
+                        )
+                    invoice = getattr(payment, 'invoice', None)
+                    return Response({
+                        'payment': PaymentSerializer(payment).data,
+                        'invoice': InvoiceSerializer(invoice).data if invoice else None,
+                        'message': 'Payment already confirmed'
+                    })
+                
+                if payment.status not in ['pending', 'processing']:
+                    return Response({'error': 'Payment cannot be confirmed'}, status=status.HTTP_400_BAD_REQUEST)
+                
+                # Update payment with gateway info
+                gateway_fields = ['idempotency_key']
+                payment.idempotency_key = key
+                if data.get('razorpay_payment_id'):
+                    payment.razorpay_payment_id = data['razorpay_payment_id']
+                    payment.razorpay_order_id = data.get('razorpay_order_id', '')
+                    gateway_fields += ['razorpay_payment_id', 'razorpay_order_id']
+                
+                if data.get('stripe_payment_intent_id'):
+                    payment.stripe_payment_intent_id = data['stripe_payment_intent_id']
+                    gateway_fields.append('stripe_payment_intent_id')
+                
+                # Mark payment as completed
+                payment.mark_completed(gateway_fields)
+                
+                # Update subscription status if needed
+                if payment.subscription:
+                    if payment.subscription.status == 'cancelled':
+                        payment.subscription.status = 'active'
+                        payment.subscription.save(update_fields=['status', 'updated_at'])
+                    # A paid renewal extends the subscription by the period it was billed for
+                    complete_renewal(payment)
+                
+                # Create invoice
+                invoice = Invoice.objects.create(
+                    user=payment.user,
+                    payment=payment,
+                    subscription=payment.subscription,
+                    invoice_number=f"INV-{timezone.now().strftime('%Y%m%d')}-{uuid.uuid4().hex[:8].upper()}",
+                    status='paid',
+                    subtotal=payment.amount,
+                    total=payment.amount,
+                    currency=payment.currency,
+                    issue_date=timezone.now().date(),
+                    paid_date=timezone.now().date()
+                )
+                
+                payment_confirmed(payment)
+        except IntegrityError:
+            # Only a key that already completed another of the user's payments is a
+            # conflict; any other constraint violation is a bug and is raised
+            reused = Payment.objects.filter(user=request.user, idempotency_key=key).exclude(
+                id=data['payment_id']
+            ).exists()
+            if not key or not reused:
+                raise
+            return Response(
+                {'error': 'This confirmation was already used for another payment'},
+                status=status.HTTP_409_CONFLICT
             )
-            
-            return Response({
-                'payment': PaymentSerializer(payment).data,
-                'invoice': InvoiceSerializer(invoice).data,
-                'message': 'Payment confirmed successfully'
-            })
         
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'payment': PaymentSerializer(payment).data,
+            'invoice': InvoiceSerializer(invoice).data,
+            'message': 'Payment confirmed successfully'
+        })
+    
+    def _idempotency_key(self, request, data):
+        """Client key if given, else the gateway payment id, else None"""
+        key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+        if key:
+            return key[:255]
+        if data.get('razorpay_payment_id'):
+            return f"razorpay:{data['razorpay_payment_id']}"
+        if data.get('stripe_payment_intent_id'):
+            return f"stripe:{data['stripe_payment_intent_id']}"
+        return None
     
     @action(detail=True, methods=['get'])
     def status_check(self, request, pk=None):
@@ -2,6 +2,8 @@
 ASGI config for exe project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP is served by Django; WebSocket connections are authenticated (JWT
+``?token=`` or session) and routed to the channels consumers.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -13,4 +15,23 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'exe.settings')
 
-application = get_asgi_application()
+# Initialise Django before importing anything that touches models
+django_asgi_app = get_asgi_application()
+
+from channels.auth import AuthMiddlewareStack  # noqa: E402
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from channels.security.websocket import AllowedHostsOriginValidator  # noqa: E402
+from apps.interview.routing import websocket_urlpatterns as interview_websocket_urlpatterns  # noqa: E402
+from apps.notifications.routing import websocket_urlpatterns as notification_websocket_urlpatterns  # noqa: E402
+from apps.users.middleware import JWTAuthMiddleware  # noqa: E402
+
+application = ProtocolTypeRouter({
+    'http': django_asgi_app,
+    'websocket': AllowedHostsOriginValidator(
+        AuthMiddlewareStack(
+            JWTAuthMiddleware(
+                URLRouter(interview_websocket_urlpatterns + notification_websocket_urlpatterns)
+            )
+        )
+    ),
+})
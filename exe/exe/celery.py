@@ -0,0 +1,16 @@
+"""
+Celery application for background work (AI evaluation, notifications, jobs).
+
+Start a worker with:  celery -A exe worker -l info
+Periodic jobs (settings.CELERY_BEAT_SCHEDULE) need the scheduler as well:
+    celery -A exe beat -l info
+"""
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'exe.settings')
+
+app = Celery('exe')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
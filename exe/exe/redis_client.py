@@ -0,0 +1,44 @@
+"""
+Shared, optional Redis connection.
+
+Features that can use Redis (leaderboards, queues, caches) call get_redis()
+and fall back to their database or in-process implementation when it
+returns None, so local development and tests never need a Redis server.
+"""
+import logging
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_checked = False
+
+
+def get_redis():
+    """Return a connected redis client, or None if Redis is not configured/reachable"""
+    global _client, _checked
+    if _checked:
+        return _client
+    _checked = True
+
+    url = getattr(settings, 'REDIS_URL', '')
+    if not url:
+        return None
+
+    try:
+        import redis
+        client = redis.Redis.from_url(url, socket_connect_timeout=1, socket_timeout=1)
+        client.ping()
+    except Exception as exc:
+        logger.warning('Redis unavailable at %s, using fallback: %s', url, exc)
+        return None
+
+    _client = client
+    return _client
+
+
+def reset_redis():
+    """Forget the cached client (used after settings change in tests)"""
+    global _client, _checked
+    _client = None
+    _checked = False
@@ -1,5 +1,8 @@
+import os
+import sys
 from pathlib import Path
 from datetime import timedelta
+from celery.schedules import crontab
 from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -51,6 +54,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.payments.middleware.EntitlementMiddleware',  # request.entitlements (lazy, cached per user)
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -208,6 +212,64 @@ SPECTACULAR_SETTINGS = {
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Interview scheduler (manage.py run_interview_scheduler)
+INTERVIEW_SCHEDULER = {
+    'REMINDERS': {'reminder_24h': 24 * 60, 'reminder_1h': 60},  # kind -> lead time in minutes
+    'NO_SHOW_GRACE_MINUTES': config('INTERVIEW_NO_SHOW_GRACE_MINUTES', default=30, cast=int),
+    'BATCH_SIZE': config('INTERVIEW_SCHEDULER_BATCH_SIZE', default=1000, cast=int),
+    'SEND_BATCH_SIZE': 200,  # reminders per send task / mail connection
+    'INTERVAL_SECONDS': config('INTERVIEW_SCHEDULER_INTERVAL', default=60, cast=int),
+}
+
+# Notification outbox delivery (manage.py process_notification_outbox)
+NOTIFICATIONS = {
+    'BACKENDS': {  # channel -> backend, delivered in this order
+        'in_app': 'apps.notifications.backends.InAppBackend',
+        'email': 'apps.notifications.backends.EmailBackend',
+        'websocket': 'apps.notifications.backends.WebSocketBackend',
+    },
+    'DEFAULT_CHANNELS': ['in_app', 'email', 'websocket'],
+    'BATCH_SIZE': config('NOTIFICATION_BATCH_SIZE', default=200, cast=int),
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BACKOFF': 30,  # seconds, doubled per attempt
+    'DISPATCH_ON_COMMIT': config('NOTIFICATION_DISPATCH_ON_COMMIT', default=True, cast=bool),
+    # Kinds whose email is folded into the daily/weekly digest (manage.py send_notification_digests)
+    'DIGEST_KINDS': ['exam_results', 'interview_evaluated'],
+    'DIGEST_DEFAULT': config('NOTIFICATION_DIGEST_DEFAULT', default='daily'),  # off / daily / weekly
+    'DIGEST_BATCH_SIZE': config('NOTIFICATION_DIGEST_BATCH_SIZE', default=500, cast=int),  # users per id range
+}
+
+# Cached plan entitlements exposed as request.entitlements
+ENTITLEMENTS = {
+    'TTL': config('ENTITLEMENT_CACHE_TTL', default=3600, cast=int),  # seconds, Redis
+    'LOCAL_TTL': 30,  # seconds, in-process fallback without Redis
+    'FREE_FEATURES': {'ai_feedback_enabled': True, 'advanced_analytics': False, 'priority_support': False},
+}
+
+# Subscription renewal/expiry job (manage.py run_billing_cycle)
+BILLING = {
+    'BATCH_SIZE': config('BILLING_BATCH_SIZE', default=500, cast=int),  # subscriptions per transaction
+    'GRACE_DAYS': config('BILLING_GRACE_DAYS', default=7, cast=int),  # unpaid renewals expire after this
+}
+
+# Email
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = config('EMAIL_HOST', default='localhost')
+EMAIL_PORT = config('EMAIL_PORT', default=25, cast=int)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=False, cast=bool)
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@localhost')
+
+# Resumable interview media uploads (audio/video answers)
+MEDIA_UPLOAD = {
+    'ROOT': config('MEDIA_UPLOAD_ROOT', default=str(MEDIA_ROOT / 'interview_media')),
+    'MAX_SIZE': config('MEDIA_UPLOAD_MAX_SIZE', default=500 * 1024 * 1024, cast=int),  # bytes per file
+    'CHUNK_SIZE': config('MEDIA_UPLOAD_CHUNK_SIZE', default=5 * 1024 * 1024, cast=int),  # suggested to clients
+    'MAX_CHUNK_SIZE': config('MEDIA_UPLOAD_MAX_CHUNK_SIZE', default=16 * 1024 * 1024, cast=int),
+    'CONTENT_TYPES': ('audio/', 'video/'),
+}
+
 # Channels Configuration (WebSocket)
 ASGI_APPLICATION = 'exe.asgi.application'
 CHANNEL_LAYERS = {
@@ -219,6 +281,27 @@ CHANNEL_LAYERS = {
     },
 }
 
+# In-memory layer for tests and single-process development (no cross-process delivery)
+if 'test' in sys.argv or config('CHANNEL_LAYER_BACKEND', default='redis') == 'memory':
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        },
+    }
+
+# Optional Redis for leaderboards, queues and caches (empty = use DB/in-process fallbacks)
+REDIS_URL = config('REDIS_URL', default='')
+
+# Activity ingestion: 'memory' (per-process buffer), 'redis' (shared queue) or 'sync'
+ACTIVITY_INGESTION = config('ACTIVITY_INGESTION', default='memory')
+ACTIVITY_FLUSH_BATCH_SIZE = config('ACTIVITY_FLUSH_BATCH_SIZE', default=100, cast=int)
+ACTIVITY_FLUSH_INTERVAL_MS = config('ACTIVITY_FLUSH_INTERVAL_MS', default=500, cast=int)
+ACTIVITY_FLUSH_MAX_ATTEMPTS = config('ACTIVITY_FLUSH_MAX_ATTEMPTS', default=3, cast=int)  # then dead-lettered
+
+# ActivityLog retention: months kept in the live (partitioned) table before archival
+ACTIVITY_LOG_RETENTION_MONTHS = config('ACTIVITY_LOG_RETENTION_MONTHS', default=12, cast=int)
+ACTIVITY_ARCHIVE_DIR = config('ACTIVITY_ARCHIVE_DIR', default=str(BASE_DIR / 'archive' / 'activity'))
+
 # Celery Configuration
 CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='redis://localhost:6379/0')
@@ -226,3 +309,128 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
+# Run tasks in-process instead of on a worker (tests / local development without a broker)
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=False, cast=bool)
+# Periodic jobs, run by:  celery -A exe beat -l info
+CELERY_BEAT_SCHEDULE = {
+    # Monthly ActivityLog partitions must exist before their month starts
+    'ensure-activity-partitions': {
+        'task': 'apps.analytics.tasks.ensure_activity_partitions_task',
+        'schedule': timedelta(days=1),
+    },
+    # Cohort facts: today's stay within 15 minutes, yesterday's are finalized after midnight
+    'rollup-exam-facts-today': {
+        'task': 'apps.analytics.tasks.rollup_exam_facts_task',
+        'schedule': timedelta(minutes=15),
+        'args': (0,),
+    },
+    'rollup-exam-facts-yesterday': {
+        'task': 'apps.analytics.tasks.rollup_exam_facts_task',
+        'schedule': crontab(hour=0, minute=30),
+        'args': (1,),
+    },
+    # Pick up evaluation jobs, media uploads, transcriptions, interview reminders and notifications whose
+    # on-commit dispatch failed or whose worker died
+    'sweep-evaluation-jobs': {
+        'task': 'apps.ai_engine.tasks.sweep_evaluation_jobs_task',
+        'schedule': timedelta(minutes=5),
+    },
+    'sweep-interview-reminders': {
+        'task': 'apps.interview.tasks.sweep_interview_reminders_task',
+        'schedule': timedelta(minutes=5),
+    },
+    'drain-notification-outbox': {
+        'task': 'apps.notifications.tasks.drain_notification_outbox_task',
+        'schedule': timedelta(minutes=1),
+    },
+    # Bills due renewals and expires lapsed subscriptions; safe to repeat
+    'run-billing-cycle': {
+        'task': 'apps.payments.tasks.run_billing_cycle_task',
+        'schedule': timedelta(hours=1),
+    },
+    # Local question index (AI_QUESTION_INDEX), rebuilt only when questions or templates changed
+    'rebuild-question-index': {
+        'task': 'apps.ai_engine.tasks.rebuild_question_index_task',
+        'schedule': timedelta(hours=1),
+    },
+    # Redis leaderboards that missed a score (failed ZADD) are rebuilt from the histograms
+    'sync-exam-leaderboards': {
+        'task': 'apps.exams.tasks.sync_leaderboards_task',
+        'schedule': timedelta(minutes=15),
+    },
+    # Digests cover the last complete day / ISO week (UTC); reruns send nothing twice
+    'send-daily-notification-digests': {
+        'task': 'apps.notifications.tasks.send_notification_digests_task',
+        'schedule': crontab(hour=7, minute=0),
+        'args': ('daily',),
+    },
+    'send-weekly-notification-digests': {
+        'task': 'apps.notifications.tasks.send_notification_digests_task',
+        'schedule': crontab(hour=7, minute=30, day_of_week='monday'),
+        'args': ('weekly',),
+    },
+}
+
+# AI Engine
+AI_EVALUATOR_BACKEND = config('AI_EVALUATOR_BACKEND', default='apps.ai_engine.evaluators.ProviderEvaluator')
+AI_PROVIDERS = {
+    'default': {
+        'BACKEND': config('AI_PROVIDER_BACKEND', default='apps.ai_engine.providers.offline.OfflineProvider'),
+        'MODEL': config('AI_PROVIDER_MODEL', default='offline-v1'),
+        'TIMEOUT': config('AI_PROVIDER_TIMEOUT', default=30, cast=float),
+        'MAX_RETRIES': config('AI_PROVIDER_MAX_RETRIES', default=2, cast=int),
+        'MAX_CONCURRENCY': config('AI_PROVIDER_MAX_CONCURRENCY', default=8, cast=int),
+        'FALLBACK': 'offline',
+        # CACHE is left to the backend: on for API providers, off for the offline one
+        'OPTIONS': {'api_key': config('OPENAI_API_KEY', default='')},
+    },
+    'offline': {
+        'BACKEND': 'apps.ai_engine.providers.offline.OfflineProvider',
+        'MODEL': 'offline-v1',
+        'MAX_CONCURRENCY': 64,
+    },
+}
+
+# Evaluations are sent to the provider in batches of up to MAX_ITEMS,
+# waiting at most MAX_WAIT_MS for a batch to fill
+AI_EVALUATION_BATCH = {
+    'MAX_ITEMS': config('AI_EVALUATION_BATCH_SIZE', default=8, cast=int),
+    'MAX_WAIT_MS': config('AI_EVALUATION_BATCH_WAIT_MS', default=50, cast=int),
+    'RESULT_TIMEOUT': config('AI_EVALUATION_RESULT_TIMEOUT', default=120, cast=float),  # seconds a caller waits
+}
+
+# Local vector index of existing questions, consulted before the LLM
+# (built by `manage.py build_question_index`, rebuilt hourly by Celery beat when the corpus changed)
+AI_QUESTION_INDEX = {
+    'ENABLED': config('AI_QUESTION_INDEX_ENABLED', default=True, cast=bool),
+    'PATH': config('AI_QUESTION_INDEX_PATH', default=str(BASE_DIR / 'var' / 'question_index')),
+    'EMBEDDER': 'apps.ai_engine.vector_index.HashingEmbedder',
+    'DIMENSIONS': 512,
+    'MIN_SCORE': config('AI_QUESTION_INDEX_MIN_SCORE', default=0.15, cast=float),  # term cosine similarity
+}
+
+# Speech-to-text for audio answers, run on a process pool before evaluation
+AI_TRANSCRIPTION = {
+    'ENABLED': config('AI_TRANSCRIPTION_ENABLED', default=True, cast=bool),
+    'BACKEND': config('AI_TRANSCRIPTION_BACKEND', default='apps.ai_engine.transcription.LocalStubBackend'),
+    'OPTIONS': {},
+    'WORKERS': config('AI_TRANSCRIPTION_WORKERS', default=os.cpu_count() or 1, cast=int),  # 0 = inline
+    'START_METHOD': 'spawn',
+    'SEGMENT_SECONDS': config('AI_TRANSCRIPTION_SEGMENT_SECONDS', default=30, cast=int),
+    # Hosts audio_url answers may be downloaded from; uploads made through /api/v1/uploads/ are read from disk
+    'URL_HOSTS': config('AI_TRANSCRIPTION_URL_HOSTS', default='', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()]),
+}
+
+# Adaptive interviews: candidate questions per difficulty and rating step size
+ADAPTIVE_INTERVIEW = {
+    'POOL_SIZE': None,  # defaults to the interview's total_questions
+    'LEARNING_RATE': config('ADAPTIVE_INTERVIEW_LEARNING_RATE', default=1.0, cast=float),
+}
+
+# Content-addressed cache for question generation and evaluation
+AI_CACHE = {
+    'ENABLED': config('AI_CACHE_ENABLED', default=True, cast=bool),
+    'TTL': config('AI_CACHE_TTL', default=7 * 24 * 3600, cast=int),  # seconds
+    'LRU_SIZE': config('AI_CACHE_LRU_SIZE', default=1024, cast=int),  # in-process entries
+    'MAX_ENTRIES': config('AI_CACHE_MAX_ENTRIES', default=100000, cast=int),  # database rows
+}
@@ -20,8 +20,8 @@ urlpatterns = [
     path('api/v1/', include('apps.interview.urls')),
     path('api/v1/', include('apps.analytics.urls')),
     path('api/v1/', include('apps.payments.urls')),
-    # path('api/v1/ai/', include('apps.ai_engine.urls')),
-    # path('api/v1/notifications/', include('apps.notifications.urls')),
+    path('api/v1/ai/', include('apps.ai_engine.urls')),
+    path('api/v1/notifications/', include('apps.notifications.urls')),
 ]
 
 # Serve media files in development